@@ -1,21 +1,175 @@
 #!/usr/bin/python3
 """Career recommendation system database configuration."""
+import threading
+import time
 from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import (
+    AsyncSession, async_sessionmaker, create_async_engine
+)
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from .settings import settings
 
 PASSW = settings.DB_USER_PASSW
 DB_NAME = settings.DB_NAME
-SQLALCHEMY_DATABASE_URL = f"postgresql://{PASSW}@localhost/{DB_NAME}"
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+DB_HOST = settings.DB_HOST
+SQLALCHEMY_DATABASE_URL = f"postgresql://{PASSW}@{DB_HOST}/{DB_NAME}"
+ASYNC_SQLALCHEMY_DATABASE_URL = (
+    f"postgresql+asyncpg://{PASSW}@{DB_HOST}/{DB_NAME}"
+)
+
+
+class PoolStats:
+    """
+    Checkout wait times and saturation of one connection pool.
+
+    Attributes:
+        engine: engine whose pool is described, set once it exists.
+    """
+
+    def __init__(self):
+        """Initialize empty counters."""
+        self.engine = None
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.last_wait_ms = 0.0
+
+    def record(self, wait_ms: float, timed_out: bool = False) -> None:
+        """Count one checkout and the time spent waiting for it."""
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait_ms += wait_ms
+            self.last_wait_ms = wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def snapshot(self) -> dict:
+        """Return pool occupancy and checkout wait metrics."""
+        pool = getattr(self.engine, "sync_engine", self.engine).pool
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        checked_out = pool.checkedout()
+        attempts = (self.checkouts + self.timeouts) or 1
+        return {
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "checked_out": checked_out,
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "saturation": checked_out / capacity if capacity else 0.0,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "mean_wait_ms": self.total_wait_ms / attempts,
+            "last_wait_ms": self.last_wait_ms,
+            "max_wait_ms": self.max_wait_ms,
+        }
+
+
+def timed_pool(base, stats: PoolStats):
+    """Subclass a queue pool so every checkout records its wait time."""
+
+    class TimedPool(base):
+        """Queue pool timing how long checkouts wait for a connection."""
+
+        def _do_get(self):
+            """Check a connection out, recording the wait."""
+            start = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except PoolTimeoutError:
+                stats.record((time.perf_counter() - start) * 1000, True)
+                raise
+            stats.record((time.perf_counter() - start) * 1000)
+            return connection
+
+    return TimedPool
+
+
+def pool_options() -> dict:
+    """Pool arguments shared by every engine."""
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def statement_timeout_args(asyncpg: bool) -> dict:
+    """Connection arguments setting the server side statement timeout."""
+    timeout = settings.DB_STATEMENT_TIMEOUT_MS
+    if timeout <= 0:
+        return {}
+    if asyncpg:
+        return {"server_settings": {"statement_timeout": str(timeout)}}
+    return {"options": f"-c statement_timeout={timeout}"}
+
+
+def make_async_engine(url: str, stats: PoolStats):
+    """Create an asyncpg engine whose pool reports to stats."""
+    if url.startswith("postgresql://"):
+        url = "postgresql+asyncpg://" + url[len("postgresql://"):]
+    stats.engine = create_async_engine(
+        url,
+        poolclass=timed_pool(AsyncAdaptedQueuePool, stats),
+        connect_args=statement_timeout_args(asyncpg=True),
+        **pool_options()
+    )
+    return stats.engine
+
+
+# the blocking engine is kept for migrations and command line tools
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args=statement_timeout_args(asyncpg=False),
+    **pool_options()
+)
 session_local = sessionmaker(autoflush=False, autocommit=False, bind=engine)
+# route handlers use the async engine so a slow query never blocks the loop
+pool_stats = PoolStats()
+async_engine = make_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, pool_stats)
+async_session_local = async_sessionmaker(
+    async_engine, class_=AsyncSession,
+    autoflush=False, expire_on_commit=False
+)
 Base = declarative_base()
 
 
-def get_db():
-    """Get the database."""
-    db = session_local()
-    try:
+async def get_db():
+    """Get an async database session."""
+    async with async_session_local() as db:
         yield db
-    finally:
-        db.close()
+
+
+if settings.DB_READ_REPLICA_URL:
+    replica_pool_stats = PoolStats()
+    async_read_engine = make_async_engine(
+        settings.DB_READ_REPLICA_URL, replica_pool_stats
+    )
+    async_read_session_local = async_sessionmaker(
+        async_read_engine, class_=AsyncSession,
+        autoflush=False, expire_on_commit=False
+    )
+
+    async def get_read_db():
+        """Get an async session on the read replica."""
+        async with async_read_session_local() as db:
+            yield db
+else:
+    replica_pool_stats = None
+    # the same callable, so a request reading and writing shares a session
+    get_read_db = get_db
+
+
+def pool_snapshot() -> dict:
+    """Metrics of every connection pool."""
+    pools = {"primary": pool_stats.snapshot()}
+    if replica_pool_stats is not None:
+        pools["replica"] = replica_pool_stats.snapshot()
+    return pools
@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 """Base settings for the application."""
 from pathlib import Path
+from typing import Optional
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseSettings
 
@@ -16,6 +17,54 @@ class Settings(BaseSettings):
     DB_NAME: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_WEEKS: int
+    DB_HOST: str = "localhost"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+    DB_READ_REPLICA_URL: Optional[str] = None
+    DB_CREATE_TABLES_ON_STARTUP: bool = False
+    PAGE_SIZE: int = 50
+    PAGE_SIZE_MAX: int = 200
+    RATING_BULK_MAX: int = 1000
+    WRITE_BEHIND: bool = False
+    WRITE_BEHIND_PATH: str = "write_behind.db"
+    WRITE_BEHIND_BATCH_SIZE: int = 500
+    WRITE_BEHIND_INTERVAL: float = 0.5
+    WRITE_BEHIND_MAX_ATTEMPTS: int = 3
+    CATALOG_CHUNK_SIZE: int = 1000
+    STREAM_CHUNK_SIZE: int = 1000
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+    AUTH_USER_CACHE_SIZE: int = 10000
+    AUTH_USER_CACHE_TTL: float = 30.0
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_EXECUTOR: str = "thread"
+    PASSWORD_WORKERS: int = 2
+    PASSWORD_MAX_PENDING: int = 32
+    TEMPLATE_BYTECODE_CACHE: Optional[str] = "template_cache"
+    FRAGMENT_CACHE_SIZE: int = 1024
+    FRAGMENT_CACHE_TTL: float = 60.0
+    CATALOG_MAX_AGE: int = 0
+    STATIC_PAGE_MAX_AGE: int = 86400
+    COMPRESSION_MIN_SIZE: int = 500
+    COMPRESSION_LEVEL: int = 6
+    INFERENCE_ENGINE: str = "mmap"
+    INFERENCE_MODEL_PATH: Optional[str] = None
+    INFERENCE_WARM_UP: bool = True
+    FEATURE_TRANSFORM_PATH: Optional[str] = None
+    MODEL_REGISTRY_PATH: Optional[str] = None
+    MODEL_RELOAD_INTERVAL: float = 5.0
+    INFERENCE_MAX_BATCH_SIZE: int = 32
+    INFERENCE_MAX_WAIT_MS: float = 5.0
+    INFERENCE_MAX_QUEUE_SIZE: int = 1024
+    INFERENCE_EXECUTOR: str = "thread"
+    INFERENCE_WORKERS: int = 1
+    RECOMMENDATION_CHUNK_SIZE: int = 1024
+    RECOMMENDATION_CACHE_SIZE: int = 4096
+    RECOMMENDATION_CACHE_TTL: float = 300.0
+    RECOMMENDATION_CACHE_URL: Optional[str] = None
 
     class Config:
         """Configuration for environment variables."""
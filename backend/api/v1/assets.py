@@ -0,0 +1,269 @@
+#!/usr/bin/python3
+"""
+Fingerprinted, precompressed static assets.
+
+Usage:
+    python -m backend.api.v1.assets
+    python -m backend.api.v1.assets --clean
+
+Copies every file of ``backend/api/static`` into ``static_build`` under a
+name carrying a hash of its content, ``css/styles.<hash>.css``. Text
+files also get ``.gz`` and ``.br`` variants when compression pays off.
+``url()`` references between stylesheets, fonts and images are rewritten
+to the hashed names. ``manifest.json`` maps each source path to its built
+name and encodings. Earlier builds are kept so pages cached before a
+deploy still find their assets; ``--clean`` removes them first.
+
+Templates link assets with ``asset('css/styles.css')``. A file missing
+from the manifest, or every file before the first build, is linked from
+``/static`` as before.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+from typing import Dict, List, Optional, Set
+import anyio
+import brotli
+from jinja2 import pass_context
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+from backend.api.settings import BASE_PATH, TEMPLATES
+
+SOURCE_DIR = str(BASE_PATH / "static")
+BUILD_DIR = str(BASE_PATH / "static_build")
+MANIFEST = "manifest.json"
+# files worth compressing; images and woff fonts are compressed already
+COMPRESSIBLE = {
+    ".css", ".js", ".json", ".map", ".svg", ".txt", ".xml", ".html",
+    ".eot", ".ttf", ".otf", ".ico",
+}
+# preferred first
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+IMMUTABLE = "public, max-age=31536000, immutable"
+CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+
+def content_hash(data: bytes) -> str:
+    """Short hash naming one version of a file."""
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def hashed_name(path: str, data: bytes) -> str:
+    """``dir/name.ext`` as ``dir/name.<hash>.ext``."""
+    stem, ext = posixpath.splitext(path)
+    return f"{stem}.{content_hash(data)}{ext}"
+
+
+def rewrite_css(css: str, path: str, built: Dict[str, dict]) -> str:
+    """Point the relative ``url()`` references of a stylesheet at builds."""
+    directory = posixpath.dirname(path)
+
+    def replace(match) -> str:
+        quote, ref = match.groups()
+        target, suffix = re.match(r"([^?#]*)(.*)", ref).groups()
+        if not target or re.match(r"^([a-z]+:|/)", target):
+            return match.group(0)
+        source = posixpath.normpath(posixpath.join(directory, target))
+        entry = built.get(source)
+        if entry is None:
+            return match.group(0)
+        relative = posixpath.relpath(entry["path"], directory or ".")
+        return f"url({quote}{relative}{suffix}{quote})"
+
+    return CSS_URL.sub(replace, css)
+
+
+def compress(data: bytes) -> Dict[str, bytes]:
+    """gzip and brotli variants of data that are clearly smaller."""
+    variants = {
+        "br": brotli.compress(data, quality=11),
+        "gzip": gzip.compress(data, compresslevel=9, mtime=0),
+    }
+    return {
+        encoding: variant for encoding, variant in variants.items()
+        if len(variant) < len(data) * 0.9
+    }
+
+
+def source_files(source: str) -> List[str]:
+    """Paths of every source file, stylesheets last."""
+    paths = []
+    for root, _, names in os.walk(source):
+        for name in names:
+            full = os.path.join(root, name)
+            paths.append(os.path.relpath(full, source).replace(os.sep, "/"))
+    # stylesheets refer to fonts and images, so those are hashed first
+    return sorted(paths, key=lambda path: (path.endswith(".css"), path))
+
+
+def build(
+    source: str = SOURCE_DIR, target: str = BUILD_DIR, clean: bool = False
+) -> Dict[str, dict]:
+    """Write hashed and precompressed copies and the manifest."""
+    if clean and os.path.isdir(target):
+        shutil.rmtree(target)
+    built: Dict[str, dict] = {}
+    for path in source_files(source):
+        with open(os.path.join(source, path), "rb") as file:
+            data = file.read()
+        if path.endswith(".css"):
+            data = rewrite_css(data.decode("utf-8"), path, built).encode()
+        name = hashed_name(path, data)
+        variants = (
+            compress(data)
+            if posixpath.splitext(path)[1].lower() in COMPRESSIBLE else {}
+        )
+        output = os.path.join(target, name)
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        with open(output, "wb") as file:
+            file.write(data)
+        for encoding, suffix in ENCODINGS:
+            if encoding in variants:
+                with open(output + suffix, "wb") as file:
+                    file.write(variants[encoding])
+        built[path] = {
+            "path": name,
+            "size": len(data),
+            "encodings": {
+                encoding: len(variant)
+                for encoding, variant in variants.items()
+            },
+        }
+    with open(os.path.join(target, MANIFEST), "w", encoding="utf-8") as file:
+        json.dump(built, file, indent=1, sort_keys=True)
+    return built
+
+
+def load_manifest(target: str = BUILD_DIR) -> Dict[str, dict]:
+    """The manifest of the last build, empty if there was none."""
+    try:
+        with open(os.path.join(target, MANIFEST), encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+manifest = load_manifest()
+
+
+def accepted_encodings(header: str) -> Set[str]:
+    """Content codings an Accept-Encoding header allows."""
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        match = re.search(r"q=([0-9.]+)", params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        if name.strip() and quality > 0:
+            accepted.add(name.strip().lower())
+    if "*" in accepted:
+        accepted.update(encoding for encoding, _ in ENCODINGS)
+    return accepted
+
+
+class AssetFiles(StaticFiles):
+    """
+    Built assets, cached for good and sent precompressed when accepted.
+
+    Attributes:
+        encodings (dict): precompressed encodings by built path.
+    """
+
+    def __init__(self, directory: str, built: Dict[str, dict]):
+        """Serve directory, knowing the variants of the built files."""
+        super().__init__(directory=directory, check_dir=False)
+        self.encodings = {
+            entry["path"]: entry["encodings"] for entry in built.values()
+        }
+
+    async def check_config(self) -> None:
+        """Allow running before the first build, answering 404s."""
+        if os.path.isdir(self.directory):
+            await super().check_config()
+
+    async def _variant(
+        self, path: str, scope: Scope
+    ) -> Optional[Response]:
+        """The best precompressed variant of path the client accepts."""
+        available = self.encodings.get(path)
+        if not available:
+            return None
+        accepted = accepted_encodings(
+            Headers(scope=scope).get("accept-encoding", "")
+        )
+        for encoding, suffix in ENCODINGS:
+            if encoding not in available or encoding not in accepted:
+                continue
+            full_path, stat_result = await anyio.to_thread.run_sync(
+                self.lookup_path, path + suffix
+            )
+            if stat_result is None:
+                continue
+            response = FileResponse(
+                full_path, stat_result=stat_result, method=scope["method"],
+                media_type=mimetypes.guess_type(path)[0],
+                headers={"Content-Encoding": encoding}
+            )
+            if self.is_not_modified(response.headers, Headers(scope=scope)):
+                return NotModifiedResponse(response.headers)
+            return response
+        return None
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        """Serve path, or its precompressed variant, as immutable."""
+        path = path.replace(os.sep, "/")
+        response = await self._variant(path, scope)
+        if response is None:
+            response = await super().get_response(path, scope)
+        response.headers["Cache-Control"] = IMMUTABLE
+        if self.encodings.get(path):
+            response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+
+@pass_context
+def asset(context, path: str) -> str:
+    """URL of the built version of a static file, or of the file."""
+    request = context["request"]
+    entry = manifest.get(path)
+    if entry is None:
+        return str(request.url_for("static", path=path))
+    return str(request.url_for("assets", path=entry["path"]))
+
+
+TEMPLATES.env.globals["asset"] = asset
+
+
+def main(argv=None) -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--clean", action="store_true", help="remove earlier builds first"
+    )
+    args = parser.parse_args(argv)
+    built = build(clean=args.clean)
+    size = sum(entry["size"] for entry in built.values())
+    smallest = sum(
+        min([entry["size"], *entry["encodings"].values()])
+        for entry in built.values()
+    )
+    print(
+        f"built {len(built)} files into {BUILD_DIR}: {size} bytes, "
+        f"{smallest} bytes with the best encoding of each"
+    )
+
+
+if __name__ == "__main__":
+    main()
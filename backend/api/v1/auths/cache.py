@@ -0,0 +1,101 @@
+#!/usr/bin/python3
+"""Bounded, expiring in-process caches."""
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Least recently used mapping whose entries expire.
+
+    Each entry expires ``ttl`` seconds after it is set, or at the time
+    given with it, whichever comes first. The cache lives in one process
+    and is used from the event loop thread only.
+
+    Attributes:
+        max_size (int): entries kept; 0 disables the cache.
+        ttl (float): default lifetime of an entry in seconds; None to keep
+            entries until the time they are set with.
+        hits (int): lookups answered from the cache.
+        misses (int): lookups not found, or found expired.
+        expired (int): entries dropped because they expired.
+        evicted (int): entries dropped to stay within max_size.
+        invalidated (int): entries dropped by ``invalidate``.
+    """
+
+    def __init__(self, max_size: int, ttl: Optional[float] = None):
+        """Initialize an empty cache."""
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+        self.invalidated = 0
+
+    def get(self, key: Hashable) -> Any:
+        """The value cached under key, or None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.expired += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(
+        self, key: Hashable, value: Any, expires_at: Optional[float] = None
+    ) -> None:
+        """Cache value under key until expires_at or for the ttl."""
+        if self.max_size <= 0:
+            return
+        if self.ttl is not None:
+            deadline = time.time() + self.ttl
+            expires_at = min(expires_at or deadline, deadline)
+        if expires_at is None or expires_at <= time.time():
+            return
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evicted += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop the entry of key, if any."""
+        if self._entries.pop(key, None) is not None:
+            self.invalidated += 1
+
+    def invalidate_where(self, predicate: Callable[[Any], bool]) -> None:
+        """Drop every entry whose value matches predicate."""
+        for key in [
+            key for key, (value, _) in self._entries.items()
+            if predicate(value)
+        ]:
+            self.invalidate(key)
+
+    def clear(self) -> None:
+        """Drop every entry, keeping the counters."""
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """Size, counters and hit rate of the cache."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "invalidated": self.invalidated,
+        }
@@ -1,5 +1,6 @@
 #!/usr/bin/python3
 """Authentication support."""
+import hashlib
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -8,10 +9,13 @@ from fastapi.security import OAuth2  # OAuth2PasswordBearer
 from fastapi.security.base import SecurityBase
 from fastapi.security.utils import get_authorization_scheme_param
 from fastapi.openapi.models import OAuthFlows as OAuthFlowsModel
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from backend.api.db_config import get_db
 from backend.api.settings import settings
+from backend.api.v1.auths.cache import TTLCache
 from backend.api.v1.models.user_models import User
+from backend.api.v1.schemas import user_schemas
 from backend.api.v1.schemas.user_schemas import TokenData
 
 # OAUTH2 = OAuth2PasswordBearer(tokenUrl="login_token")
@@ -19,6 +23,13 @@ SECRET_KEY = settings.OAUTH2_SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_WEEKS = settings.ACCESS_TOKEN_EXPIRE_WEEKS
 
+# verified claims by token digest, each kept until its token expires
+token_cache = TTLCache(settings.AUTH_TOKEN_CACHE_SIZE)
+# users by id, briefly: a change made by another worker shows after ttl
+user_cache = TTLCache(
+    settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL
+)
+
 
 class BasicAuth(SecurityBase):
     """Basic authentication."""
@@ -114,33 +125,87 @@ def create_token(data: dict):
 
 def verify_token(token: str, credentials_exception):
     """Verify access token provided by user."""
+    digest = hashlib.sha256(token.encode()).digest()
+    token_data = token_cache.get(digest)
+    if token_data is not None:
+        return token_data
     try:
         decoded_jwt = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = decoded_jwt.get("id")
         if user_id is None:
             raise credentials_exception
-        token_data = TokenData(id=user_id)
+        token_data = TokenData(
+            id=user_id, username=decoded_jwt.get("username")
+        )
 
     except JWTError as exc:
         raise credentials_exception from exc
 
+    token_cache.set(digest, token_data, decoded_jwt.get("exp"))
     return token_data
 
 
-def get_current_user(
-        token: str = Depends(oauth2_scheme),
-        session: Session = Depends(get_db)
-):
-    """Get current user helper."""
-    credentials_exception = HTTPException(
+def credentials_error() -> HTTPException:
+    """Error of a missing, invalid or expired token."""
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid credentials",
         headers={"WWW-Authenticate": "Bearer"}
     )
 
-    user = verify_token(token, credentials_exception)
-    query = session.query(User).filter(
-        User.id == user.id
-    ).first()
 
-    return query
+async def load_user(
+    session: AsyncSession, user_id: str
+) -> Optional[user_schemas.User]:
+    """A user by id, from the user cache or the database."""
+    user = user_cache.get(user_id)
+    if user is None:
+        row = await session.scalar(select(User).filter(User.id == user_id))
+        if row is None:
+            return None
+        user = user_schemas.User.from_orm(row)
+        user_cache.set(user_id, user)
+    return user
+
+
+def forget_user(user_id: str) -> None:
+    """Drop the cached row and token claims of a changed or deleted user."""
+    user_cache.invalidate(user_id)
+    token_cache.invalidate_where(lambda claims: claims.id == user_id)
+
+
+def cache_stats() -> dict:
+    """Hit rates of the token and user caches."""
+    return {"tokens": token_cache.stats(), "users": user_cache.stats()}
+
+
+async def get_current_user(
+        token: str = Depends(oauth2_scheme),
+        session: AsyncSession = Depends(get_db)
+):
+    """Get current user helper."""
+    claims = verify_token(token, credentials_error())
+    user = await load_user(session, claims.id)
+    if user is None:
+        raise credentials_error()
+    return user
+
+
+async def get_current_claims(
+        token: str = Depends(oauth2_scheme),
+        session: AsyncSession = Depends(get_db)
+) -> TokenData:
+    """
+    Id and username of the current user, from the token alone.
+
+    For routes needing nothing else: the user is not looked up, so a
+    user deleted after login passes until the token expires. Tokens
+    issued without a username fall back to the lookup.
+    """
+    claims = verify_token(token, credentials_error())
+    if claims.username is None:
+        user = await load_user(session, claims.id)
+        if user is None:
+            raise credentials_error()
+        return TokenData(id=user.id, username=user.username)
+    return claims
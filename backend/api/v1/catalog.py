@@ -0,0 +1,224 @@
+#!/usr/bin/python3
+"""
+Bulk import and export of careers, skills and courses.
+
+Usage:
+    python -m backend.api.v1.catalog import careers careers.csv --owner admin
+    python -m backend.api.v1.catalog import courses courses.jsonl
+    python -m backend.api.v1.catalog export skills --format jsonl > s.jsonl
+
+Files are CSV with a header row, or JSON lines. Careers have ``title``,
+``description`` and ``owner`` (a username, needed for new rows only);
+skills ``career`` (a career title), ``title`` and ``proficiency``;
+courses ``career``, ``title``, ``description`` and ``owner``. Rows are
+read as a stream and written ``CATALOG_CHUNK_SIZE`` at a time, one
+statement and commit per chunk; a row whose natural key exists updates
+it. Import careers first.
+"""
+import argparse
+import asyncio
+import codecs
+import csv
+import io
+import sys
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional
+import orjson
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from backend.api.db_config import async_engine, async_session_local
+from backend.api.settings import settings
+from backend.api.v1.repositories.catalog import (
+    FIELDS, KINDS, CatalogRepository
+)
+# imported so that the relationships of the catalog models resolve
+from backend.api.v1.models import (  # noqa: F401
+    user_models, careers, courses, enrollments, preferences, ratings
+)
+
+FORMATS = ("csv", "jsonl")
+MEDIA_TYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+# longest values the columns take
+LIMITS = {("skills", "title"): 100}
+
+
+def file_format(filename: Optional[str], given: Optional[str]) -> str:
+    """Format named explicitly, else by the file extension."""
+    if given:
+        return given
+    if filename and filename.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    return "csv"
+
+
+def read_rows(lines: Iterable[str], fmt: str) -> Iterator[dict]:
+    """Parse CSV or JSON lines into dicts, lazily; bad lines are empty."""
+    if fmt == "csv":
+        yield from csv.DictReader(lines)
+        return
+    for line in lines:
+        if line.strip():
+            try:
+                yield orjson.loads(line)
+            except orjson.JSONDecodeError:
+                yield {}
+
+
+def decode_lines(stream) -> Iterator[str]:
+    """Text lines of a binary file, dropping a UTF-8 byte order mark."""
+    return codecs.iterdecode(stream, "utf-8-sig")
+
+
+def clean(kind: str, row: dict, owner: Optional[str]) -> Optional[dict]:
+    """Row with the fields of its kind, or None if it is unusable."""
+    if not isinstance(row, dict):
+        return None
+    values = {}
+    for name, array in FIELDS[kind]:
+        value = row.get(name)
+        if name == "owner":
+            # only needed to insert, an existing row keeps its owner
+            values[name] = str(value) if value else owner
+            continue
+        if value is None or value == "":
+            return None
+        if array == "integer":
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                return None
+        else:
+            value = str(value)
+            if len(value) > LIMITS.get((kind, name), len(value)):
+                return None
+        values[name] = value
+    return values
+
+
+def chunks(rows: Iterator[dict], size: int) -> Iterator[List[dict]]:
+    """Consecutive lists of at most size rows."""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def import_rows(
+    session: AsyncSession, kind: str, rows: Iterator[dict],
+    owner: Optional[str] = None,
+    chunk_size: int = settings.CATALOG_CHUNK_SIZE
+) -> Dict[str, int]:
+    """
+    Write rows of a kind chunk by chunk, committing each chunk.
+
+    Returns the rows read, inserted, updated and rejected: incomplete,
+    naming an unknown career or owner, or superseded by a later row of
+    the same key in its chunk. Rows are parsed in a worker thread, as
+    the file may be read from disk.
+    """
+    repository = CatalogRepository(session)
+    counts = {"rows": 0, "inserted": 0, "updated": 0, "rejected": 0}
+    batches = chunks(rows, chunk_size)
+    while True:
+        chunk = await run_in_threadpool(next, batches, None)
+        if chunk is None:
+            break
+        valid = [
+            row for row in (clean(kind, row, owner) for row in chunk) if row
+        ]
+        written = {"inserted": 0, "updated": 0}
+        if valid:
+            written = await repository.import_chunk(kind, valid)
+            await session.commit()
+        counts["rows"] += len(chunk)
+        counts["inserted"] += written["inserted"]
+        counts["updated"] += written["updated"]
+        counts["rejected"] += (
+            len(chunk) - written["inserted"] - written["updated"]
+        )
+    return counts
+
+
+def encode_rows(kind: str, rows, fmt: str, header: bool = False) -> bytes:
+    """Rows as CSV, with the header row if asked, or JSON lines."""
+    names = [name for name, _ in FIELDS[kind]]
+    if fmt == "jsonl":
+        return b"".join(
+            orjson.dumps(
+                dict(zip(names, row)), option=orjson.OPT_APPEND_NEWLINE
+            )
+            for row in rows
+        )
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(names)
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+async def export_rows(
+    session: AsyncSession, kind: str, fmt: str,
+    chunk_size: int = settings.CATALOG_CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    """Encoded rows of a kind, one chunk at a time."""
+    header = fmt == "csv"
+    if header:
+        yield encode_rows(kind, (), fmt, header)
+    async for rows in CatalogRepository(session).export(kind, chunk_size):
+        yield encode_rows(kind, rows, fmt)
+
+
+async def run(args) -> int:
+    """Run one import or export."""
+    try:
+        async with async_session_local() as session:
+            if args.command == "import":
+                fmt = file_format(args.path, args.format)
+                with open(args.path, encoding="utf-8-sig", newline="") as f:
+                    counts = await import_rows(
+                        session, args.kind, read_rows(f, fmt), args.owner,
+                        args.chunk_size
+                    )
+                print(", ".join(f"{n} {key}" for key, n in counts.items()))
+                return 0
+            out = sys.stdout.buffer
+            async for data in export_rows(
+                session, args.kind, args.format or "csv", args.chunk_size
+            ):
+                out.write(data)
+            out.flush()
+            return 0
+    finally:
+        await async_engine.dispose()
+
+
+def main(argv=None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+    load = commands.add_parser("import", help="insert or update rows")
+    load.add_argument("kind", choices=KINDS)
+    load.add_argument("path", help="CSV or JSON lines file")
+    load.add_argument(
+        "--owner", help="username owning rows that name no owner"
+    )
+    dump = commands.add_parser("export", help="write every row to stdout")
+    dump.add_argument("kind", choices=KINDS)
+    for command in (load, dump):
+        command.add_argument(
+            "--format", choices=FORMATS,
+            help="file format; by default from the extension, or CSV"
+        )
+        command.add_argument(
+            "--chunk-size", type=int, default=settings.CATALOG_CHUNK_SIZE,
+            help="rows per statement"
+        )
+    return asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
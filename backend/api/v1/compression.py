@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+"""gzip compression of dynamic text responses."""
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.types import Message, Receive, Scope, Send
+from backend.api.v1.assets import accepted_encodings
+
+# media types worth compressing; others are binary or compressed already
+COMPRESSIBLE_TYPES = (
+    "text/", "application/json", "application/x-ndjson",
+    "application/javascript", "image/svg+xml",
+)
+
+
+def compressible(content_type: str) -> bool:
+    """Whether a response of content_type shrinks when compressed."""
+    return content_type.lower().startswith(COMPRESSIBLE_TYPES)
+
+
+class TextResponder(GZipResponder):
+    """gzip responder passing responses of other media types through."""
+
+    async def send_with_gzip(self, message: Message) -> None:
+        """Compress the message unless the response is not text."""
+        await super().send_with_gzip(message)
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            if not compressible(headers.get("content-type", "")):
+                # sent as is, as a response already encoded would be
+                self.content_encoding_set = True
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    gzip rendered pages, JSON and NDJSON for clients accepting it.
+
+    Responses that already have a ``Content-Encoding``, such as the
+    precompressed assets, and binary media types are left alone.
+    """
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        """Compress the response of an HTTP request if possible."""
+        if scope["type"] == "http" and "gzip" in accepted_encodings(
+            Headers(scope=scope).get("accept-encoding", "")
+        ):
+            responder = TextResponder(
+                self.app, self.minimum_size, compresslevel=self.compresslevel
+            )
+            await responder(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
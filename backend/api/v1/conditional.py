@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+"""ETags, conditional GETs and Cache-Control of HTML pages."""
+import hashlib
+import json
+from functools import lru_cache
+from typing import Optional
+from fastapi import Request, Response, status
+from backend.api.settings import TEMPLATES, settings
+from backend.api.v1.assets import manifest
+
+# catalog pages anyone may cache, revalidated after CATALOG_MAX_AGE
+PUBLIC_PAGE = f"public, max-age={settings.CATALOG_MAX_AGE}, must-revalidate"
+# catalog pages behind a login, kept by the browser only
+PRIVATE_PAGE = (
+    f"private, max-age={settings.CATALOG_MAX_AGE}, must-revalidate"
+)
+# pages whose HTML only changes with a deploy
+STATIC_PAGE = f"public, max-age={settings.STATIC_PAGE_MAX_AGE}"
+
+
+@lru_cache(maxsize=None)
+def templates_digest() -> str:
+    """Digest of the templates and asset names, changed by a deploy."""
+    env = TEMPLATES.env
+    digest = hashlib.sha1()
+    for name in env.list_templates():
+        source, _, _ = env.loader.get_source(env, name)
+        digest.update(name.encode())
+        digest.update(source.encode())
+    digest.update(json.dumps(manifest, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def etag(*versions: Optional[str]) -> str:
+    """Weak ETag of a page rendered from data at the given versions."""
+    digest = hashlib.sha1(templates_digest().encode())
+    for version in versions:
+        digest.update(f"|{version}".encode())
+    return f'W/"{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(request: Request, tag: str) -> bool:
+    """Whether If-None-Match names tag, compared weakly, or is ``*``."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    opaque = tag.removeprefix("W/")
+    return any(
+        value == "*" or value.removeprefix("W/") == opaque
+        for value in (value.strip() for value in header.split(","))
+    )
+
+
+def not_modified(
+    request: Request, tag: str, cache_control: str
+) -> Optional[Response]:
+    """A 304 response if the client holds the page tagged tag."""
+    if etag_matches(request, tag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": tag, "Cache-Control": cache_control}
+        )
+    return None
+
+
+def cacheable(response: Response, tag: str, cache_control: str) -> Response:
+    """Set the ETag and Cache-Control of a full response."""
+    response.headers["ETag"] = tag
+    response.headers["Cache-Control"] = cache_control
+    return response
@@ -0,0 +1,93 @@
+#!/usr/bin/python3
+"""
+Concurrent load test against a running server.
+
+Usage:
+    python -m backend.api.v1.loadtest --url http://127.0.0.1:8000 \
+        --path /careers/ --path /courses/ --concurrency 64 --requests 5000
+
+Requests are spread over the given paths and sent by ``--concurrency``
+clients at once. Compare the requests per second and latency percentiles
+of two builds, or of one build at several concurrency levels, to see how
+many requests a worker really serves in parallel.
+"""
+import argparse
+import asyncio
+import itertools
+import time
+from collections import Counter
+from typing import Dict, List, Sequence
+import httpx
+import numpy as np
+
+
+async def run(
+    url: str, paths: Sequence[str], concurrency: int, requests: int,
+    headers: Dict[str, str], timeout: float = 30.0
+) -> dict:
+    """Send the requests and return throughput, latency and status codes."""
+    targets = itertools.islice(itertools.cycle(paths), requests)
+    latencies: List[float] = []
+    codes: Counter = Counter()
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(
+        base_url=url, headers=headers, limits=limits, timeout=timeout
+    ) as client:
+        async def worker():
+            for path in targets:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    codes[response.status_code] += 1
+                except httpx.HTTPError as exc:
+                    codes[type(exc).__name__] += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies = np.array(latencies)
+    return {
+        "requests": len(latencies),
+        "seconds": elapsed,
+        "requests_per_s": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "status": dict(codes),
+    }
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", action="append", dest="paths")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[64])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument(
+        "--header", action="append", default=[],
+        help="extra header as 'Name: value', e.g. an Authorization bearer"
+    )
+    args = parser.parse_args(argv)
+    headers = dict(
+        (part.strip() for part in header.split(":", 1))
+        for header in args.header
+    )
+    for concurrency in args.concurrency:
+        result = asyncio.run(run(
+            args.url, args.paths or ["/careers/"], concurrency,
+            args.requests, headers
+        ))
+        print(f"concurrency {concurrency:<5} "
+              f"{result['requests_per_s']:>8,.0f} req/s  "
+              f"p50 {result['p50_ms']:.1f} ms  "
+              f"p95 {result['p95_ms']:.1f} ms  "
+              f"p99 {result['p99_ms']:.1f} ms  "
+              f"status {result['status']}")
+
+
+if __name__ == "__main__":
+    main()
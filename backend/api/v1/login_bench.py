@@ -0,0 +1,138 @@
+#!/usr/bin/python3
+"""
+Latency of other requests during a burst of logins.
+
+Usage:
+    python -m backend.api.v1.login_bench
+    python -m backend.api.v1.login_bench --executor inline --executor thread \
+        --logins 200 --concurrency 50
+
+For each password executor, the app is served in process while
+``--concurrency`` clients log in ``--logins`` times against a throwaway
+user, and one client requests ``--probe`` (``/health``) every 5 ms.
+The probe latency shows how much the logins hold up everything else;
+``inline`` hashes on the event loop, as the routes did before the pool.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from typing import List
+import httpx
+import numpy as np
+from sqlalchemy import delete, insert
+from backend.api.db_config import async_engine, session_local
+from backend.api.v1.models.user_models import User
+from backend.api.v1.routes.app import app
+from backend.api.v1.utils import PASSWORD_EXECUTORS, hash_pwd, passwords
+
+PASSWORD = "benchmark-password"
+PROBE_INTERVAL = 0.005
+
+
+def percentiles(latencies: List[float]) -> str:
+    """p50/p95/max of latencies in milliseconds."""
+    if not latencies:
+        return "-"
+    values = np.array(latencies)
+    return (
+        f"p50 {np.percentile(values, 50):7.1f}  "
+        f"p95 {np.percentile(values, 95):7.1f}  max {values.max():7.1f}"
+    )
+
+
+async def burst(
+    username: str, logins: int, concurrency: int, probe: str
+) -> dict:
+    """Log in logins times while probing; return latencies and codes."""
+    transport = httpx.ASGITransport(app=app)
+    login_ms: List[float] = []
+    probe_ms: List[float] = []
+    codes: dict = {}
+    remaining = iter(range(logins))
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=120
+    ) as client:
+        async def login():
+            for _ in remaining:
+                start = time.perf_counter()
+                response = await client.post(
+                    "/users/login_token",
+                    data={"username": username, "password": PASSWORD}
+                )
+                login_ms.append((time.perf_counter() - start) * 1000)
+                codes[response.status_code] = (
+                    codes.get(response.status_code, 0) + 1
+                )
+
+        async def probing(done: asyncio.Event):
+            # timed from when the probe was due, so a blocked loop counts
+            while not done.is_set():
+                due = time.perf_counter() + PROBE_INTERVAL
+                await asyncio.sleep(PROBE_INTERVAL)
+                await client.get(probe)
+                probe_ms.append((time.perf_counter() - due) * 1000)
+
+        done = asyncio.Event()
+        prober = asyncio.create_task(probing(done))
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await prober
+    return {
+        "seconds": elapsed, "login_ms": login_ms, "probe_ms": probe_ms,
+        "codes": codes,
+    }
+
+
+async def run(args) -> None:
+    """Benchmark every executor asked for against one throwaway user."""
+    username = f"bench-{uuid.uuid4().hex[:8]}"
+    with session_local() as session:
+        session.execute(insert(User).values(
+            full_name="login benchmark", username=username,
+            email=f"{username}@example.com", password=hash_pwd(PASSWORD)
+        ))
+        session.commit()
+    try:
+        for kind in args.executors or ["inline", "thread"]:
+            passwords.close()
+            passwords.kind = kind
+            passwords.workers = args.workers
+            result = await burst(
+                username, args.logins, args.concurrency, args.probe
+            )
+            print(
+                f"{kind:8} {args.logins / result['seconds']:6.1f} logins/s "
+                f"status {result['codes']}"
+            )
+            print(f"  login ms  {percentiles(result['login_ms'])}")
+            print(
+                f"  {args.probe} ms {percentiles(result['probe_ms'])} "
+                f"({len(result['probe_ms'])} requests)"
+            )
+    finally:
+        passwords.close()
+        with session_local() as session:
+            session.execute(delete(User).filter(User.username == username))
+            session.commit()
+        await async_engine.dispose()
+
+
+def main(argv=None) -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--executor", choices=PASSWORD_EXECUTORS, action="append",
+        dest="executors", help="executor to run, repeatable; inline, thread"
+    )
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--probe", default="/health")
+    asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
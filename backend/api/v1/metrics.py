@@ -0,0 +1,20 @@
+#!/usr/bin/python3
+"""Runtime metrics registry."""
+from typing import Callable, Dict
+
+_collectors: Dict[str, Callable[[], dict]] = {}
+
+
+def register(name: str, collector: Callable[[], dict]) -> None:
+    """Register a callable returning a dict of metrics under a name."""
+    _collectors[name] = collector
+
+
+def unregister(name: str) -> None:
+    """Remove a metrics collector."""
+    _collectors.pop(name, None)
+
+
+def snapshot() -> dict:
+    """Collect the current value of every registered metric."""
+    return {name: collector() for name, collector in _collectors.items()}
@@ -1,16 +1,49 @@
 #!/usr/bin/python3
-"""Database migration."""
+"""
+Database migration.
+
+Usage:
+    python -m backend.api.v1.migrates             # upgrade to the latest
+    python -m backend.api.v1.migrates downgrade 0001
+    python -m backend.api.v1.migrates current
+
+Any arguments are passed to the ``alembic`` command line, so ``history``,
+``revision --autogenerate -m ...`` and ``upgrade head --sql`` work too.
+Revisions live in ``backend/api/v1/migrations/versions``.
+"""
+import os
+import sys
+from alembic import command
+from alembic.config import Config, main as alembic_main
+from sqlalchemy import inspect
 from backend.api.db_config import engine
-from .models.user_models import Base as User_Base
-from .models.careers import Base as Career_Base
-from .models.courses import Base as Courses_Base
-from .models.enrollments import Base as Enrollments_Base
-from .models.preferences import Base as Preferences_Base
-from .models.ratings import Base as Ratings_Base
-
-User_Base.metadata.create_all(bind=engine)
-Career_Base.metadata.create_all(bind=engine)
-Courses_Base.metadata.create_all(bind=engine)
-Enrollments_Base.metadata.create_all(bind=engine)
-Preferences_Base.metadata.create_all(bind=engine)
-Ratings_Base.metadata.create_all(bind=engine)
+
+ALEMBIC_INI = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "..",
+    "alembic.ini"
+)
+# revision matching the tables create_all made before migrations existed
+BASELINE = "0001"
+
+
+def alembic_config() -> Config:
+    """Alembic configuration of this project."""
+    return Config(os.path.normpath(ALEMBIC_INI))
+
+
+def upgrade(revision: str = "head") -> None:
+    """Migrate the database to revision, adopting unversioned schemas."""
+    config = alembic_config()
+    tables = inspect(engine).get_table_names()
+    if "users" in tables and "alembic_version" not in tables:
+        command.stamp(config, BASELINE)
+    command.upgrade(config, revision)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        alembic_main(
+            argv=["-c", os.path.normpath(ALEMBIC_INI)] + sys.argv[1:]
+        )
+    else:
+        upgrade()
@@ -0,0 +1,37 @@
+#!/usr/bin/python3
+"""Alembic environment running the migrations on the configured database."""
+from alembic import context
+from backend.api.db_config import Base, SQLALCHEMY_DATABASE_URL, engine
+# imported so that every table is registered on Base.metadata
+from backend.api.v1.models import (  # noqa: F401
+    user_models, careers, courses, enrollments, preferences, ratings,
+    catalog_versions, write_offsets
+)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL without connecting (``--sql``)."""
+    context.configure(
+        url=SQLALCHEMY_DATABASE_URL, target_metadata=target_metadata,
+        literal_binds=True, dialect_opts={"paramstyle": "named"}
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Run the migrations in one transaction on the blocking engine."""
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection, target_metadata=target_metadata
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,124 @@
+#!/usr/bin/python3
+"""Initial schema, as previously created by ``create_all``.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+UUID = postgresql.UUID(as_uuid=False)
+
+
+def created_at() -> sa.Column:
+    """Creation timestamp column shared by the tables."""
+    return sa.Column(
+        "created_at", sa.TIMESTAMP(timezone=True), nullable=False,
+        server_default=sa.text("now()")
+    )
+
+
+def upgrade() -> None:
+    """Apply the revision."""
+    op.create_table(
+        "users",
+        sa.Column(
+            "id", UUID, primary_key=True, nullable=False,
+            server_default=sa.text("gen_random_uuid()")
+        ),
+        sa.Column("full_name", sa.String(150), nullable=False),
+        sa.Column("username", sa.String(50), nullable=False, unique=True),
+        sa.Column("email", sa.String(150), nullable=False, unique=True),
+        sa.Column("password", sa.String(), nullable=False),
+        created_at(),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    )
+    op.create_table(
+        "careers",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=False),
+        sa.Column(
+            "user_id", UUID,
+            sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+        ),
+        created_at(),
+    )
+    op.create_index("ix_careers_id", "careers", ["id"])
+    op.create_table(
+        "skills",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "career_id", sa.Integer(),
+            sa.ForeignKey("careers.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column("title", sa.String(100), nullable=False),
+        sa.Column("proficiency", sa.Integer(), nullable=False),
+    )
+    op.create_index("ix_skills_id", "skills", ["id"])
+    op.create_table(
+        "courses",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=False),
+        sa.Column(
+            "owner_id", UUID,
+            sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column(
+            "career_id", sa.Integer(),
+            sa.ForeignKey("careers.id", ondelete="CASCADE"), nullable=False
+        ),
+        created_at(),
+    )
+    op.create_index("ix_courses_id", "courses", ["id"])
+    op.create_table(
+        "ratings",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "user_id", UUID,
+            sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column(
+            "course_id", sa.Integer(),
+            sa.ForeignKey("courses.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column("rating", sa.Integer(), nullable=False),
+        sa.Column("has_rated", sa.Boolean()),
+        created_at(),
+    )
+    op.create_index("ix_ratings_id", "ratings", ["id"])
+    op.create_table(
+        "preferences",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "user_id", UUID, sa.ForeignKey("users.id"), nullable=False
+        ),
+        sa.Column(
+            "career_id", sa.Integer(), sa.ForeignKey("careers.id"),
+            nullable=False
+        ),
+    )
+    op.create_index("ix_preferences_id", "preferences", ["id"])
+    op.create_table(
+        "enrollments",
+        sa.Column("enrollment_id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", UUID, sa.ForeignKey("users.id")),
+        sa.Column("course_id", sa.Integer(), sa.ForeignKey("courses.id")),
+    )
+
+
+def downgrade() -> None:
+    """Revert the revision."""
+    for table in (
+        "enrollments", "preferences", "ratings", "courses", "skills",
+        "careers", "users",
+    ):
+        op.drop_table(table)
@@ -0,0 +1,54 @@
+#!/usr/bin/python3
+"""Index foreign keys and hot filter columns, one rating per user and course.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# (name, table, columns); each foreign key is the leading column of one
+INDEXES = (
+    ("ix_ratings_course_id", "ratings", ["course_id"]),
+    ("ix_preferences_user_id_career_id", "preferences",
+     ["user_id", "career_id"]),
+    ("ix_preferences_career_id", "preferences", ["career_id"]),
+    ("ix_enrollments_user_id_course_id", "enrollments",
+     ["user_id", "course_id"]),
+    ("ix_enrollments_course_id", "enrollments", ["course_id"]),
+    ("ix_skills_career_id", "skills", ["career_id"]),
+    ("ix_courses_career_id", "courses", ["career_id"]),
+    ("ix_courses_owner_id", "courses", ["owner_id"]),
+    ("ix_careers_user_id", "careers", ["user_id"]),
+    ("ix_users_created_at_id", "users", ["created_at", "id"]),
+)
+
+
+def upgrade() -> None:
+    """Apply the revision."""
+    # keep the latest rating of a user for a course before enforcing one
+    op.execute(sa.text(
+        "DELETE FROM ratings r USING ratings newer "
+        "WHERE r.user_id = newer.user_id "
+        "AND r.course_id = newer.course_id AND r.id < newer.id"
+    ))
+    op.create_unique_constraint(
+        "uq_ratings_user_id_course_id", "ratings", ["user_id", "course_id"]
+    )
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    """Revert the revision."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+    op.drop_constraint(
+        "uq_ratings_user_id_course_id", "ratings", type_="unique"
+    )
@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+"""Per course rating aggregates, backfilled from ratings.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+STARS = [f"stars_{value}" for value in range(1, 6)]
+
+
+def upgrade() -> None:
+    """Apply the revision."""
+    op.create_table(
+        "course_rating_stats",
+        sa.Column(
+            "course_id", sa.Integer(),
+            sa.ForeignKey("courses.id", ondelete="CASCADE"),
+            primary_key=True
+        ),
+        sa.Column(
+            "ratings_count", sa.Integer(), nullable=False,
+            server_default="0"
+        ),
+        sa.Column(
+            "ratings_sum", sa.Integer(), nullable=False, server_default="0"
+        ),
+        *(
+            sa.Column(name, sa.Integer(), nullable=False, server_default="0")
+            for name in STARS
+        ),
+        sa.Column(
+            "mean", sa.Float(),
+            sa.Computed(
+                "ratings_sum::float8 / NULLIF(ratings_count, 0)",
+                persisted=True
+            )
+        ),
+    )
+    op.execute(sa.text(
+        "INSERT INTO course_rating_stats "
+        f"(course_id, ratings_count, ratings_sum, {', '.join(STARS)}) "
+        "SELECT course_id, count(*), sum(rating), "
+        + ", ".join(
+            f"count(*) FILTER (WHERE rating = {value})"
+            for value in range(1, 6)
+        )
+        + " FROM ratings GROUP BY course_id"
+    ))
+
+
+def downgrade() -> None:
+    """Revert the revision."""
+    op.drop_table("course_rating_stats")
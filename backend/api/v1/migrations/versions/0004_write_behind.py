@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+"""Write-behind offsets, one enrollment per user and course.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Apply the revision."""
+    op.create_table(
+        "write_behind_offsets",
+        sa.Column("queue_id", sa.String(64), primary_key=True),
+        sa.Column("seq", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "updated_at", sa.TIMESTAMP(timezone=True), nullable=False,
+            server_default=sa.text("now()")
+        ),
+    )
+    # replayed or repeated enrollments must not add a second row
+    op.execute(sa.text(
+        "DELETE FROM enrollments e USING enrollments older "
+        "WHERE e.user_id = older.user_id "
+        "AND e.course_id = older.course_id "
+        "AND e.enrollment_id > older.enrollment_id"
+    ))
+    op.drop_index(
+        "ix_enrollments_user_id_course_id", table_name="enrollments"
+    )
+    op.create_unique_constraint(
+        "uq_enrollments_user_id_course_id", "enrollments",
+        ["user_id", "course_id"]
+    )
+
+
+def downgrade() -> None:
+    """Revert the revision."""
+    op.drop_constraint(
+        "uq_enrollments_user_id_course_id", "enrollments", type_="unique"
+    )
+    op.create_index(
+        "ix_enrollments_user_id_course_id", "enrollments",
+        ["user_id", "course_id"]
+    )
+    op.drop_table("write_behind_offsets")
@@ -0,0 +1,23 @@
+#!/usr/bin/python3
+"""Index career titles, the natural key of catalog imports.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Apply the revision."""
+    op.create_index("ix_careers_title", "careers", ["title"])
+
+
+def downgrade() -> None:
+    """Revert the revision."""
+    op.drop_index("ix_careers_title", table_name="careers")
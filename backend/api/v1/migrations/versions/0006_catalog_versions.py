@@ -0,0 +1,54 @@
+#!/usr/bin/python3
+"""Catalog table versions, bumped by a trigger on every write.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+TABLES = ("careers", "skills", "courses")
+
+
+def upgrade() -> None:
+    """Apply the revision."""
+    op.create_table(
+        "catalog_versions",
+        sa.Column("name", sa.String(64), primary_key=True),
+        sa.Column(
+            "version", sa.BigInteger(), nullable=False, server_default="0"
+        ),
+    )
+    op.execute(sa.text(
+        "INSERT INTO catalog_versions (name, version) VALUES "
+        + ", ".join(f"('{table}', 1)" for table in TABLES)
+    ))
+    op.execute(sa.text(
+        "CREATE FUNCTION bump_catalog_version() RETURNS trigger "
+        "LANGUAGE plpgsql AS $$ BEGIN "
+        "UPDATE catalog_versions SET version = version + 1 "
+        "WHERE name = TG_TABLE_NAME; "
+        "RETURN NULL; END $$"
+    ))
+    for table in TABLES:
+        op.execute(sa.text(
+            f"CREATE TRIGGER {table}_catalog_version "
+            f"AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version()"
+        ))
+
+
+def downgrade() -> None:
+    """Revert the revision."""
+    for table in TABLES:
+        op.execute(sa.text(
+            f"DROP TRIGGER {table}_catalog_version ON {table}"
+        ))
+    op.execute(sa.text("DROP FUNCTION bump_catalog_version()"))
+    op.drop_table("catalog_versions")
@@ -14,14 +14,15 @@ class Career(Base):
     __tablename__ = "careers"
 
     id = Column(Integer, primary_key=True, index=True)
-    title = Column(String, nullable=False)
+    # catalog imports name careers by title
+    title = Column(String, nullable=False, index=True)
     description = Column(String, nullable=False)
     courses = relationship("Course", back_populates="career")
     skills = relationship("Skill", back_populates="careers")
     user_id = Column(
         PGSQL_UUID,
         ForeignKey("users.id", ondelete="CASCADE"),
-        nullable=False
+        nullable=False, index=True
     )
     preferences = relationship("Preference", back_populates="career")
     created_at = Column(
@@ -39,7 +40,7 @@ class Skill(Base):
     career_id = Column(
         Integer,
         ForeignKey("careers.id", ondelete="CASCADE"),
-        nullable=False
+        nullable=False, index=True
     )
     title = Column(String(100), nullable=False)
     proficiency = Column(Integer, nullable=False)
@@ -0,0 +1,19 @@
+#!/usr/bin/python3
+"""Catalog table versions database module."""
+from sqlalchemy import BigInteger, Column, String
+from backend.api.db_config import Base
+
+
+class CatalogVersion(Base):
+    """
+    Version of a catalog table, bumped by every statement writing it.
+
+    A trigger on ``careers``, ``skills`` and ``courses`` increments the
+    row named after the table, so page validators read one row per
+    table instead of scanning it.
+    """
+
+    __tablename__ = "catalog_versions"
+
+    name = Column(String(64), primary_key=True)
+    version = Column(BigInteger, nullable=False, server_default="0")
@@ -19,15 +19,18 @@ class Course(Base):
     owner_id = Column(
         PGSQL_UUID,
         ForeignKey("users.id", ondelete="CASCADE"),
-        nullable=False
+        nullable=False, index=True
     )
     career_id = Column(
         Integer,
         ForeignKey("careers.id", ondelete="CASCADE"),
-        nullable=False
+        nullable=False, index=True
     )
     career = relationship("Career", back_populates="courses")
     ratings = relationship("Rating", back_populates="course")
+    rating_stats = relationship(
+        "CourseRatingStats", uselist=False, viewonly=True
+    )
     created_at = Column(
         TIMESTAMP(timezone=True), nullable=False,
         server_default=text("now()")
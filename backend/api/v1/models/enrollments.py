@@ -1,6 +1,6 @@
 #!/usr/bin/python3
 """User courses enrollment."""
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from backend.api.db_config import Base
 
@@ -11,7 +11,13 @@ class Enrollment(Base):
     """Enrollment database model."""
 
     __tablename__ = 'enrollments'
+    # one enrollment per user and course; also serves lookups by user
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "course_id", name="uq_enrollments_user_id_course_id"
+        ),
+    )
 
     enrollment_id = Column(Integer, primary_key=True)
     user_id = Column(PGSQL_UUID, ForeignKey('users.id'))
-    course_id = Column(Integer, ForeignKey('courses.id'))
+    course_id = Column(Integer, ForeignKey('courses.id'), index=True)
@@ -1,6 +1,6 @@
 #!/usr/bin/python3
 """Preferences model for career recommendation."""
-from sqlalchemy import ForeignKey, Integer, Column
+from sqlalchemy import ForeignKey, Index, Integer, Column
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from backend.api.db_config import Base
@@ -12,10 +12,15 @@ class Preference(Base):
     """Career preferences."""
 
     __tablename__ = "preferences"
+    __table_args__ = (
+        Index("ix_preferences_user_id_career_id", "user_id", "career_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(PGSQL_UUID, ForeignKey("users.id"), nullable=False)
-    career_id = Column(Integer, ForeignKey("careers.id"), nullable=False)
+    career_id = Column(
+        Integer, ForeignKey("careers.id"), nullable=False, index=True
+    )
 
     user = relationship("User", back_populates="preferences")
     career = relationship("Career", back_populates="preferences")
@@ -1,6 +1,9 @@
 #!/usr/bin/python3
 """Rating course database module."""
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, TIMESTAMP, text
+from sqlalchemy import (
+    Boolean, Column, Computed, Float, ForeignKey, Integer, TIMESTAMP,
+    UniqueConstraint, text
+)
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from backend.api.db_config import Base
@@ -12,6 +15,12 @@ class Rating(Base):
     """Rating database model."""
 
     __tablename__ = "ratings"
+    # one rating per user and course; also serves lookups by user
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "course_id", name="uq_ratings_user_id_course_id"
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(
@@ -22,7 +31,7 @@ class Rating(Base):
     course_id = Column(
         Integer,
         ForeignKey("courses.id", ondelete="CASCADE"),
-        nullable=False
+        nullable=False, index=True
     )
     rating = Column(Integer, nullable=False)
     has_rated = Column(Boolean, default=False)
@@ -32,3 +41,43 @@ class Rating(Base):
     )
     user = relationship("User", back_populates="ratings")
     course = relationship("Course", back_populates="ratings")
+
+
+class CourseRatingStats(Base):
+    """
+    Rating aggregate of one course, kept in step with its ratings.
+
+    Every rating insert or delete adjusts the row in the same transaction
+    (see ``repositories/ratings.py``), so pages read a course's mean, count
+    and histogram from one row instead of aggregating ``ratings``.
+    ``python -m backend.api.v1.rating_stats`` rebuilds it from scratch.
+    """
+
+    __tablename__ = "course_rating_stats"
+
+    course_id = Column(
+        Integer,
+        ForeignKey("courses.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    ratings_count = Column(Integer, nullable=False, server_default="0")
+    ratings_sum = Column(Integer, nullable=False, server_default="0")
+    stars_1 = Column(Integer, nullable=False, server_default="0")
+    stars_2 = Column(Integer, nullable=False, server_default="0")
+    stars_3 = Column(Integer, nullable=False, server_default="0")
+    stars_4 = Column(Integer, nullable=False, server_default="0")
+    stars_5 = Column(Integer, nullable=False, server_default="0")
+    mean = Column(
+        Float,
+        Computed(
+            "ratings_sum::float8 / NULLIF(ratings_count, 0)", persisted=True
+        )
+    )
+
+    @property
+    def histogram(self):
+        """Number of ratings of each value, from 1 to 5 stars."""
+        return [
+            self.stars_1, self.stars_2, self.stars_3,
+            self.stars_4, self.stars_5,
+        ]
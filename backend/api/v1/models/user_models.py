@@ -1,6 +1,6 @@
 #!/usr/bin/python3
 """User model module for career recommendation."""
-from sqlalchemy import DateTime, String, text, Column, TIMESTAMP
+from sqlalchemy import DateTime, Index, String, text, Column, TIMESTAMP
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from backend.api.db_config import Base
@@ -12,6 +12,10 @@ class User(Base):
     """User model for database users table."""
 
     __tablename__ = "users"
+    # keyset pagination of the user list orders by (created_at, id)
+    __table_args__ = (
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
     id = Column(
         PGSQL_UUID, primary_key=True,
         server_default=text("gen_random_uuid()"),
@@ -0,0 +1,23 @@
+#!/usr/bin/python3
+"""Write-behind queue offsets database module."""
+from sqlalchemy import BigInteger, Column, String, TIMESTAMP, text
+from backend.api.db_config import Base
+
+
+class WriteBehindOffset(Base):
+    """
+    Last queued write applied from each local write-behind queue.
+
+    Updated in the transaction that applies a batch, so writes replayed
+    after a crash between that commit and the local acknowledgement are
+    recognised and skipped.
+    """
+
+    __tablename__ = "write_behind_offsets"
+
+    queue_id = Column(String(64), primary_key=True)
+    seq = Column(BigInteger, nullable=False)
+    updated_at = Column(
+        TIMESTAMP(timezone=True), nullable=False,
+        server_default=text("now()")
+    )
@@ -0,0 +1,185 @@
+#!/usr/bin/python3
+"""
+Query plan check of the hot lookups.
+
+Usage:
+    python -m backend.api.v1.query_plans
+
+Each lookup, and the first, next and previous keyset page of each list,
+is explained with sequential scans disabled, so the planner picks its
+index whatever the table size, and fails loudly if the expected index is
+missing. Run it after migrating; it exits non zero on a failure. On a
+table analyzed with only a few rows every index costs the planner about
+the same, so a lookup there using another index is reported, not failed.
+"""
+import json
+import re
+import sys
+from datetime import datetime
+from typing import Iterator, List, Sequence, Tuple
+from sqlalchemy import select, text
+from sqlalchemy.engine import Connection
+from backend.api.db_config import engine
+# imported so that the relationships of the listed models resolve
+from backend.api.v1.models import (  # noqa: F401
+    user_models, careers, courses, enrollments, preferences, ratings
+)
+from backend.api.v1.repositories.careers import CAREER_COLUMNS, CAREER_KEY
+from backend.api.v1.repositories.courses import COURSE_KEY, LIST_COLUMNS
+from backend.api.v1.repositories.pagination import (
+    NEXT, PREV, PageRequest, page_query
+)
+from backend.api.v1.repositories.users import USER_COLUMNS, USER_KEY
+
+USER = "00000000-0000-0000-0000-000000000000"
+# analyzed tables smaller than this do not tell indexes apart
+MIN_PLANNED_ROWS = 100
+# (lookup, statement, index it must use)
+HOT_QUERIES: Tuple[Tuple[str, str, str], ...] = (
+    ("rating of a user for a course",
+     f"SELECT id FROM ratings WHERE user_id = '{USER}' AND course_id = 1",
+     "uq_ratings_user_id_course_id"),
+    ("ratings of a user",
+     f"SELECT course_id FROM ratings WHERE user_id = '{USER}'",
+     "uq_ratings_user_id_course_id"),
+    ("ratings of a course",
+     "SELECT rating FROM ratings WHERE course_id = 1",
+     "ix_ratings_course_id"),
+    ("preferences of a user",
+     f"SELECT career_id FROM preferences WHERE user_id = '{USER}'",
+     "ix_preferences_user_id_career_id"),
+    ("preferences for a career",
+     "SELECT id FROM preferences WHERE career_id = 1",
+     "ix_preferences_career_id"),
+    ("enrollments of a user",
+     f"SELECT course_id FROM enrollments WHERE user_id = '{USER}'",
+     "uq_enrollments_user_id_course_id"),
+    ("enrollments in a course",
+     "SELECT user_id FROM enrollments WHERE course_id = 1",
+     "ix_enrollments_course_id"),
+    ("skills of a career",
+     "SELECT title FROM skills WHERE career_id = 1",
+     "ix_skills_career_id"),
+    ("courses of a career",
+     "SELECT id FROM courses WHERE career_id = 1",
+     "ix_courses_career_id"),
+    ("courses of an owner",
+     f"SELECT id FROM courses WHERE owner_id = '{USER}'",
+     "ix_courses_owner_id"),
+    ("catalog table versions",
+     "SELECT version FROM catalog_versions WHERE name = ANY('{careers}')",
+     "catalog_versions_pkey"),
+    ("rating aggregate of a course",
+     "SELECT xmin FROM course_rating_stats WHERE course_id = 1",
+     "course_rating_stats_pkey"),
+    ("career by title",
+     "SELECT id FROM careers WHERE title = 'Engineer'",
+     "ix_careers_title"),
+    ("careers of a user",
+     f"SELECT id FROM careers WHERE user_id = '{USER}'",
+     "ix_careers_user_id"),
+    ("page of users",
+     "SELECT id FROM users WHERE (created_at, id) > "
+     f"(now(), '{USER}') ORDER BY created_at, id LIMIT 50",
+     "ix_users_created_at_id"),
+)
+# (list, columns, key, cursor key, indexes on the key it may use)
+KEYSET_PAGES: Tuple[tuple, ...] = (
+    ("careers", CAREER_COLUMNS, CAREER_KEY, [1],
+     ("careers_pkey", "ix_careers_id")),
+    ("courses", LIST_COLUMNS, COURSE_KEY, [1],
+     ("courses_pkey", "ix_courses_id")),
+    ("users", USER_COLUMNS, USER_KEY,
+     [datetime(2020, 1, 1).isoformat(), USER], ("ix_users_created_at_id",)),
+)
+
+
+def lookups() -> Iterator[Tuple[str, str, Sequence[str]]]:
+    """Every checked statement, with the indexes it may use."""
+    for name, statement, index in HOT_QUERIES:
+        yield name, statement, (index,)
+    for name, columns, key, cursor, indexes in KEYSET_PAGES:
+        for page, request in (
+            ("first", PageRequest(50)),
+            ("next", PageRequest(50, NEXT, cursor)),
+            ("previous", PageRequest(50, PREV, cursor)),
+        ):
+            statement = page_query(select(*columns), key, request).compile(
+                engine, compile_kwargs={"literal_binds": True}
+            )
+            yield f"{page} page of {name}", str(statement), indexes
+
+
+def plan_indexes(plan: dict) -> Iterator[str]:
+    """Names of the indexes a plan node and its children scan."""
+    if "Index Name" in plan:
+        yield plan["Index Name"]
+    for child in plan.get("Plans", ()):
+        yield from plan_indexes(child)
+
+
+def used_indexes(connection: Connection, statement: str) -> List[str]:
+    """Indexes the plan of statement scans, sequential scans disabled."""
+    with connection.begin():
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = connection.execute(
+            text(f"EXPLAIN (FORMAT JSON) {statement}")
+        ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return list(plan_indexes(plan[0]["Plan"]))
+
+
+def too_small(connection: Connection, statement: str) -> bool:
+    """Whether the table of statement was analyzed with few rows."""
+    table = re.search(r"\bFROM\s+(\w+)", statement).group(1)
+    with connection.begin():
+        rows = connection.scalar(text(
+            "SELECT reltuples FROM pg_class WHERE oid = to_regclass(:name)"
+        ), {"name": table})
+    # -1 until analyzed, planned as a table of default size
+    return rows is not None and 0 <= rows < MIN_PLANNED_ROWS
+
+
+def check(
+    connection: Connection
+) -> Tuple[List[tuple], List[tuple]]:
+    """
+    Lookups not using their index, with the ones they use.
+
+    Returns the failures and, apart, the lookups on tables too small for
+    the plan to tell.
+    """
+    failures, inconclusive = [], []
+    for name, statement, indexes in lookups():
+        used = used_indexes(connection, statement)
+        if set(indexes) & set(used):
+            continue
+        if too_small(connection, statement):
+            inconclusive.append((name, indexes, used))
+        else:
+            failures.append((name, indexes, used))
+    return failures, inconclusive
+
+
+def main() -> int:
+    """Command line entry point."""
+    with engine.connect() as connection:
+        failures, inconclusive = check(connection)
+    for label, found in (("FAIL", failures), ("SMALL", inconclusive)):
+        for name, indexes, used in found:
+            print(
+                f"{label} {name}: expected {' or '.join(indexes)}, "
+                f"plan uses {used or 'no index'}"
+            )
+    if not failures:
+        total = len(list(lookups()))
+        print(
+            f"ok: {total - len(inconclusive)} of {total} lookups use "
+            "their index"
+        )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+#!/usr/bin/python3
+"""
+Rebuild or check the course rating aggregates.
+
+Usage:
+    python -m backend.api.v1.rating_stats              # rebuild all
+    python -m backend.api.v1.rating_stats --course 3   # rebuild one course
+    python -m backend.api.v1.rating_stats --check      # report drift only
+
+Rating writes keep ``course_rating_stats`` in step incrementally. This
+recomputes it from ``ratings``, for a backfill or to repair rows changed
+outside the application. Ratings writes wait while a rebuild runs.
+"""
+import argparse
+import sys
+from typing import List, Optional, Sequence
+from sqlalchemy import delete, func, insert, or_, select
+from sqlalchemy.engine import Connection
+from backend.api.db_config import engine
+from backend.api.v1.models.ratings import CourseRatingStats, Rating
+# imported so that the relationships of Rating resolve
+from backend.api.v1.models import (  # noqa: F401
+    user_models, careers, courses, enrollments, preferences
+)
+
+STATS = CourseRatingStats.__table__
+COLUMNS = (
+    "course_id", "ratings_count", "ratings_sum",
+    "stars_1", "stars_2", "stars_3", "stars_4", "stars_5",
+)
+
+
+def aggregate(course_ids: Optional[Sequence[int]] = None):
+    """Select the aggregate columns of every rated course from ratings."""
+    query = select(
+        Rating.course_id,
+        func.count().label("ratings_count"),
+        func.sum(Rating.rating).label("ratings_sum"),
+        *(
+            func.count().filter(Rating.rating == value).label(
+                f"stars_{value}"
+            )
+            for value in range(1, 6)
+        ),
+    ).group_by(Rating.course_id)
+    if course_ids:
+        query = query.filter(Rating.course_id.in_(course_ids))
+    return query
+
+
+def rebuild(
+    connection: Connection, course_ids: Optional[Sequence[int]] = None
+) -> int:
+    """Recompute the aggregates, of some courses or all; return the rows."""
+    with connection.begin():
+        # blocks rating writes, not reads, until the new rows are committed
+        connection.exec_driver_sql("LOCK TABLE ratings IN SHARE MODE")
+        stale = delete(STATS)
+        if course_ids:
+            stale = stale.filter(STATS.c.course_id.in_(course_ids))
+        connection.execute(stale)
+        result = connection.execute(
+            insert(STATS).from_select(COLUMNS, aggregate(course_ids))
+        )
+    return result.rowcount
+
+
+def drift(
+    connection: Connection, course_ids: Optional[Sequence[int]] = None
+) -> List[int]:
+    """Ids of the courses whose stored aggregate differs from ratings."""
+    fresh = aggregate(course_ids).subquery()
+    query = select(
+        func.coalesce(fresh.c.course_id, STATS.c.course_id)
+    ).select_from(
+        fresh.join(
+            STATS, fresh.c.course_id == STATS.c.course_id, full=True
+        )
+    ).filter(or_(*(
+        func.coalesce(fresh.c[column], 0).is_distinct_from(
+            func.coalesce(STATS.c[column], 0)
+        )
+        for column in COLUMNS[1:]
+    )))
+    if course_ids:
+        query = query.filter(or_(
+            fresh.c.course_id.in_(course_ids),
+            STATS.c.course_id.in_(course_ids),
+        ))
+    return sorted(connection.execute(query).scalars())
+
+
+def main(argv=None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--course", type=int, action="append", dest="courses",
+        help="course id to rebuild, repeatable; all courses by default"
+    )
+    parser.add_argument(
+        "--check", action="store_true",
+        help="only list the courses whose aggregate is out of date"
+    )
+    args = parser.parse_args(argv)
+    with engine.connect() as connection:
+        if args.check:
+            stale = drift(connection, args.courses)
+            print(f"{len(stale)} courses out of date: {stale[:20]}")
+            return 1 if stale else 0
+        rows = rebuild(connection, args.courses)
+    print(f"rebuilt the aggregates of {rows} courses")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+#!/usr/bin/python3
+"""Micro-batching inference engine for the career model."""
+import asyncio
+import time
+from concurrent.futures import Executor
+from typing import Callable, List, Optional, Sequence, Set, Tuple
+import numpy as np
+
+PredictFn = Callable[[np.ndarray], np.ndarray]
+
+
+class MicroBatcher:
+    """
+    Queue score vectors and score them as one batched forward pass.
+
+    A batch is flushed when it reaches ``max_batch_size`` rows or when the
+    oldest queued row has waited ``max_wait_ms``. The forward pass runs in
+    ``executor`` (the default one if None) so the event loop keeps serving
+    other requests, with up to ``concurrency`` batches in flight.
+
+    Attributes:
+        predict_fn (callable): maps a (n, features) array to (n, classes).
+        max_batch_size (int): largest number of rows per forward pass.
+        max_wait_ms (float): longest time a row waits for companions.
+        max_queue_size (int): pending rows accepted before rejecting.
+        executor (Executor): runs ``predict_fn``.
+        concurrency (int): batches scored at the same time.
+        bulk_concurrency (int): bulk chunks scored at the same time.
+    """
+
+    def __init__(
+        self,
+        predict_fn: PredictFn,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        max_queue_size: int = 1024,
+        executor: Optional[Executor] = None,
+        concurrency: int = 1,
+        bulk_concurrency: int = 1,
+    ):
+        """Initialize the batcher."""
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self.max_queue_size = max_queue_size
+        self.executor = executor
+        self.concurrency = max(1, concurrency)
+        self.bulk_concurrency = max(1, bulk_concurrency)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._bulk_slots: Optional[asyncio.Semaphore] = None
+        self._flushes: Set[asyncio.Task] = set()
+        self._in_flight = 0
+        self._batches = 0
+        self._rows = 0
+        self._rejected = 0
+        self._last_batch_size = 0
+        self._last_latency_ms = 0.0
+        self._max_latency_ms = 0.0
+        self._total_latency_ms = 0.0
+        self._bulk_waiting = 0
+        self._bulk_batches = 0
+        self._bulk_rows = 0
+        self._bulk_latency_ms = 0.0
+
+    def _ensure_worker(self) -> None:
+        """Start the flush loop on the running event loop if needed."""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._slots = asyncio.Semaphore(self.concurrency)
+            self._worker = asyncio.get_running_loop().create_task(
+                self._run()
+            )
+
+    async def predict(self, row: Sequence[float]) -> np.ndarray:
+        """Score one row and return its vector of probabilities."""
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((row, future))
+        except asyncio.QueueFull:
+            self._rejected += 1
+            raise
+        return await future
+
+    async def predict_many(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Score a chunk of a bulk request in one forward pass.
+
+        The chunk goes to the executor as it is, in one ``predict_fn``
+        call, bypassing the row queue. At most ``bulk_concurrency`` chunks
+        are scored at once and the others wait for their turn, so bulk
+        requests leave the remaining workers to the single-row batches.
+        """
+        if self._bulk_slots is None:
+            self._bulk_slots = asyncio.Semaphore(self.bulk_concurrency)
+        self._bulk_waiting += 1
+        try:
+            await self._bulk_slots.acquire()
+        finally:
+            self._bulk_waiting -= 1
+        start = time.perf_counter()
+        try:
+            probs = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.predict_fn, batch
+            )
+        finally:
+            self._bulk_slots.release()
+        self._bulk_batches += 1
+        self._bulk_rows += len(batch)
+        self._bulk_latency_ms = (time.perf_counter() - start) * 1000
+        return np.asarray(probs)
+
+    async def _collect(self) -> List[Tuple[Sequence[float], asyncio.Future]]:
+        """Wait for one row, then gather more until size or time limit."""
+        items = [await self._queue.get()]
+        self._in_flight += 1
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                items.append(
+                    await asyncio.wait_for(self._queue.get(), remaining)
+                )
+            except asyncio.TimeoutError:
+                break
+        return items
+
+    async def _run(self) -> None:
+        """Flush loop, starting a batch whenever a slot is free."""
+        while True:
+            await self._slots.acquire()
+            try:
+                items = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            task = asyncio.create_task(self._flush(items))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(
+        self, items: List[Tuple[Sequence[float], asyncio.Future]]
+    ) -> None:
+        """Score one batch in the executor and answer its rows."""
+        batch = np.asarray([row for row, _ in items], dtype=np.float32)
+        start = time.perf_counter()
+        try:
+            probs = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.predict_fn, batch
+            )
+        except asyncio.CancelledError:
+            for _, future in items:
+                future.cancel()
+            raise
+        except Exception as exc:  # pylint: disable=broad-except
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+        self._record(len(items), (time.perf_counter() - start) * 1000)
+        for (_, future), row_probs in zip(items, np.asarray(probs)):
+            if not future.done():
+                future.set_result(row_probs)
+
+    def _record(self, size: int, latency_ms: float) -> None:
+        """Update batch counters."""
+        self._batches += 1
+        self._rows += size
+        self._last_batch_size = size
+        self._last_latency_ms = latency_ms
+        self._max_latency_ms = max(self._max_latency_ms, latency_ms)
+        self._total_latency_ms += latency_ms
+
+    async def stop(self) -> None:
+        """Cancel the flush loop and the batches in flight."""
+        for task in list(self._flushes):
+            task.cancel()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def drain(self, poll_s: float = 0.01) -> None:
+        """Stop the flush loop once every queued row has been answered."""
+        while self._queue is not None and (
+            self._queue.qsize() or self._in_flight
+        ):
+            await asyncio.sleep(poll_s)
+        await self.stop()
+
+    def stats(self) -> dict:
+        """Return configuration and batch metrics."""
+        batches = self._batches or 1
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "max_queue_size": self.max_queue_size,
+            "concurrency": self.concurrency,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "in_flight": self._in_flight,
+            "batches": self._batches,
+            "rows": self._rows,
+            "rejected": self._rejected,
+            "last_batch_size": self._last_batch_size,
+            "mean_batch_size": self._rows / batches,
+            "last_batch_latency_ms": self._last_latency_ms,
+            "mean_batch_latency_ms": self._total_latency_ms / batches,
+            "max_batch_latency_ms": self._max_latency_ms,
+            "bulk_concurrency": self.bulk_concurrency,
+            "bulk_waiting": self._bulk_waiting,
+            "bulk_batches": self._bulk_batches,
+            "bulk_rows": self._bulk_rows,
+            "last_bulk_latency_ms": self._bulk_latency_ms,
+        }
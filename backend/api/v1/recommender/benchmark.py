@@ -0,0 +1,214 @@
+#!/usr/bin/python3
+"""
+Benchmark the career model inference engines.
+
+Usage:
+    python -m backend.api.v1.recommender.benchmark --engine mmap
+    python -m backend.api.v1.recommender.benchmark --engine numpy
+    python -m backend.api.v1.recommender.benchmark --engine keras
+    python -m backend.api.v1.recommender.benchmark --check
+    python -m backend.api.v1.recommender.benchmark --engine keras \
+        --save-reference backend/tests/data/model_career_RS_reference.npz
+    python -m backend.api.v1.recommender.benchmark --scaling \
+        --executor process --workers 1 2 4 8
+
+Each engine should be measured in its own process so that the reported
+resident memory belongs to that engine only. ``--scaling`` measures how
+throughput grows with the number of threads or replica processes.
+``--save-reference`` stores sample rows and the engine's probabilities,
+which the tests compare every engine against.
+"""
+import argparse
+import resource
+import sys
+import time
+from typing import List, Optional
+import numpy as np
+from .engines import ENGINES, load_engine
+from .executors import EXECUTORS, InferenceBackend, available_cpus
+from .loader import ModelLoader
+
+TRAINING_PATH = "frontend/models/RS_X_training.bin"
+
+
+def rss_mb() -> float:
+    """Peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def sample_rows(rows: int) -> np.ndarray:
+    """Take rows from the training matrix, or random scores without it."""
+    try:
+        data = np.load(TRAINING_PATH, mmap_mode="r")
+        return np.asarray(data[:rows], dtype=np.float32)
+    except OSError:
+        return np.random.default_rng(0).normal(size=(rows, 8)).astype(
+            np.float32
+        )
+
+
+def run(engine: str, model: Optional[str], rows: int, repeat: int) -> dict:
+    """Measure load time, single-row latency, throughput and memory."""
+    base_rss = rss_mb()
+    start = time.perf_counter()
+    predict = load_engine(engine, model).predict
+    load_s = time.perf_counter() - start
+    data = sample_rows(rows)
+    predict(data[:1])
+
+    latencies = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        predict(data[i % len(data):i % len(data) + 1])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    throughput = {}
+    for size in (1, 32, 256, 4096):
+        batch = data[:size]
+        loops = max(1, repeat // max(1, size // 32))
+        start = time.perf_counter()
+        for _ in range(loops):
+            predict(batch)
+        elapsed = time.perf_counter() - start
+        throughput[size] = len(batch) * loops / elapsed
+
+    latencies = np.array(latencies)
+    return {
+        "engine": engine,
+        "load_s": load_s,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "rows_per_s": throughput,
+        "rss_mb": rss_mb(),
+        "rss_delta_mb": rss_mb() - base_rss,
+    }
+
+
+def scaling(
+    engine: str, model: Optional[str], executor: str,
+    workers: List[int], batch_size: int, batches: int
+) -> List[dict]:
+    """Measure rows/s with batches submitted concurrently to N workers."""
+    data = sample_rows(batch_size)
+    results = []
+    for count in workers:
+        backend = InferenceBackend(executor, ModelLoader(engine, model), count)
+        try:
+            backend.start()
+            backend.predict(data)
+            start = time.perf_counter()
+            futures = [
+                backend.executor.submit(backend.predict, data)
+                for _ in range(batches)
+            ]
+            for future in futures:
+                future.result()
+            elapsed = time.perf_counter() - start
+        finally:
+            backend.close()
+        results.append({
+            "workers": backend.workers,
+            "rows_per_s": len(data) * batches / elapsed,
+        })
+    return results
+
+
+def check(model: Optional[str], rows: int, atol: float) -> float:
+    """Compare NumPy and Keras probabilities and return the max error."""
+    data = sample_rows(rows)
+    expected = load_engine("keras", model).predict(data)
+    actual = load_engine("numpy", model).predict(data)
+    error = float(np.abs(expected - actual).max())
+    if error > atol:
+        raise SystemExit(f"max abs difference {error:.3g} exceeds {atol}")
+    return error
+
+
+def save_reference(
+    engine: str, model: Optional[str], rows: int, path: str
+) -> None:
+    """Store sample rows and their probabilities from engine."""
+    data = sample_rows(rows)
+    probs = load_engine(engine, model).predict(data)
+    np.savez_compressed(
+        path, inputs=data, probs=np.asarray(probs, dtype=np.float32),
+        engine=np.array(engine)
+    )
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--engine", choices=ENGINES, default="mmap")
+    parser.add_argument(
+        "--model", help="model file, defaults to the engine's default"
+    )
+    parser.add_argument("--rows", type=int, default=4096)
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument(
+        "--check", action="store_true",
+        help="verify the NumPy engine against Keras instead of timing"
+    )
+    parser.add_argument("--atol", type=float, default=1e-5)
+    parser.add_argument(
+        "--save-reference", metavar="PATH",
+        help="store --rows sample rows and the engine's probabilities"
+    )
+    parser.add_argument(
+        "--scaling", action="store_true",
+        help="measure throughput against the number of workers"
+    )
+    parser.add_argument("--executor", choices=EXECUTORS, default="process")
+    parser.add_argument(
+        "--workers", type=int, nargs="+",
+        help="worker counts to try, defaults to powers of two up to the "
+        "number of cores"
+    )
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--batches", type=int, default=400)
+    args = parser.parse_args(argv)
+
+    if args.scaling:
+        cores = len(available_cpus())
+        workers = args.workers or [
+            2 ** i for i in range(cores.bit_length())
+        ]
+        results = scaling(
+            args.engine, args.model, args.executor, workers,
+            args.batch_size, args.batches
+        )
+        print(f"executor {args.executor}, {cores} cores, "
+              f"batches of {args.batch_size}")
+        for result in results:
+            speedup = result["rows_per_s"] / results[0]["rows_per_s"]
+            print(f"workers {result['workers']:<4} "
+                  f"{result['rows_per_s']:>12,.0f} rows/s  x{speedup:.2f}")
+        return
+
+    if args.save_reference:
+        save_reference(
+            args.engine, args.model, args.rows, args.save_reference
+        )
+        print(f"saved {args.rows} rows scored by {args.engine} to "
+              f"{args.save_reference}")
+        return
+
+    if args.check:
+        error = check(args.model, args.rows, args.atol)
+        print(f"numpy matches keras: max abs difference {error:.3g}")
+        return
+
+    result = run(args.engine, args.model, args.rows, args.repeat)
+    print(f"engine         {result['engine']}")
+    print(f"load           {result['load_s'] * 1000:.1f} ms")
+    print(f"latency p50    {result['p50_ms']:.3f} ms")
+    print(f"latency p99    {result['p99_ms']:.3f} ms")
+    for size, rate in result["rows_per_s"].items():
+        print(f"batch {size:<8} {rate:,.0f} rows/s")
+    print(f"peak rss       {result['rss_mb']:.1f} MB "
+          f"(+{result['rss_delta_mb']:.1f} MB for the engine)")
+
+
+if __name__ == "__main__":
+    main()
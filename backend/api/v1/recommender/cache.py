@@ -0,0 +1,242 @@
+#!/usr/bin/python3
+"""Memoization of career model results keyed by the score vector."""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import (
+    Callable, Hashable, Iterable, List, Optional, Sequence, Tuple
+)
+import numpy as np
+import orjson
+
+
+class LRUCache:
+    """
+    Bounded least-recently-used cache whose entries expire after a TTL.
+
+    Attributes:
+        maxsize (int): largest number of entries kept.
+        ttl (float): seconds an entry stays valid, 0 to never expire.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 300.0):
+        """Initialize an empty cache."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable):
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, value = entry
+            if expires and expires < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value) -> None:
+        """Store a value, evicting the least recently used on overflow."""
+        if self.maxsize <= 0:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl else 0.0
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._data.clear()
+
+    def discard(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop the entries whose key matches, returning how many."""
+        with self._lock:
+            stale = [key for key in self._data if predicate(key)]
+            for key in stale:
+                del self._data[key]
+        return len(stale)
+
+    def __len__(self) -> int:
+        """Number of entries, including expired ones not yet dropped."""
+        return len(self._data)
+
+
+class InMemoryBackend:
+    """Process-local stand-in for a shared cache backend."""
+
+    blocking = False
+
+    def __init__(self):
+        """Initialize an empty store."""
+        self._data = {}
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the stored bytes, or None if missing or expired."""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires and expires < time.monotonic():
+            self._data.pop(key, None)
+            return None
+        return value
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        """Store bytes for ttl seconds, 0 to keep them forever."""
+        expires = time.monotonic() + ttl if ttl else 0.0
+        self._data[key] = (expires, value)
+
+
+class RedisBackend:
+    """Cache backend shared by every worker through Redis."""
+
+    blocking = True
+
+    def __init__(self, url: str):
+        """Connect to the Redis server at url."""
+        import redis
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the stored bytes, or None."""
+        return self._client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        """Store bytes for ttl seconds, 0 to keep them forever."""
+        self._client.set(key, value, px=int(ttl * 1000) or None)
+
+
+def shared_backend(url: Optional[str]):
+    """Build the shared backend named by a URL, or None without one."""
+    if not url:
+        return None
+    if url == "memory://":
+        return InMemoryBackend()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url)
+    raise ValueError(f"Unsupported cache backend: {url}")
+
+
+class RecommendationCache:
+    """
+    Two-tier cache of model probabilities in front of the inference call.
+
+    Keys are the model version plus the score vector normalized to a tuple
+    of ints, so identical forms hit regardless of how they were typed.
+    Local entries of model versions that are no longer served are dropped
+    by ``retain``; shared entries of older versions simply stop being
+    looked up.
+
+    Attributes:
+        local (LRUCache): per-worker tier.
+        shared: optional backend shared between workers.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, shared=None):
+        """Initialize the cache tiers."""
+        self.local = LRUCache(maxsize, ttl)
+        self.shared = shared
+        self.ttl = ttl
+        self._versions = frozenset()
+        self.shared_hits = 0
+        self.shared_errors = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(version: str, scores: Sequence[float]) -> Tuple:
+        """Normalize a score vector into a cache key."""
+        return (version, tuple(int(round(float(s))) for s in scores))
+
+    def retain(self, versions: Iterable[str]) -> None:
+        """Drop local entries computed by any other model version."""
+        versions = frozenset(versions)
+        if versions != self._versions:
+            self.invalidations += self.local.discard(
+                lambda key: key[0] not in versions
+            )
+            self._versions = versions
+
+    @staticmethod
+    def _shared_key(key: Tuple) -> str:
+        """Render a key for the shared backend."""
+        version, scores = key
+        return f"career-rs:{version}:{','.join(map(str, scores))}"
+
+    async def _call_shared(self, method, *args):
+        """Call the shared backend, off the event loop if it blocks."""
+        if not self.shared.blocking:
+            return method(*args)
+        return await asyncio.get_running_loop().run_in_executor(
+            None, method, *args
+        )
+
+    async def get(self, key: Tuple) -> Optional[np.ndarray]:
+        """Return cached probabilities for a key, or None."""
+        value = self.local.get(key)
+        if value is not None or self.shared is None:
+            return value
+        try:
+            raw = await self._call_shared(
+                self.shared.get, self._shared_key(key)
+            )
+        except Exception:  # pylint: disable=broad-except
+            self.shared_errors += 1
+            return None
+        if raw is None:
+            return None
+        self.shared_hits += 1
+        value = np.asarray(orjson.loads(raw), dtype=np.float32)
+        self.local.set(key, value)
+        return value
+
+    async def set(self, key: Tuple, probs: np.ndarray) -> None:
+        """Cache the probabilities computed for a key."""
+        self.local.set(key, probs)
+        if self.shared is None:
+            return
+        values: List[float] = np.asarray(probs, dtype=float).tolist()
+        try:
+            await self._call_shared(
+                self.shared.set, self._shared_key(key),
+                orjson.dumps(values), self.ttl
+            )
+        except Exception:  # pylint: disable=broad-except
+            self.shared_errors += 1
+
+    def stats(self) -> dict:
+        """Return hit, miss and eviction counters."""
+        local_hits = self.local.hits
+        lookups = local_hits + self.local.misses
+        return {
+            "size": len(self.local),
+            "maxsize": self.local.maxsize,
+            "ttl": self.local.ttl,
+            "versions": sorted(self._versions),
+            "hits": local_hits + self.shared_hits,
+            "local_hits": local_hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.local.misses - self.shared_hits,
+            "hit_rate": (local_hits + self.shared_hits) / lookups
+            if lookups else 0.0,
+            "evictions": self.local.evictions,
+            "expirations": self.local.expirations,
+            "invalidations": self.invalidations,
+            "shared_errors": self.shared_errors,
+        }
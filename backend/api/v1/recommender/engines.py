@@ -0,0 +1,100 @@
+#!/usr/bin/python3
+"""Inference engines for the career model."""
+from typing import Optional
+import numpy as np
+from .numpy_model import NumpyModel
+from .weights import MODEL_PATH, WEIGHTS_PATH, MappedModel, file_checksum
+
+ENGINES = ("mmap", "numpy", "keras")
+
+
+class KerasModel:
+    """Career model loaded with TensorFlow Keras."""
+
+    def __init__(self, path: str):
+        """Load the HDF5 model."""
+        from tensorflow.keras.models import load_model
+        self.model = load_model(path)
+
+    @property
+    def n_features(self) -> int:
+        """Number of input scores."""
+        return self.model.input_shape[-1]
+
+    @property
+    def n_classes(self) -> int:
+        """Number of careers scored."""
+        return self.model.output_shape[-1]
+
+    def predict(self, batch) -> np.ndarray:
+        """Return class probabilities for a (n, features) batch."""
+        return np.asarray(self.model.predict_on_batch(batch))
+
+
+def load_mmap(path: Optional[str]) -> MappedModel:
+    """
+    Map the exported weight file, exporting it on first use.
+
+    ``path`` is either a weight file exported from the default model, or an
+    HDF5 model whose weights are kept next to it with a ``.weights`` suffix.
+    """
+    if path and path.endswith(".h5"):
+        weights_path = path[:-len(".h5")] + ".weights"
+        model = MappedModel.open_or_export(weights_path, path)
+    else:
+        weights_path = path or WEIGHTS_PATH
+        model = MappedModel.open_or_export(weights_path)
+    model.info = {
+        "engine": "mmap",
+        "path": weights_path,
+        "source": model.header["source"],
+        "version": model.header["version"],
+        "checksum": model.header["checksum"],
+    }
+    return model
+
+
+def load_numpy(path: Optional[str]) -> NumpyModel:
+    """Load the model as a NumPy forward pass."""
+    model = NumpyModel.from_h5(path or MODEL_PATH)
+    checksum = file_checksum(path or MODEL_PATH)
+    model.info = {
+        "engine": "numpy", "path": path or MODEL_PATH,
+        "version": checksum, "checksum": checksum,
+    }
+    return model
+
+
+def load_keras(path: Optional[str]) -> KerasModel:
+    """Load the model with TensorFlow Keras."""
+    model = KerasModel(path or MODEL_PATH)
+    checksum = file_checksum(path or MODEL_PATH)
+    model.info = {
+        "engine": "keras", "path": path or MODEL_PATH,
+        "version": checksum, "checksum": checksum,
+    }
+    return model
+
+
+LOADERS = {
+    "mmap": load_mmap,
+    "numpy": load_numpy,
+    "keras": load_keras,
+}
+
+
+def load_engine(name: str = "mmap", path: Optional[str] = None):
+    """
+    Load the career model with the named engine.
+
+    The returned object has a ``predict(batch)`` method and an ``info``
+    dict describing the engine and the weights it serves. ``path`` defaults
+    to the weight file for ``mmap`` and to the HDF5 model otherwise.
+    """
+    try:
+        loader = LOADERS[name]
+    except KeyError as exc:
+        raise ValueError(
+            f"Unknown inference engine {name!r}, expected one of {ENGINES}"
+        ) from exc
+    return loader(path)
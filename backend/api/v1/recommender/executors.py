@@ -0,0 +1,316 @@
+#!/usr/bin/python3
+"""
+Where the career model forward pass runs.
+
+``INFERENCE_EXECUTOR`` selects one of:
+
+- ``inline``: in the event loop thread, for tiny models and debugging.
+- ``thread``: in a pool of ``INFERENCE_WORKERS`` threads of this process.
+- ``process``: in ``INFERENCE_WORKERS`` replica processes, each pinned to
+  a core and holding its own copy of the model. Batches are written to a
+  shared-memory buffer of the replica and only the row count crosses the
+  pipe, so nothing is pickled per request.
+"""
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Optional
+import numpy as np
+from .loader import ModelLoader
+
+EXECUTORS = ("inline", "thread", "process")
+# one BLAS thread per replica, the replicas themselves use the cores
+SINGLE_THREAD_ENV = {
+    "OMP_NUM_THREADS": "1",
+    "OPENBLAS_NUM_THREADS": "1",
+    "MKL_NUM_THREADS": "1",
+}
+
+logger = logging.getLogger(__name__)
+
+
+def available_cpus() -> List[int]:
+    """CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+class InlineExecutor(Executor):
+    """Run every call immediately in the calling thread."""
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        """Call fn and return its already completed future."""
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as exc:  # pylint: disable=broad-except
+            future.set_exception(exc)
+        return future
+
+
+def _serve_replica(
+    conn, engine: str, path: Optional[str], transform_path: Optional[str],
+    inputs: str, outputs: str, shape: tuple, cpu: Optional[int]
+) -> None:
+    """Replica process: score the rows written to its input buffer."""
+    if cpu is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {cpu})
+    capacity, n_features, n_classes = shape
+    in_shm = SharedMemory(name=inputs)
+    out_shm = SharedMemory(name=outputs)
+    x = np.ndarray((capacity, n_features), np.float32, buffer=in_shm.buf)
+    y = np.ndarray((capacity, n_classes), np.float32, buffer=out_shm.buf)
+    try:
+        loader = ModelLoader(engine, path, transform_path)
+        try:
+            loader.get()
+        except Exception as exc:  # pylint: disable=broad-except
+            conn.send(f"could not load model: {exc!r}")
+            return
+        conn.send("ready")
+        while True:
+            try:
+                rows = conn.recv()
+            except EOFError:
+                break
+            if rows is None:
+                break
+            try:
+                y[:rows] = loader.predict(x[:rows])
+                conn.send(rows)
+            except Exception as exc:  # pylint: disable=broad-except
+                conn.send(repr(exc))
+    finally:
+        del x, y
+        in_shm.close()
+        out_shm.close()
+        conn.close()
+
+
+class Replica:
+    """
+    One model replica process and its shared-memory buffers.
+
+    Attributes:
+        capacity (int): rows the buffers hold; larger batches are chunked.
+        cpu (int): core the replica is pinned to, or None.
+    """
+
+    def __init__(
+        self, context, loader: ModelLoader, capacity: int,
+        n_features: int, n_classes: int, cpu: Optional[int] = None
+    ):
+        """Allocate the buffers and start the replica."""
+        self.capacity = capacity
+        self.cpu = cpu
+        self.n_classes = n_classes
+        self._inputs = SharedMemory(
+            create=True, size=capacity * n_features * 4
+        )
+        self._outputs = SharedMemory(
+            create=True, size=capacity * n_classes * 4
+        )
+        self._x = np.ndarray(
+            (capacity, n_features), np.float32, buffer=self._inputs.buf
+        )
+        self._y = np.ndarray(
+            (capacity, n_classes), np.float32, buffer=self._outputs.buf
+        )
+        self._conn, child = context.Pipe()
+        self.process = context.Process(
+            target=_serve_replica,
+            args=(
+                child, loader.engine, loader.path, loader.transform_path,
+                self._inputs.name, self._outputs.name,
+                (capacity, n_features, n_classes), cpu,
+            ),
+            daemon=True,
+        )
+        self.process.start()
+        child.close()
+        try:
+            status = self._conn.recv()
+        except EOFError:
+            status = "replica exited while starting"
+        if status != "ready":
+            self.close()
+            raise RuntimeError(status)
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        """Score a batch in the replica, chunked to the buffer capacity."""
+        probs = np.empty((len(batch), self.n_classes), dtype=np.float32)
+        for start in range(0, len(batch), self.capacity):
+            rows = min(self.capacity, len(batch) - start)
+            self._x[:rows] = batch[start:start + rows]
+            self._conn.send(rows)
+            reply = self._conn.recv()
+            if reply != rows:
+                raise RuntimeError(f"replica failed: {reply}")
+            probs[start:start + rows] = self._y[:rows]
+        return probs
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop the process and release the buffers."""
+        try:
+            self._conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+        self._conn.close()
+        del self._x, self._y
+        for shm in (self._inputs, self._outputs):
+            shm.close()
+            shm.unlink()
+
+
+class ReplicaPool:
+    """
+    Model replicas in worker processes, one per core.
+
+    Replicas are started on first use. A batch goes to any idle replica, so
+    up to ``workers`` batches are scored in parallel.
+
+    Attributes:
+        loader (ModelLoader): model served by every replica.
+        workers (int): number of replica processes.
+        capacity (int): rows per shared-memory buffer.
+    """
+
+    def __init__(
+        self, loader: ModelLoader, workers: int, capacity: int = 1024
+    ):
+        """Initialize the pool without starting any process."""
+        self.loader = loader
+        self.workers = workers
+        self.capacity = capacity
+        self.replicas: List[Replica] = []
+        self._idle: "queue.Queue[Replica]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def start(self) -> None:
+        """Load the model and start the replicas, once."""
+        if self.replicas or self._closed:
+            return
+        with self._lock:
+            if self.replicas or self._closed:
+                return
+            model = self.loader.get()
+            n_features, n_classes = model.n_features, model.n_classes
+            for name, value in SINGLE_THREAD_ENV.items():
+                os.environ.setdefault(name, value)
+            context = multiprocessing.get_context("spawn")
+            cpus = available_cpus()
+            replicas = []
+            try:
+                for i in range(self.workers):
+                    replicas.append(Replica(
+                        context, self.loader, self.capacity,
+                        n_features, n_classes, cpus[i % len(cpus)]
+                    ))
+            except Exception:
+                for replica in replicas:
+                    replica.close()
+                raise
+            for replica in replicas:
+                self._idle.put(replica)
+            self.replicas = replicas
+            logger.info(
+                "started %d model replicas on cpus %s",
+                len(replicas), [replica.cpu for replica in replicas]
+            )
+
+    def predict(self, batch) -> np.ndarray:
+        """Score a batch on the next idle replica, blocking until one is."""
+        self.start()
+        if self._closed:
+            raise RuntimeError("replica pool is closed")
+        batch = np.asarray(batch, dtype=np.float32)
+        replica = self._idle.get()
+        try:
+            return replica.predict(batch)
+        finally:
+            self._idle.put(replica)
+
+    def close(self) -> None:
+        """Stop every replica."""
+        with self._lock:
+            self._closed = True
+            replicas, self.replicas = self.replicas, []
+        for replica in replicas:
+            replica.close()
+
+    def stats(self) -> dict:
+        """Describe the replicas."""
+        return {
+            "replicas": len(self.replicas),
+            "idle": self._idle.qsize(),
+            "cpus": [replica.cpu for replica in self.replicas],
+            "capacity": self.capacity,
+        }
+
+
+class InferenceBackend:
+    """
+    Forward pass of one model bound to the executor it runs on.
+
+    Attributes:
+        kind (str): one of ``EXECUTORS``.
+        workers (int): threads or replicas, i.e. batches scored at once.
+        predict (callable): blocking (n, features) -> (n, classes).
+        executor (Executor): runs ``predict`` for the event loop.
+    """
+
+    def __init__(self, kind: str, loader: ModelLoader, workers: int = 1):
+        """Create the executor, without starting replica processes."""
+        if kind not in EXECUTORS:
+            raise ValueError(
+                f"Unknown inference executor {kind!r}, expected one of "
+                f"{EXECUTORS}"
+            )
+        self.kind = kind
+        self.workers = 1 if kind == "inline" else (
+            workers if workers > 0 else len(available_cpus())
+        )
+        self.pool: Optional[ReplicaPool] = None
+        if kind == "inline":
+            self.predict = loader.predict
+            self.executor: Executor = InlineExecutor()
+        elif kind == "thread":
+            self.predict = loader.predict
+            self.executor = ThreadPoolExecutor(
+                self.workers, thread_name_prefix="inference"
+            )
+        else:
+            self.pool = ReplicaPool(loader, self.workers)
+            self.predict = self.pool.predict
+            # threads only wait on the replicas' pipes
+            self.executor = ThreadPoolExecutor(
+                self.workers, thread_name_prefix="replica"
+            )
+
+    def start(self) -> None:
+        """Start the replica processes, if any."""
+        if self.pool is not None:
+            self.pool.start()
+
+    def close(self) -> None:
+        """Shut the executor and the replicas down."""
+        self.executor.shutdown(wait=False)
+        if self.pool is not None:
+            self.pool.close()
+
+    def stats(self) -> dict:
+        """Describe the executor."""
+        stats = {"executor": self.kind, "workers": self.workers}
+        if self.pool is not None:
+            stats.update(self.pool.stats())
+        return stats
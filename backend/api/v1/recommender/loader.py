@@ -0,0 +1,82 @@
+#!/usr/bin/python3
+"""Deferred loading of the career model."""
+import asyncio
+import threading
+from typing import Optional
+import numpy as np
+from backend.api.v1 import startup
+from .engines import load_engine
+from .preprocessing import FeatureTransform
+
+
+class ModelLoader:
+    """
+    Load the career model on first use instead of at import time.
+
+    Attributes:
+        engine (str): name of the inference engine to load.
+        path (str): model file, or None for the engine default.
+        transform_path (str): fitted feature transform applied to raw
+            scores before the model, or None to feed them unchanged.
+    """
+
+    def __init__(
+        self, engine: str, path: Optional[str] = None,
+        transform_path: Optional[str] = None
+    ):
+        """Initialize the loader without touching the model file."""
+        self.engine = engine
+        self.path = path
+        self.transform_path = transform_path
+        self._model = None
+        self._transform = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the model has been loaded."""
+        return self._model is not None
+
+    def get(self):
+        """Return the model, loading it on the first call."""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    with startup.phase("model"):
+                        if self.transform_path:
+                            self._transform = FeatureTransform.load(
+                                self.transform_path
+                            )
+                        self._model = load_engine(self.engine, self.path)
+        return self._model
+
+    def predict(self, batch) -> np.ndarray:
+        """Return class probabilities for a (n, features) batch."""
+        model = self.get()
+        if self._transform is not None:
+            batch = self._transform(batch)
+        return model.predict(batch)
+
+    async def warm_up(self) -> None:
+        """Load the model in the default executor."""
+        await asyncio.get_running_loop().run_in_executor(None, self.get)
+
+    @property
+    def version(self) -> str:
+        """Version of the model and its transform, loading them if needed."""
+        return self.info_for(self.get())["version"]
+
+    def info_for(self, model) -> dict:
+        """Describe a loaded model together with its feature transform."""
+        info = dict(model.info)
+        if self._transform is not None:
+            info["transform"] = self._transform.checksum
+            info["version"] += ":" + self._transform.checksum[:12]
+        return info
+
+    @property
+    def info(self) -> dict:
+        """Describe the served model, or that it is not loaded yet."""
+        if self._model is None:
+            return {"engine": self.engine, "loaded": False}
+        return {**self.info_for(self._model), "loaded": True}
@@ -0,0 +1,159 @@
+#!/usr/bin/python3
+"""Pure NumPy forward pass for the Keras career model."""
+import json
+from typing import List, Optional, Tuple
+import h5py
+import numpy as np
+
+Layer = Tuple[np.ndarray, np.ndarray, Optional[str]]
+
+
+def relu(x: np.ndarray) -> np.ndarray:
+    """Rectified linear activation, in place."""
+    return np.maximum(x, 0, out=x)
+
+
+def softmax(x: np.ndarray) -> np.ndarray:
+    """Row-wise softmax, in place."""
+    x -= x.max(axis=1, keepdims=True)
+    np.exp(x, out=x)
+    x /= x.sum(axis=1, keepdims=True)
+    return x
+
+
+def sigmoid(x: np.ndarray) -> np.ndarray:
+    """Logistic activation, in place."""
+    np.negative(x, out=x)
+    # exp overflowing to inf still yields the right limit of 0
+    with np.errstate(over="ignore"):
+        np.exp(x, out=x)
+    x += 1
+    return np.reciprocal(x, out=x)
+
+
+ACTIVATIONS = {
+    "relu": relu,
+    "softmax": softmax,
+    "sigmoid": sigmoid,
+    "tanh": lambda x: np.tanh(x, out=x),
+    "linear": None,
+}
+
+
+def _layer_weights(group: h5py.Group, name: str) -> dict:
+    """Read the weights of a saved layer keyed by their short name."""
+    layer = group[name]
+    weights = {}
+    for weight_name in layer.attrs["weight_names"]:
+        if isinstance(weight_name, bytes):
+            weight_name = weight_name.decode()
+        short = weight_name.rsplit("/", 1)[-1].split(":")[0]
+        weights[short] = np.asarray(layer[weight_name], dtype=np.float32)
+    return weights
+
+
+def read_h5_layers(path: str) -> List[Layer]:
+    """
+    Read a Keras Sequential model as a list of dense layers.
+
+    Every layer is returned as ``(kernel, bias, activation)``. Inference-time
+    BatchNormalization is an affine map, so it is folded into the kernel and
+    bias of the next Dense layer; Dropout, Flatten (of already flat rows)
+    and InputLayer are identities.
+    """
+    with h5py.File(path, "r") as h5:
+        config = h5.attrs["model_config"]
+        if isinstance(config, bytes):
+            config = config.decode()
+        config = json.loads(config)["config"]
+        layers = config["layers"] if isinstance(config, dict) else config
+        group = h5["model_weights"] if "model_weights" in h5 else h5
+
+        dense: List[Layer] = []
+        pending = None
+        for layer in layers:
+            kind = layer["class_name"]
+            conf = layer["config"]
+            if kind in ("InputLayer", "Dropout", "Flatten"):
+                continue
+            weights = _layer_weights(group, conf["name"])
+            if kind == "Dense":
+                kernel = weights["kernel"]
+                bias = weights.get(
+                    "bias", np.zeros(kernel.shape[1], dtype=np.float32)
+                )
+                if pending is not None:
+                    scale, shift = pending
+                    bias = shift @ kernel + bias
+                    kernel = scale[:, None] * kernel
+                    pending = None
+                activation = conf.get("activation", "linear")
+                if activation not in ACTIVATIONS:
+                    raise ValueError(f"Unsupported activation: {activation}")
+                dense.append((kernel, bias, activation))
+            elif kind == "BatchNormalization":
+                variance = weights["moving_variance"]
+                scale = weights.get("gamma", np.ones_like(variance))
+                scale = scale / np.sqrt(variance + conf["epsilon"])
+                shift = weights.get("beta", np.zeros_like(variance))
+                shift = shift - weights["moving_mean"] * scale
+                if pending is not None:
+                    shift = pending[1] * scale + shift
+                    scale = pending[0] * scale
+                pending = (scale, shift)
+            else:
+                raise ValueError(f"Unsupported layer: {kind}")
+
+    if pending is not None:
+        scale, shift = pending
+        dense.append((np.diag(scale).astype(np.float32), shift, "linear"))
+    return dense
+
+
+class NumpyModel:
+    """
+    Dense classifier evaluated with NumPy matmuls.
+
+    Attributes:
+        layers (list): ``(kernel, bias, activation)`` for every dense layer.
+    """
+
+    def __init__(self, layers: List[Layer]):
+        """Initialize the model from already folded layers."""
+        self.layers = [
+            (
+                np.ascontiguousarray(kernel, dtype=np.float32),
+                np.ascontiguousarray(bias, dtype=np.float32),
+                ACTIVATIONS[activation],
+            )
+            for kernel, bias, activation in layers
+        ]
+
+    @classmethod
+    def from_h5(cls, path: str) -> "NumpyModel":
+        """Load a model saved by Keras in HDF5 format."""
+        return cls(read_h5_layers(path))
+
+    @property
+    def n_features(self) -> int:
+        """Number of input features."""
+        return self.layers[0][0].shape[0]
+
+    @property
+    def n_classes(self) -> int:
+        """Number of output classes."""
+        return self.layers[-1][0].shape[1]
+
+    def predict(self, x) -> np.ndarray:
+        """Return class probabilities for a (n, features) batch."""
+        out = np.asarray(x, dtype=np.float32)
+        if out.ndim == 1:
+            out = out[None, :]
+        for kernel, bias, activation in self.layers:
+            out = out @ kernel
+            out += bias
+            if activation is not None:
+                out = activation(out)
+        return out
+
+    predict_on_batch = predict
@@ -0,0 +1,127 @@
+#!/usr/bin/python3
+"""
+Feature normalization fitted offline and applied with NumPy.
+
+The pipeline is a normal-output quantile transform followed by standard
+scaling, the same as scikit-learn's ``QuantileTransformer`` and
+``StandardScaler``. Both steps are monotonic per column, so after fitting
+they collapse into one table per feature: the training quantiles and the
+standardized normal value each of them maps to. Serving the transform is
+then a single ``np.interp`` per column.
+
+Usage:
+    python -m backend.api.v1.recommender.preprocessing \
+        [--training RS_X_training.bin] [--output feature_transform.npz]
+"""
+import argparse
+from statistics import NormalDist
+import numpy as np
+from .weights import file_checksum
+
+TRAINING_PATH = "frontend/models/RS_X_training.bin"
+TRANSFORM_PATH = "backend/api/v1/models/feature_transform.npz"
+N_QUANTILES = 1000
+# scikit-learn clips probabilities to [1e-7, 1 - 1e-7] before the normal ppf
+CLIP = 1e-7
+
+
+def _interp(x: np.ndarray, knots: np.ndarray, values: np.ndarray):
+    """Interpolate, averaging both directions so repeated knots map to
+    the middle of their range like scikit-learn does."""
+    forward = np.interp(x, knots, values)
+    backward = np.interp(-x, -knots[::-1], -values[::-1])
+    return 0.5 * (forward - backward)
+
+
+def fit_transform_tables(
+    training_path: str = TRAINING_PATH, n_quantiles: int = N_QUANTILES
+):
+    """
+    Fit the quantile and scaling steps on a training matrix.
+
+    The matrix is memory-mapped and read one column at a time. Returns the
+    ``(n_quantiles, features)`` quantile and output tables.
+    """
+    data = np.load(training_path, mmap_mode="r")
+    n_quantiles = max(2, min(n_quantiles, data.shape[0]))
+    references = np.linspace(0, 1, n_quantiles)
+    normal = NormalDist()
+    scores = np.array([
+        normal.inv_cdf(min(max(p, CLIP), 1 - CLIP)) for p in references
+    ])
+
+    quantiles = np.empty((n_quantiles, data.shape[1]), dtype=np.float64)
+    outputs = np.empty_like(quantiles)
+    for column in range(data.shape[1]):
+        values = np.asarray(data[:, column], dtype=np.float64)
+        knots = np.maximum.accumulate(np.quantile(values, references))
+        normalized = _interp(values, knots, scores)
+        std = normalized.std()
+        quantiles[:, column] = knots
+        outputs[:, column] = (scores - normalized.mean()) / (std or 1.0)
+    return quantiles, outputs
+
+
+class FeatureTransform:
+    """
+    Fitted feature normalization compiled into interpolation tables.
+
+    Attributes:
+        quantiles (ndarray): training quantiles, one column per feature.
+        outputs (ndarray): standardized value of every quantile.
+        checksum (str): sha256 of the file the tables were loaded from.
+    """
+
+    def __init__(
+        self, quantiles: np.ndarray, outputs: np.ndarray, checksum: str = ""
+    ):
+        """Initialize the transform from its tables."""
+        self.quantiles = np.ascontiguousarray(quantiles.T, dtype=np.float64)
+        self.outputs = np.ascontiguousarray(outputs.T, dtype=np.float64)
+        self.checksum = checksum
+
+    @classmethod
+    def load(cls, path: str = TRANSFORM_PATH) -> "FeatureTransform":
+        """Load tables saved by ``save``."""
+        with np.load(path) as tables:
+            return cls(
+                tables["quantiles"], tables["outputs"], file_checksum(path)
+            )
+
+    @staticmethod
+    def save(path: str, quantiles: np.ndarray, outputs: np.ndarray) -> None:
+        """Save fitted tables compactly as float32."""
+        np.savez_compressed(
+            path,
+            quantiles=quantiles.astype(np.float32),
+            outputs=outputs.astype(np.float32),
+        )
+
+    def __call__(self, batch) -> np.ndarray:
+        """Normalize a (n, features) batch of raw scores."""
+        batch = np.atleast_2d(np.asarray(batch, dtype=np.float64))
+        out = np.empty(batch.shape, dtype=np.float32)
+        for column, (knots, values) in enumerate(
+            zip(self.quantiles, self.outputs)
+        ):
+            out[:, column] = _interp(batch[:, column], knots, values)
+        return out
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(
+        description="Fit the feature normalization of the career model."
+    )
+    parser.add_argument("--training", default=TRAINING_PATH)
+    parser.add_argument("--output", default=TRANSFORM_PATH)
+    parser.add_argument("--n-quantiles", type=int, default=N_QUANTILES)
+    args = parser.parse_args(argv)
+    quantiles, outputs = fit_transform_tables(args.training, args.n_quantiles)
+    FeatureTransform.save(args.output, quantiles, outputs)
+    print(f"wrote {args.output}: {quantiles.shape[0]} quantiles x "
+          f"{quantiles.shape[1]} features")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/python3
+"""Ranking of career model probabilities."""
+from typing import List, Sequence
+import numpy as np
+
+
+class ClassIndex:
+    """
+    Class names of the career model with vectorized ranking.
+
+    Attributes:
+        names (tuple): class names in the order of the model outputs.
+    """
+
+    def __init__(self, names: Sequence[str]):
+        """Initialize the index and cache the names as an array."""
+        self.names = tuple(names)
+        self._names = np.array(self.names, dtype=object)
+
+    def __len__(self) -> int:
+        """Number of classes."""
+        return len(self.names)
+
+    def rank(
+        self, probs: np.ndarray, k: int = 1, distribution: bool = False
+    ) -> List[dict]:
+        """
+        Rank the classes of every row of a (n, classes) batch.
+
+        One argsort orders the whole batch; each row's result holds its
+        ``top`` k careers and, if asked, the full ``distribution`` ordered
+        by decreasing probability.
+        """
+        probs = np.atleast_2d(probs)
+        k = max(1, min(k, probs.shape[1]))
+        order = np.argsort(-probs, axis=1, kind="stable")
+        ranked_probs = np.take_along_axis(probs, order, axis=1).tolist()
+        ranked_names = self._names[order].tolist()
+
+        results = []
+        for names, values in zip(ranked_names, ranked_probs):
+            result = {"top": [
+                {"career": name, "probability": value}
+                for name, value in zip(names[:k], values[:k])
+            ]}
+            if distribution:
+                result["distribution"] = dict(zip(names, values))
+            results.append(result)
+        return results
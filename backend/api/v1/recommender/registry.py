@@ -0,0 +1,361 @@
+#!/usr/bin/python3
+"""
+Registry of career model versions with hot-reload and A/B routing.
+
+The registry is described by a JSON file (``MODEL_REGISTRY_PATH``)::
+
+    {
+        "champion": "rs13",
+        "challenger": "rs10",
+        "challenger_share": 0.1,
+        "shadow": false,
+        "models": [
+            {"name": "rs13",
+             "path": "backend/api/v1/models/model_career_RS.h5",
+             "engine": "mmap", "executor": "process", "workers": 4,
+             "class_names": ["BUSINESS", ...],
+             "transform": "backend/api/v1/models/feature_transform.npz"},
+            {"name": "rs10",
+             "path": "frontend/models/model_career_RS_10classes.h5",
+             "engine": "mmap", "class_names": [...]}
+        ]
+    }
+
+``challenger_share`` of the traffic is answered by the challenger. With
+``shadow`` set, the challenger never answers; it scores the same requests
+in the background so both models can be compared on production traffic.
+The optional ``transform`` of a model is the fitted feature normalization
+applied to raw scores before it (see ``preprocessing``); ``executor`` and
+``workers`` override where it runs (see ``executors``).
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+import zlib
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from .batching import MicroBatcher
+from .executors import InferenceBackend
+from .loader import ModelLoader
+from .ranking import ClassIndex
+from .weights import MODEL_PATH
+
+logger = logging.getLogger(__name__)
+
+
+def file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    """Return the modification time and size of a file, or None."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ModelVersion:
+    """
+    One loaded model with its class names and its own batcher.
+
+    Attributes:
+        name (str): registry name of the model.
+        path (str): model file watched for changes.
+        transform_path (str): optional feature transform, also watched.
+        loader (ModelLoader): lazily loaded engine.
+        class_index (ClassIndex): names of the model outputs.
+        backend (InferenceBackend): executor running the forward pass.
+        batcher (MicroBatcher): batches single-row requests.
+    """
+
+    def __init__(
+        self, name: str, path: str, engine: str,
+        class_names: Sequence[str], make_batcher: Callable,
+        transform_path: Optional[str] = None,
+        executor: str = "thread", workers: int = 1
+    ):
+        """Initialize the version without loading the model."""
+        self.name = name
+        self.path = path
+        self.engine = engine
+        self.transform_path = transform_path
+        self.loader = ModelLoader(engine, path, transform_path)
+        self.class_index = ClassIndex(class_names)
+        self.backend = InferenceBackend(executor, self.loader, workers)
+        self.batcher: MicroBatcher = make_batcher(
+            self.backend.predict, executor=self.backend.executor,
+            concurrency=self.backend.workers
+        )
+        self.stamp = self._stamp()
+
+    def _stamp(self):
+        """Stamp of the model file and of the transform, if any."""
+        if self.transform_path:
+            return file_stamp(self.path), file_stamp(self.transform_path)
+        return file_stamp(self.path)
+
+    def load(self) -> "ModelVersion":
+        """Load the model and check it matches its class names."""
+        model = self.loader.get()
+        n_classes = getattr(model, "n_classes", len(self.class_index))
+        if n_classes != len(self.class_index):
+            raise ValueError(
+                f"{self.name} has {n_classes} outputs but "
+                f"{len(self.class_index)} class names"
+            )
+        self.backend.start()
+        return self
+
+    @property
+    def version(self) -> str:
+        """Version of the model file."""
+        return self.loader.version
+
+    def changed(self) -> bool:
+        """Whether the model files changed since this version was built."""
+        stamp = self._stamp()
+        if self.transform_path and None in stamp:
+            return False
+        return stamp is not None and stamp != self.stamp
+
+    async def close(self, drain: bool = False) -> None:
+        """Stop the batcher and executor, draining the queue if asked."""
+        if drain:
+            await self.batcher.drain()
+        else:
+            await self.batcher.stop()
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.backend.close
+        )
+
+
+class ModelRegistry:
+    """
+    Named model versions, a champion that answers, and a challenger.
+
+    Attributes:
+        champion (str): name of the model serving by default.
+        challenger (str): name of the model under evaluation, if any.
+        challenger_share (float): fraction of traffic it answers.
+        shadow (bool): score the challenger without answering with it.
+    """
+
+    def __init__(
+        self,
+        specs: List[dict],
+        champion: str,
+        challenger: Optional[str] = None,
+        challenger_share: float = 0.0,
+        shadow: bool = False,
+        make_batcher: Callable = MicroBatcher,
+        executor: str = "thread",
+        workers: int = 1,
+    ):
+        """Initialize the registry without loading any model."""
+        self.specs = {spec["name"]: spec for spec in specs}
+        for name in filter(None, (champion, challenger)):
+            if name not in self.specs:
+                raise ValueError(f"Model {name!r} is not registered")
+        self.champion = champion
+        self.challenger = challenger
+        self.challenger_share = min(max(challenger_share, 0.0), 1.0)
+        self.shadow = shadow
+        self.make_batcher = make_batcher
+        self.executor = executor
+        self.workers = workers
+        self._versions: Dict[str, ModelVersion] = {
+            name: self._build(spec) for name, spec in self.specs.items()
+        }
+        self._listeners: List[Callable[["ModelRegistry"], None]] = []
+        self._shadow_tasks = set()
+        self.requests: Counter = Counter()
+        self.reloads = 0
+        self.reload_errors = 0
+        self.last_reload = None
+        self.shadow_scored = 0
+        self.shadow_agreed = 0
+        self.shadow_errors = 0
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "ModelRegistry":
+        """Build a registry from its JSON description."""
+        with open(path, encoding="utf-8") as source:
+            config = json.load(source)
+        return cls(
+            config["models"],
+            champion=config["champion"],
+            challenger=config.get("challenger"),
+            challenger_share=config.get("challenger_share", 0.0),
+            shadow=config.get("shadow", False),
+            **kwargs
+        )
+
+    @classmethod
+    def single(
+        cls, engine: str, path: Optional[str],
+        class_names: Sequence[str], transform: Optional[str] = None,
+        **kwargs
+    ) -> "ModelRegistry":
+        """Build a registry serving one model."""
+        spec = {
+            "name": "default", "engine": engine,
+            "path": path or MODEL_PATH, "class_names": list(class_names),
+            "transform": transform,
+        }
+        return cls([spec], champion="default", **kwargs)
+
+    def _build(self, spec: dict) -> ModelVersion:
+        """Create an unloaded version from its spec."""
+        return ModelVersion(
+            spec["name"], spec["path"], spec.get("engine", "mmap"),
+            spec["class_names"], self.make_batcher, spec.get("transform"),
+            spec.get("executor", self.executor),
+            spec.get("workers", self.workers),
+        )
+
+    def get(self, name: str) -> ModelVersion:
+        """Return the current version of a named model."""
+        return self._versions[name]
+
+    @property
+    def served(self) -> List[ModelVersion]:
+        """Versions that take part in routing."""
+        names = [self.champion]
+        if self.challenger:
+            names.append(self.challenger)
+        return [self._versions[name] for name in names]
+
+    def on_swap(self, listener: Callable[["ModelRegistry"], None]) -> None:
+        """Call listener after every hot swap."""
+        self._listeners.append(listener)
+
+    def route(
+        self, key: Sequence = ()
+    ) -> Tuple[ModelVersion, Optional[ModelVersion]]:
+        """
+        Pick the version that answers a request and the one to shadow it.
+
+        Routing hashes the request key, so a given score vector always
+        lands on the same model and keeps hitting the same cache entries.
+        """
+        served = self._versions[self.champion]
+        shadow = None
+        if self.challenger and self.shadow:
+            shadow = self._versions[self.challenger]
+        elif self.challenger:
+            bucket = zlib.crc32(repr(tuple(key)).encode()) % 10000 / 10000
+            if bucket < self.challenger_share:
+                served = self._versions[self.challenger]
+        self.requests[served.name] += 1
+        return served, shadow
+
+    def load_all(self) -> None:
+        """Load every served model."""
+        for version in self.served:
+            version.load()
+
+    async def warm_up(self) -> None:
+        """Load every served model in the default executor."""
+        await asyncio.get_running_loop().run_in_executor(None, self.load_all)
+
+    async def reload_changed(self) -> List[str]:
+        """
+        Reload the models whose file changed and swap them in atomically.
+
+        The new version is fully loaded off the event loop before it replaces
+        the old one, and requests already holding the old version finish on
+        it; the old batcher and executor are stopped once its queue drains,
+        so nothing in flight is dropped.
+        """
+        loop = asyncio.get_running_loop()
+        swapped = []
+        for current in self.served:
+            name = current.name
+            if not current.changed():
+                continue
+            try:
+                fresh = await loop.run_in_executor(
+                    None, self._build(self.specs[name]).load
+                )
+            except Exception:  # pylint: disable=broad-except
+                self.reload_errors += 1
+                logger.exception("could not reload model %s", name)
+                continue
+            self._versions[name] = fresh
+            swapped.append(name)
+            self.reloads += 1
+            self.last_reload = time.time()
+            logger.info("reloaded model %s as %s", name, fresh.version)
+            asyncio.create_task(current.close(drain=True))
+        if swapped:
+            for listener in self._listeners:
+                listener(self)
+        return swapped
+
+    async def close(self) -> None:
+        """Stop the batchers and executors of the served versions."""
+        for version in self.served:
+            await version.close()
+
+    async def watch(self, interval: float) -> None:
+        """Poll the model files and hot-swap the ones that change."""
+        while True:
+            await asyncio.sleep(interval)
+            await self.reload_changed()
+
+    def shadow_score(
+        self, challenger: ModelVersion, row: Sequence[float], served_top: str
+    ) -> None:
+        """Score a row with the challenger in the background."""
+        task = asyncio.create_task(
+            self._shadow(challenger, row, served_top)
+        )
+        self._shadow_tasks.add(task)
+        task.add_done_callback(self._shadow_tasks.discard)
+
+    async def _shadow(
+        self, challenger: ModelVersion, row: Sequence[float], served_top: str
+    ) -> None:
+        """Compare the challenger's top career with the served one."""
+        try:
+            probs = await challenger.batcher.predict(row)
+        except Exception:  # pylint: disable=broad-except
+            self.shadow_errors += 1
+            return
+        self.shadow_scored += 1
+        top = challenger.class_index.rank(probs)[0]["top"][0]["career"]
+        if top == served_top:
+            self.shadow_agreed += 1
+
+    def info(self) -> dict:
+        """Describe the served versions."""
+        return {
+            "champion": self.champion,
+            "challenger": self.challenger,
+            "challenger_share": self.challenger_share,
+            "shadow": self.shadow,
+            "models": {
+                version.name: version.loader.info for version in self.served
+            },
+        }
+
+    def stats(self) -> dict:
+        """Return routing, reload and shadow metrics."""
+        return {
+            "requests": dict(self.requests),
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+            "last_reload": self.last_reload,
+            "shadow_scored": self.shadow_scored,
+            "shadow_agreement": self.shadow_agreed / self.shadow_scored
+            if self.shadow_scored else None,
+            "shadow_errors": self.shadow_errors,
+            "batchers": {
+                version.name: version.batcher.stats()
+                for version in self.served
+            },
+            "executors": {
+                version.name: version.backend.stats()
+                for version in self.served
+            },
+        }
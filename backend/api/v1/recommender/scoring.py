@@ -0,0 +1,99 @@
+#!/usr/bin/python3
+"""Chunked scoring of many students for batch recommendations."""
+import codecs
+import csv
+from itertools import islice
+from typing import (
+    AsyncIterator, Awaitable, BinaryIO, Callable, Iterable, Iterator, List,
+    Optional, Tuple
+)
+import numpy as np
+import orjson
+from starlette.concurrency import run_in_threadpool
+from .ranking import ClassIndex
+
+SCORE_COLUMNS = (
+    "language", "mathematics", "biology", "chemistry",
+    "physics", "social_science", "philosophy", "english",
+)
+MIN_SCORE = 1
+MAX_SCORE = 100
+
+# (row number, student id, scores or None, error or None)
+Row = Tuple[int, Optional[str], Optional[List[int]], Optional[str]]
+
+
+def read_csv_rows(file: BinaryIO, encoding: str = "utf-8") -> Iterator[Row]:
+    """
+    Lazily parse a CSV upload with one student per line.
+
+    The header must name every score column; an optional ``id`` column is
+    echoed back. Raises ValueError for a missing column before any row is
+    read; bad rows are reported in place instead of aborting the stream.
+    """
+    reader = csv.reader(codecs.iterdecode(file, encoding))
+    header = [name.strip().lower() for name in next(reader, [])]
+    missing = [name for name in SCORE_COLUMNS if name not in header]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    positions = [header.index(name) for name in SCORE_COLUMNS]
+    id_position = header.index("id") if "id" in header else None
+
+    def rows() -> Iterator[Row]:
+        for number, line in enumerate(reader, start=1):
+            if not line:
+                continue
+            student_id = None
+            if id_position is not None and id_position < len(line):
+                student_id = line[id_position]
+            try:
+                scores = [int(line[position]) for position in positions]
+            except (IndexError, ValueError):
+                yield number, student_id, None, "Invalid or missing score"
+                continue
+            if not all(MIN_SCORE <= score <= MAX_SCORE for score in scores):
+                yield number, student_id, None, "Score out of range"
+                continue
+            yield number, student_id, scores, None
+
+    return rows()
+
+
+async def score_rows(
+    rows: Iterable[Row],
+    predict: Callable[[np.ndarray], Awaitable[np.ndarray]],
+    class_index: ClassIndex,
+    k: int,
+    chunk_size: int,
+    distribution: bool = False,
+) -> AsyncIterator[bytes]:
+    """
+    Score rows one chunk at a time and yield one NDJSON line per row.
+
+    Rows are read in a thread, a chunk at a time, so an upload is parsed
+    off the event loop; memory is bounded by ``chunk_size`` no matter how
+    many rows are streamed through. ``predict`` is awaited once per chunk.
+    """
+    rows = iter(rows)
+    while True:
+        chunk = await run_in_threadpool(list, islice(rows, chunk_size))
+        if not chunk:
+            return
+        valid = [row for row in chunk if row[2] is not None]
+        ranked = {}
+        if valid:
+            batch = np.asarray([row[2] for row in valid], dtype=np.float32)
+            results = class_index.rank(
+                await predict(batch), k, distribution
+            )
+            for row, result in zip(valid, results):
+                ranked[row[0]] = result
+        lines = []
+        for number, student_id, _, error in chunk:
+            line = {"row": number, "id": student_id}
+            if error is None:
+                line.update(ranked[number])
+            else:
+                line["error"] = error
+            lines.append(orjson.dumps(line))
+        yield b"\n".join(lines) + b"\n"
@@ -0,0 +1,196 @@
+#!/usr/bin/python3
+"""
+Flat, page-aligned weight file for the career model.
+
+The file is a small header followed by every kernel and bias as raw
+little-endian float32, each starting on a page boundary::
+
+    b"CRSW" | uint32 format | uint64 header size | JSON header | pad
+    layer 0 kernel | pad | layer 0 bias | pad | ...
+
+Workers map the file read-only, so the OS keeps one copy of the weights in
+the page cache no matter how many workers serve the model.
+
+Usage:
+    python -m backend.api.v1.recommender.weights [--model H5] [--output F]
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from typing import List
+import numpy as np
+from .numpy_model import Layer, NumpyModel, read_h5_layers
+
+MAGIC = b"CRSW"
+FORMAT_VERSION = 1
+PAGE_SIZE = 4096
+PREAMBLE = struct.Struct("<4sIQ")
+DTYPE = np.dtype("<f4")
+MODEL_PATH = "backend/api/v1/models/model_career_RS.h5"
+WEIGHTS_PATH = "backend/api/v1/models/model_career_RS.weights"
+
+
+def file_checksum(path: str) -> str:
+    """Return the sha256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _align(offset: int) -> int:
+    """Round an offset up to the next page boundary."""
+    return -(-offset // PAGE_SIZE) * PAGE_SIZE
+
+
+def _layout(layers: List[Layer], start: int) -> List[dict]:
+    """Assign a page-aligned offset to every kernel and bias."""
+    offset = start
+    entries = []
+    for kernel, bias, activation in layers:
+        entry = {"activation": activation}
+        for key, array in (("kernel", kernel), ("bias", bias)):
+            entry[key] = {"offset": offset, "shape": list(array.shape)}
+            offset = _align(offset + array.size * DTYPE.itemsize)
+        entries.append(entry)
+    return entries
+
+
+def export_weights(
+    model_path: str = MODEL_PATH, output_path: str = WEIGHTS_PATH
+) -> dict:
+    """
+    Write the folded layers of a Keras HDF5 model to a flat weight file.
+
+    The file is written next to its destination and renamed into place, so
+    workers racing on a cold start never map a partial file. Returns the
+    header that was written.
+    """
+    layers = read_h5_layers(model_path)
+    header = {
+        "dtype": DTYPE.str,
+        "page_size": PAGE_SIZE,
+        "source": os.path.basename(model_path),
+        "version": file_checksum(model_path),
+    }
+    # the header size decides where data starts, so lay it out twice: once
+    # to size it, once with offsets that account for that size
+    data_start = _align(PREAMBLE.size + len(json.dumps(header)) + 1024)
+    while True:
+        header["layers"] = _layout(layers, data_start)
+        header["checksum"] = "0" * 64
+        blob = json.dumps(header, sort_keys=True).encode()
+        if PREAMBLE.size + len(blob) <= data_start:
+            break
+        data_start = _align(PREAMBLE.size + len(blob))
+
+    digest = hashlib.sha256()
+    chunks = []
+    for (kernel, bias, _), entry in zip(layers, header["layers"]):
+        for key, array in (("kernel", kernel), ("bias", bias)):
+            raw = np.ascontiguousarray(array, dtype=DTYPE).tobytes()
+            digest.update(raw)
+            chunks.append((entry[key]["offset"], raw))
+    header["checksum"] = digest.hexdigest()
+    blob = json.dumps(header, sort_keys=True).encode()
+
+    directory = os.path.dirname(os.path.abspath(output_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(blob)))
+            out.write(blob)
+            for offset, raw in chunks:
+                out.seek(offset)
+                out.write(raw)
+            out.truncate(_align(out.tell()))
+            out.flush()
+            os.fsync(out.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return header
+
+
+class MappedModel(NumpyModel):
+    """
+    Career model whose weights are views into a read-only memory map.
+
+    Attributes:
+        header (dict): metadata read from the weight file.
+    """
+
+    def __init__(self, mapping: mmap.mmap, header: dict):
+        """Initialize the model over an open mapping."""
+        layers = []
+        for entry in header["layers"]:
+            arrays = []
+            for key in ("kernel", "bias"):
+                shape = entry[key]["shape"]
+                arrays.append(np.frombuffer(
+                    mapping, dtype=np.dtype(header["dtype"]),
+                    count=int(np.prod(shape)), offset=entry[key]["offset"]
+                ).reshape(shape))
+            layers.append((arrays[0], arrays[1], entry["activation"]))
+        super().__init__(layers)
+        self._mapping = mapping
+        self.header = header
+
+    @classmethod
+    def open(cls, path: str = WEIGHTS_PATH, verify: bool = True):
+        """Map a weight file, optionally checking its data checksum."""
+        with open(path, "rb") as source:
+            mapping = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, size = PREAMBLE.unpack_from(mapping)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            mapping.close()
+            raise ValueError(f"{path} is not a format {FORMAT_VERSION} "
+                             "career model weight file")
+        header = json.loads(mapping[PREAMBLE.size:PREAMBLE.size + size])
+        model = cls(mapping, header)
+        if verify:
+            digest = hashlib.sha256()
+            for kernel, bias, _ in model.layers:
+                digest.update(kernel)
+                digest.update(bias)
+            if digest.hexdigest() != header["checksum"]:
+                raise ValueError(f"{path} failed its checksum")
+        return model
+
+    @classmethod
+    def open_or_export(
+        cls, path: str = WEIGHTS_PATH, model_path: str = MODEL_PATH
+    ):
+        """Map a weight file, exporting it first if it is missing or stale."""
+        if not os.path.exists(path) or (
+            os.path.exists(model_path)
+            and os.path.getmtime(model_path) > os.path.getmtime(path)
+        ):
+            export_weights(model_path, path)
+        return cls.open(path)
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(
+        description="Export the career model to a flat weight file."
+    )
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--output", default=WEIGHTS_PATH)
+    args = parser.parse_args(argv)
+    header = export_weights(args.model, args.output)
+    print(f"wrote {args.output} ({os.path.getsize(args.output)} bytes)")
+    print(f"version  {header['version']}")
+    print(f"checksum {header['checksum']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/python3
+"""Career and skill queries returning template-ready schemas."""
+from typing import AsyncIterator, List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, selectinload
+from backend.api.v1.models.careers import Career, Skill
+from backend.api.v1.repositories.pagination import PageRequest, paginate
+from backend.api.v1.schemas import career_schemas
+from backend.api.v1.schemas.page_schemas import Page
+
+CAREER_COLUMNS = (
+    Career.id, Career.title, Career.description, Career.created_at,
+)
+CAREER_KEY = (Career.id,)
+
+
+def to_career(career: Career) -> career_schemas.Career:
+    """Flatten a career row."""
+    return career_schemas.Career(
+        id=career.id, title=career.title,
+        description=career.description, created_at=career.created_at
+    )
+
+
+def to_career_with_skills(
+    career: Career
+) -> career_schemas.CareerWithSkills:
+    """Flatten a career and its already loaded skills."""
+    return career_schemas.CareerWithSkills(
+        id=career.id, title=career.title,
+        description=career.description, created_at=career.created_at,
+        skills=[skill.title for skill in career.skills]
+    )
+
+
+class CareerRepository:
+    """
+    Career queries, each loading exactly what its view renders.
+
+    Every method runs a fixed number of queries whatever the number of
+    rows: one for careers, plus one ``selectinload`` for all their skills.
+
+    Attributes:
+        session (AsyncSession): session the queries run on.
+    """
+
+    def __init__(self, session: AsyncSession):
+        """Initialize the repository."""
+        self.session = session
+
+    def _careers(self, with_skills: bool = False):
+        """Select careers with only the columns the views use."""
+        query = select(Career).options(load_only(*CAREER_COLUMNS))
+        if with_skills:
+            query = query.options(
+                selectinload(Career.skills).load_only(Skill.title)
+            )
+        return query.order_by(Career.id)
+
+    async def page(self, request: PageRequest) -> Page:
+        """One page of careers, reading only the listed columns."""
+        return await paginate(
+            self.session, select(*CAREER_COLUMNS), CAREER_KEY, request,
+            lambda row: career_schemas.Career.construct(**row._mapping)
+        )
+
+    async def titles(self, request: PageRequest) -> Page:
+        """One page of career ids and titles, for pickers."""
+        return await paginate(
+            self.session, select(Career.id, Career.title), CAREER_KEY,
+            request,
+            lambda row: career_schemas.CareerTitle.construct(**row._mapping)
+        )
+
+    async def stream(self, chunk_size: int) -> AsyncIterator[List[dict]]:
+        """Every career in list order, in chunks, from a server cursor."""
+        result = await self.session.stream(
+            select(*CAREER_COLUMNS).order_by(*CAREER_KEY)
+            .execution_options(yield_per=chunk_size)
+        )
+        async for rows in result.mappings().partitions():
+            yield rows
+
+    async def get(self, career_id: int) -> Optional[career_schemas.Career]:
+        """One career, or None."""
+        career = await self.session.scalar(
+            self._careers().filter(Career.id == career_id)
+        )
+        return to_career(career) if career else None
+
+    async def page_with_skills(self, request: PageRequest) -> Page:
+        """One page of careers with their skill titles, in two queries."""
+        return await paginate(
+            self.session, self._careers(with_skills=True), CAREER_KEY,
+            request, lambda row: to_career_with_skills(row[0])
+        )
+
+    async def get_with_skills(
+        self, career_id: int
+    ) -> Optional[career_schemas.CareerWithSkills]:
+        """One career with its skill titles, or None."""
+        career = await self.session.scalar(
+            self._careers(with_skills=True).filter(Career.id == career_id)
+        )
+        return to_career_with_skills(career) if career else None
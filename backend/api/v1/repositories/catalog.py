@@ -0,0 +1,172 @@
+#!/usr/bin/python3
+"""Bulk catalog writes and reads keyed by natural keys."""
+from typing import AsyncIterator, Dict, List, Sequence
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.api.v1.models.careers import Career, Skill
+from backend.api.v1.models.courses import Course
+from backend.api.v1.models.user_models import User
+
+KINDS = ("careers", "skills", "courses")
+# (field, array type) of the rows of each kind, as in the files; a career
+# is named by its title, an owner by the username
+FIELDS: Dict[str, tuple] = {
+    "careers": (
+        ("title", "text"), ("description", "text"), ("owner", "text"),
+    ),
+    "skills": (
+        ("career", "text"), ("title", "text"), ("proficiency", "integer"),
+    ),
+    "courses": (
+        ("career", "text"), ("title", "text"), ("description", "text"),
+        ("owner", "text"),
+    ),
+}
+# imports of concurrent requests must not both insert the same title
+IMPORT_LOCK = 0x636174616C6F67
+
+
+def given(kind: str, key: str) -> str:
+    """Distinct rows of a chunk by key, the last of each key winning."""
+    names = ", ".join(name for name, _ in FIELDS[kind])
+    arrays = ", ".join(
+        f"CAST(:{name} AS {array}[])" for name, array in FIELDS[kind]
+    )
+    return (
+        f"SELECT DISTINCT ON ({key}) {names} FROM unnest({arrays}) "
+        f"WITH ORDINALITY AS given({names}, position) "
+        f"ORDER BY {key}, position DESC"
+    )
+
+
+# a title shared by several careers names the oldest of them
+CAREER_IDS = """
+career AS (
+    SELECT DISTINCT ON (title) id, title FROM careers
+    WHERE title IN (SELECT career FROM input)
+    ORDER BY title, id
+)"""
+COUNTS = """
+SELECT (SELECT count(*) FROM input) AS given,
+    (SELECT count(*) FROM inserted) AS inserted,
+    (SELECT count(DISTINCT key) FROM updated) AS updated
+"""
+
+# Each statement updates the rows whose natural key exists and inserts
+# the others; rows naming an unknown career or owner are skipped.
+IMPORT_SQL = {
+    "careers": text(f"""
+WITH input AS ({given("careers", "title")}),
+updated AS (
+    UPDATE careers SET description = input.description
+    FROM input WHERE careers.title = input.title
+    RETURNING careers.title AS key
+), inserted AS (
+    INSERT INTO careers (title, description, user_id)
+    SELECT input.title, input.description, users.id
+    FROM input JOIN users ON users.username = input.owner
+    WHERE NOT EXISTS (SELECT 1 FROM careers WHERE title = input.title)
+    RETURNING id
+)
+{COUNTS}"""),
+    "skills": text(f"""
+WITH input AS ({given("skills", "career, title")}),
+{CAREER_IDS}, keyed AS (
+    SELECT career.id AS career_id, input.title, input.proficiency
+    FROM input JOIN career ON career.title = input.career
+), updated AS (
+    UPDATE skills SET proficiency = keyed.proficiency
+    FROM keyed
+    WHERE skills.career_id = keyed.career_id AND skills.title = keyed.title
+    RETURNING (skills.career_id, skills.title) AS key
+), inserted AS (
+    INSERT INTO skills (career_id, title, proficiency)
+    SELECT career_id, title, proficiency FROM keyed
+    WHERE NOT EXISTS (
+        SELECT 1 FROM skills
+        WHERE career_id = keyed.career_id AND title = keyed.title
+    )
+    RETURNING id
+)
+{COUNTS}"""),
+    "courses": text(f"""
+WITH input AS ({given("courses", "career, title")}),
+{CAREER_IDS}, keyed AS (
+    SELECT career.id AS career_id, input.title, input.description,
+        users.id AS owner_id
+    FROM input JOIN career ON career.title = input.career
+    LEFT JOIN users ON users.username = input.owner
+), updated AS (
+    UPDATE courses SET description = keyed.description
+    FROM keyed
+    WHERE courses.career_id = keyed.career_id
+    AND courses.title = keyed.title
+    RETURNING (courses.career_id, courses.title) AS key
+), inserted AS (
+    INSERT INTO courses (career_id, title, description, owner_id)
+    SELECT career_id, title, description, owner_id FROM keyed
+    WHERE owner_id IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM courses
+        WHERE career_id = keyed.career_id AND title = keyed.title
+    )
+    RETURNING id
+)
+{COUNTS}"""),
+}
+
+EXPORT_QUERIES = {
+    "careers": select(
+        Career.title, Career.description, User.username.label("owner")
+    ).join(User, Career.user_id == User.id).order_by(Career.id),
+    "skills": select(
+        Career.title.label("career"), Skill.title, Skill.proficiency
+    ).join(Career, Skill.career_id == Career.id).order_by(Skill.id),
+    "courses": select(
+        Career.title.label("career"), Course.title, Course.description,
+        User.username.label("owner")
+    ).join(Career, Course.career_id == Career.id)
+    .join(User, Course.owner_id == User.id).order_by(Course.id),
+}
+
+
+class CatalogRepository:
+    """
+    Careers, skills and courses written and read in bulk.
+
+    Rows refer to careers by title and to users by username, so a catalog
+    exported from one database imports into another.
+
+    Attributes:
+        session (AsyncSession): session the statements run on.
+    """
+
+    def __init__(self, session: AsyncSession):
+        """Initialize the repository."""
+        self.session = session
+
+    async def import_chunk(
+        self, kind: str, rows: Sequence[dict]
+    ) -> Dict[str, int]:
+        """
+        Insert or update one chunk of rows with a single statement.
+
+        Returns the number of distinct keys given, inserted and updated;
+        the caller commits.
+        """
+        await self.session.execute(
+            text("SELECT pg_advisory_xact_lock(:key)"), {"key": IMPORT_LOCK}
+        )
+        result = await self.session.execute(IMPORT_SQL[kind], {
+            name: [row[name] for row in rows] for name, _ in FIELDS[kind]
+        })
+        return dict(result.one()._mapping)
+
+    async def export(
+        self, kind: str, chunk_size: int
+    ) -> AsyncIterator[List[tuple]]:
+        """Yield every row of a kind in chunks, from a server side cursor."""
+        result = await self.session.stream(
+            EXPORT_QUERIES[kind].execution_options(yield_per=chunk_size)
+        )
+        async for rows in result.partitions():
+            yield rows
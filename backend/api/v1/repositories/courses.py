@@ -0,0 +1,109 @@
+#!/usr/bin/python3
+"""Course and rating queries returning template-ready schemas."""
+from typing import AsyncIterator, List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, load_only
+from backend.api.v1.models.careers import Career
+from backend.api.v1.models.courses import Course
+from backend.api.v1.models.ratings import CourseRatingStats
+from backend.api.v1.repositories.pagination import PageRequest, paginate
+from backend.api.v1.schemas import course_schemas
+from backend.api.v1.schemas.page_schemas import Page
+
+COURSE_COLUMNS = (
+    Course.id, Course.title, Course.description,
+    Course.career_id, Course.created_at,
+)
+COURSE_KEY = (Course.id,)
+# columns of the course lists, as in course_schemas.Course
+LIST_COLUMNS = (Course.id, Course.title, Course.description, Course.created_at)
+
+
+def to_course_summary(course: Course) -> course_schemas.CourseSummary:
+    """Flatten a course with its loaded career and rating aggregate."""
+    stats = course.rating_stats
+    return course_schemas.CourseSummary(
+        id=course.id, title=course.title, description=course.description,
+        created_at=course.created_at, career_id=course.career_id,
+        career_title=course.career.title if course.career else None,
+        rating=stats.mean if stats else None,
+        ratings_count=stats.ratings_count if stats else 0,
+        histogram=stats.histogram if stats else [0] * 5,
+    )
+
+
+class CourseRepository:
+    """
+    Course queries with their career and rating aggregate loaded up front.
+
+    The career title and the ``course_rating_stats`` row are joined into
+    the course query, so a course costs one query however many ratings it
+    has.
+
+    Attributes:
+        session (AsyncSession): session the queries run on.
+    """
+
+    def __init__(self, session: AsyncSession):
+        """Initialize the repository."""
+        self.session = session
+
+    @staticmethod
+    def _courses():
+        """Select courses with their career title and rating aggregate."""
+        return select(Course).options(
+            load_only(*COURSE_COLUMNS),
+            joinedload(Course.career).load_only(Career.title),
+            joinedload(Course.rating_stats),
+        ).order_by(Course.id)
+
+    async def page(self, request: PageRequest) -> Page:
+        """One page of courses, reading only the listed columns."""
+        return await paginate(
+            self.session, select(*LIST_COLUMNS), COURSE_KEY, request,
+            lambda row: course_schemas.Course.construct(**row._mapping)
+        )
+
+    async def stream(self, chunk_size: int) -> AsyncIterator[List[dict]]:
+        """Every course in list order, in chunks, from a server cursor."""
+        result = await self.session.stream(
+            select(*LIST_COLUMNS).order_by(*COURSE_KEY)
+            .execution_options(yield_per=chunk_size)
+        )
+        async for rows in result.mappings().partitions():
+            yield rows
+
+    async def get(
+        self, course_id: int
+    ) -> Optional[course_schemas.CourseSummary]:
+        """One course, or None."""
+        course = await self.session.scalar(
+            self._courses().filter(Course.id == course_id)
+        )
+        return to_course_summary(course) if course else None
+
+    async def top_rated(
+        self, career_id: int, limit: int = 5
+    ) -> List[course_schemas.CourseSummary]:
+        """Best rated courses of a career, read from the aggregates only."""
+        stats = CourseRatingStats
+        rows = await self.session.execute(
+            select(
+                Course.id, Course.title, Course.description,
+                Course.created_at, Course.career_id,
+                stats.mean.label("rating"), stats.ratings_count,
+            )
+            .join(stats, stats.course_id == Course.id)
+            .filter(Course.career_id == career_id, stats.ratings_count > 0)
+            .order_by(
+                stats.mean.desc(), stats.ratings_count.desc(), Course.id
+            )
+            .limit(limit)
+        )
+        return [
+            course_schemas.CourseSummary.construct(
+                career_title=None, histogram=None, **row._mapping
+            )
+            for row in rows
+        ]
@@ -0,0 +1,45 @@
+#!/usr/bin/python3
+"""Enrollment writes."""
+from typing import List, Sequence, Tuple
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# enrollments of unknown users or courses are skipped, repeats are no-ops
+ENROLL_SQL = text("""
+INSERT INTO enrollments (user_id, course_id)
+SELECT DISTINCT given.user_id, given.course_id
+FROM unnest(CAST(:user_ids AS uuid[]), CAST(:course_ids AS integer[]))
+    AS given(user_id, course_id)
+JOIN courses ON courses.id = given.course_id
+JOIN users ON users.id = given.user_id
+ORDER BY given.user_id, given.course_id
+ON CONFLICT ON CONSTRAINT uq_enrollments_user_id_course_id DO NOTHING
+RETURNING user_id, course_id
+""")
+
+
+class EnrollmentRepository:
+    """
+    Enrollment writes for any number of users and courses at once.
+
+    Attributes:
+        session (AsyncSession): session the statements run on.
+    """
+
+    def __init__(self, session: AsyncSession):
+        """Initialize the repository."""
+        self.session = session
+
+    async def enroll_all(
+        self, keys: Sequence[Tuple[str, int]]
+    ) -> List[Tuple[str, int]]:
+        """Enroll users in courses; return the new (user_id, course_id)."""
+        result = await self.session.execute(ENROLL_SQL, {
+            "user_ids": [user_id for user_id, _ in keys],
+            "course_ids": [course_id for _, course_id in keys],
+        })
+        return [(str(row.user_id), row.course_id) for row in result]
+
+    async def enroll(self, user_id: str, course_id: int) -> bool:
+        """Enroll a user in a course; False if already or impossible."""
+        return bool(await self.enroll_all([(user_id, course_id)]))
@@ -0,0 +1,189 @@
+#!/usr/bin/python3
+"""Keyset pagination of list queries."""
+import base64
+import binascii
+import uuid
+from datetime import datetime
+from typing import Callable, List, Optional, Sequence
+import orjson
+from fastapi import HTTPException, Query, status
+from sqlalchemy import (
+    BigInteger, DateTime, Integer, Select, SmallInteger, String, Uuid,
+    literal, tuple_
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.api.settings import settings
+from backend.api.v1.schemas.page_schemas import Page
+
+NEXT = "next"
+PREV = "prev"
+
+
+def encode_cursor(direction: str, values: Sequence) -> str:
+    """Encode the key of a boundary row as an opaque url safe cursor."""
+    payload = orjson.dumps([direction, list(values)])
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Decode a cursor into its direction and key values."""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        direction, values = orjson.loads(payload)
+    except (binascii.Error, orjson.JSONDecodeError, TypeError, ValueError):
+        raise ValueError("Invalid cursor") from None
+    if direction not in (NEXT, PREV) or not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return direction, values
+
+
+class PageRequest:
+    """
+    Position and size of the page a list route was asked for.
+
+    Attributes:
+        direction (str): "next" to read after the key, "prev" before it.
+        values (list): key of the boundary row, None for the first page.
+        limit (int): number of rows to return.
+    """
+
+    def __init__(
+        self, limit: int, direction: str = NEXT,
+        values: Optional[list] = None
+    ):
+        """Initialize the request."""
+        self.limit = limit
+        self.direction = direction
+        self.values = values
+
+    def key(self, keys: Sequence) -> Optional[list]:
+        """
+        Boundary key typed for the key columns, None for the first page.
+
+        Raises ValueError for a key that does not fit the columns, so a
+        cursor of another list or with values of the wrong type never
+        reaches the database.
+        """
+        if self.values is None:
+            return None
+        if len(self.values) != len(keys):
+            raise ValueError("Invalid cursor")
+        return [
+            _key_value(column, value)
+            for column, value in zip(keys, self.values)
+        ]
+
+
+def _key_value(column, value):
+    """A cursor value checked and converted for its key column."""
+    kind = column.type
+    try:
+        if isinstance(kind, DateTime):
+            return datetime.fromisoformat(value)
+        if isinstance(kind, Uuid):
+            value = uuid.UUID(value)
+            return value if kind.as_uuid else str(value)
+    except (AttributeError, TypeError, ValueError):
+        raise ValueError("Invalid cursor") from None
+    if isinstance(kind, Integer):
+        bits = 64 if isinstance(kind, BigInteger) else (
+            16 if isinstance(kind, SmallInteger) else 32
+        )
+        # bool is an int too, but never a key
+        if type(value) is int and -2 ** (bits - 1) <= value < 2 ** (bits - 1):
+            return value
+    elif isinstance(kind, String):
+        if isinstance(value, str):
+            return value
+    elif isinstance(value, (str, int, float)):
+        return value
+    raise ValueError("Invalid cursor")
+
+
+def invalid_cursor() -> HTTPException:
+    """Error answered for a cursor that cannot be read."""
+    return HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail="Invalid cursor"
+    )
+
+
+def page_request(
+    cursor: Optional[str] = None,
+    limit: int = Query(
+        settings.PAGE_SIZE, ge=1, le=settings.PAGE_SIZE_MAX
+    ),
+) -> PageRequest:
+    """Read the cursor and page size query parameters of a list route."""
+    if cursor is None:
+        return PageRequest(limit)
+    try:
+        direction, values = decode_cursor(cursor)
+    except ValueError:
+        raise invalid_cursor() from None
+    return PageRequest(limit, direction, values)
+
+
+def page_query(query: Select, keys: Sequence, request: PageRequest) -> Select:
+    """
+    The statement reading one page of a query ordered by a unique key.
+
+    The page is found with a ``WHERE (key) > (:cursor)`` range scan on the
+    key index instead of an OFFSET, so every page costs the same however
+    deep it is. One extra row is read to know whether a further page
+    exists.
+    """
+    key = request.key(keys)
+    forward = key is None or request.direction == NEXT
+    if key is not None:
+        boundary = tuple_(*(
+            literal(value, column.type) for column, value in zip(keys, key)
+        ))
+        if forward:
+            query = query.where(tuple_(*keys) > boundary)
+        else:
+            query = query.where(tuple_(*keys) < boundary)
+    order = keys if forward else [column.desc() for column in keys]
+    return query.order_by(None).order_by(*order).limit(request.limit + 1)
+
+
+async def paginate(
+    session: AsyncSession, query: Select, keys: Sequence,
+    request: PageRequest, build: Callable
+) -> Page:
+    """
+    Run one page of a query ordered by a unique key, see ``page_query``.
+
+    ``build`` turns each result row into the item rendered, which must
+    carry the key columns as attributes of the same name. A cursor whose
+    key does not fit ``keys`` is answered with a 422.
+    """
+    try:
+        key = request.key(keys)
+    except ValueError:
+        raise invalid_cursor() from None
+    forward = key is None or request.direction == NEXT
+    result = await session.execute(page_query(query, keys, request))
+    rows: List = result.all()
+    more = len(rows) > request.limit
+    rows = rows[:request.limit]
+    if not forward:
+        rows.reverse()
+    items = [build(row) for row in rows]
+
+    has_next = more if forward else True
+    has_prev = key is not None if forward else more
+    next_cursor = prev_cursor = None
+    if items and has_next:
+        next_cursor = encode_cursor(NEXT, _key_of(items[-1], keys))
+    if items and has_prev:
+        prev_cursor = encode_cursor(PREV, _key_of(items[0], keys))
+    return Page.construct(
+        items=items, limit=request.limit,
+        next_cursor=next_cursor, prev_cursor=prev_cursor
+    )
+
+
+def _key_of(item, keys: Sequence) -> list:
+    """Key column values of a built item."""
+    return [getattr(item, column.key) for column in keys]
@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+"""Career preference writes."""
+from typing import Dict, List, Sequence
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+CLEAR_SQL = text("""
+DELETE FROM preferences WHERE user_id = ANY(CAST(:user_ids AS uuid[]))
+""")
+# preferences for unknown careers or users are skipped
+PREFER_SQL = text("""
+INSERT INTO preferences (user_id, career_id)
+SELECT DISTINCT given.user_id, given.career_id
+FROM unnest(CAST(:user_ids AS uuid[]), CAST(:career_ids AS integer[]))
+    AS given(user_id, career_id)
+JOIN careers ON careers.id = given.career_id
+JOIN users ON users.id = given.user_id
+ORDER BY given.user_id, given.career_id
+RETURNING user_id, career_id
+""")
+
+
+class PreferenceRepository:
+    """
+    Career preference writes for any number of users at once.
+
+    Attributes:
+        session (AsyncSession): session the statements run on.
+    """
+
+    def __init__(self, session: AsyncSession):
+        """Initialize the repository."""
+        self.session = session
+
+    async def replace_all(
+        self, preferences: Dict[str, Sequence[int]]
+    ) -> Dict[str, List[int]]:
+        """Replace the preferred careers of users; return what was stored."""
+        preferences = {
+            str(user_id): career_ids
+            for user_id, career_ids in preferences.items()
+        }
+        await self.session.execute(
+            CLEAR_SQL, {"user_ids": list(preferences)}
+        )
+        pairs = [
+            (user_id, career_id)
+            for user_id, career_ids in preferences.items()
+            for career_id in career_ids
+        ]
+        stored: Dict[str, List[int]] = {user: [] for user in preferences}
+        if pairs:
+            result = await self.session.execute(PREFER_SQL, {
+                "user_ids": [user_id for user_id, _ in pairs],
+                "career_ids": [career_id for _, career_id in pairs],
+            })
+            for row in result:
+                stored[str(row.user_id)].append(row.career_id)
+        return stored
+
+    async def replace(
+        self, user_id: str, career_ids: Sequence[int]
+    ) -> List[int]:
+        """Replace the preferred careers of one user."""
+        stored = await self.replace_all({user_id: career_ids})
+        return stored[str(user_id)]
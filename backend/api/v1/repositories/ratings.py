@@ -0,0 +1,191 @@
+#!/usr/bin/python3
+"""Rating writes keeping the course rating aggregates in step."""
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.api.v1.schemas.ratings import RatingState
+
+STARS = range(1, 6)
+COUNTS = ["ratings_count", "ratings_sum"] + [f"stars_{v}" for v in STARS]
+STAR_COLUMNS = ", ".join(COUNTS[2:])
+STAR_DELTAS = ", ".join(
+    f"sum((up.rating = {v})::int - COALESCE((prev.rating = {v})::int, 0))"
+    for v in STARS
+)
+STAR_SUMS = ", ".join(f"sum((rating = {v})::int) AS stars_{v}" for v in STARS)
+INCREMENTS = ", ".join(
+    f"{column} = course_rating_stats.{column} + excluded.{column}"
+    for column in COUNTS
+)
+DECREMENTS = ", ".join(
+    f"{column} = course_rating_stats.{column} - delta.{column}"
+    for column in COUNTS
+)
+
+# One statement per batch of (user, course, rating): lock the ratings
+# being replaced, upsert the new ones on the (user_id, course_id)
+# constraint, and add the differences to each course aggregate. Ratings
+# of unknown or own courses are skipped. A rating inserted concurrently
+# after the statement's snapshot is not overwritten blindly (its old
+# value is unknown here); it is left out of the result and retried.
+RATE_SQL = text(f"""
+WITH input AS (
+    SELECT DISTINCT ON (user_id, course_id) user_id, course_id, rating
+    FROM unnest(
+        CAST(:user_ids AS uuid[]), CAST(:course_ids AS integer[]),
+        CAST(:ratings AS integer[])
+    ) WITH ORDINALITY AS given(user_id, course_id, rating, position)
+    ORDER BY user_id, course_id, position DESC
+), prev AS (
+    SELECT ratings.user_id, ratings.course_id, ratings.rating
+    FROM ratings JOIN input USING (user_id, course_id)
+    FOR UPDATE OF ratings
+), up AS (
+    INSERT INTO ratings (user_id, course_id, rating, has_rated)
+    SELECT input.user_id, input.course_id, input.rating, true
+    FROM input
+    JOIN courses ON courses.id = input.course_id
+    JOIN users ON users.id = input.user_id
+    WHERE courses.owner_id <> input.user_id
+    ORDER BY input.user_id, input.course_id
+    ON CONFLICT ON CONSTRAINT uq_ratings_user_id_course_id
+    DO UPDATE SET rating = excluded.rating
+    WHERE EXISTS (
+        SELECT 1 FROM prev
+        WHERE prev.user_id = excluded.user_id
+        AND prev.course_id = excluded.course_id
+    )
+    RETURNING user_id, course_id, rating, xmax = 0 AS created
+), stats AS (
+    INSERT INTO course_rating_stats
+        (course_id, ratings_count, ratings_sum, {STAR_COLUMNS})
+    SELECT up.course_id, sum(CASE WHEN up.created THEN 1 ELSE 0 END),
+        sum(up.rating - COALESCE(prev.rating, 0)), {STAR_DELTAS}
+    FROM up LEFT JOIN prev USING (user_id, course_id)
+    GROUP BY up.course_id
+    ORDER BY up.course_id
+    ON CONFLICT (course_id) DO UPDATE SET {INCREMENTS}
+    RETURNING course_id, ratings_count, mean
+)
+SELECT up.user_id, up.course_id, up.rating, up.created,
+    stats.ratings_count, stats.mean
+FROM up JOIN stats USING (course_id)
+ORDER BY up.user_id, up.course_id
+""")
+
+UNRATE_SQL = text(f"""
+WITH gone AS (
+    DELETE FROM ratings
+    USING unnest(CAST(:user_ids AS uuid[]), CAST(:course_ids AS integer[]))
+        AS given(user_id, course_id)
+    WHERE ratings.user_id = given.user_id
+    AND ratings.course_id = given.course_id
+    RETURNING ratings.user_id, ratings.course_id, ratings.rating
+), delta AS (
+    SELECT course_id, count(*) AS ratings_count,
+        sum(rating) AS ratings_sum, {STAR_SUMS}
+    FROM gone GROUP BY course_id
+), stats AS (
+    UPDATE course_rating_stats SET {DECREMENTS}
+    FROM delta WHERE course_rating_stats.course_id = delta.course_id
+    RETURNING course_rating_stats.course_id,
+        course_rating_stats.ratings_count, course_rating_stats.mean
+)
+SELECT gone.user_id, gone.course_id, gone.rating,
+    stats.ratings_count, stats.mean
+FROM gone LEFT JOIN stats USING (course_id)
+ORDER BY gone.user_id, gone.course_id
+""")
+
+
+def to_state(row, removed: bool = False) -> RatingState:
+    """Rating state of a course from a returned row."""
+    return RatingState(
+        course_id=row.course_id, rating=None if removed else row.rating,
+        created=False if removed else row.created,
+        ratings_count=row.ratings_count or 0, mean=row.mean
+    )
+
+
+class RatingRepository:
+    """
+    Rating writes, each adjusting the course aggregate as it goes.
+
+    Every write is one statement for any number of users and courses, so
+    ratings and their aggregate changes are applied together; the caller
+    commits.
+
+    Attributes:
+        session (AsyncSession): session the statements run on.
+    """
+
+    def __init__(self, session: AsyncSession):
+        """Initialize the repository."""
+        self.session = session
+
+    async def rate_all(
+        self, ratings: Dict[Tuple[str, int], int]
+    ) -> Tuple[list, List[Tuple[str, int]]]:
+        """
+        Create or replace ratings keyed by (user_id, course_id).
+
+        Returns the rows of the written ratings, and the keys that were
+        not written because the course or user does not exist or the user
+        owns the course.
+        """
+        pending = {
+            (str(user_id), course_id): value
+            for (user_id, course_id), value in ratings.items()
+        }
+        rows = []
+        # a second pass picks up ratings inserted concurrently by the user
+        for _ in range(2):
+            if not pending:
+                break
+            result = await self.session.execute(RATE_SQL, {
+                "user_ids": [user_id for user_id, _ in pending],
+                "course_ids": [course_id for _, course_id in pending],
+                "ratings": list(pending.values()),
+            })
+            for row in result:
+                rows.append(row)
+                del pending[(str(row.user_id), row.course_id)]
+        return rows, sorted(pending)
+
+    async def rate_many(
+        self, user_id: str, ratings: Sequence[Tuple[int, int]]
+    ) -> Tuple[List[RatingState], List[int]]:
+        """
+        Rate many courses as one user, creating or replacing each rating.
+
+        Returns the new state of every rated course, and the ids of the
+        courses that were not rated because they do not exist or belong
+        to the user. The last rating given for a course wins.
+        """
+        rows, rejected = await self.rate_all({
+            (user_id, course_id): value for course_id, value in ratings
+        })
+        states = sorted(map(to_state, rows), key=lambda s: s.course_id)
+        return states, [course_id for _, course_id in rejected]
+
+    async def rate(
+        self, user_id: str, course_id: int, value: int
+    ) -> Optional[RatingState]:
+        """Rate one course; None if it does not exist or is the user's."""
+        states, _ = await self.rate_many(user_id, [(course_id, value)])
+        return states[0] if states else None
+
+    async def remove_all(self, keys: Sequence[Tuple[str, int]]) -> list:
+        """Delete ratings by (user_id, course_id); return the rows deleted."""
+        result = await self.session.execute(UNRATE_SQL, {
+            "user_ids": [user_id for user_id, _ in keys],
+            "course_ids": [course_id for _, course_id in keys],
+        })
+        return result.all()
+
+    async def remove(
+        self, user_id: str, course_id: int
+    ) -> Optional[RatingState]:
+        """Delete a rating and uncount it; None if there was none."""
+        rows = await self.remove_all([(user_id, course_id)])
+        return to_state(rows[0], removed=True) if rows else None
@@ -0,0 +1,34 @@
+#!/usr/bin/python3
+"""User queries returning template-ready schemas."""
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.api.v1.models.user_models import User
+from backend.api.v1.repositories.pagination import PageRequest, paginate
+from backend.api.v1.schemas import user_schemas
+from backend.api.v1.schemas.page_schemas import Page
+
+USER_COLUMNS = (
+    User.id, User.full_name, User.username, User.email, User.created_at,
+)
+# ids are random uuids, so pages follow creation order with the id as a tie
+USER_KEY = (User.created_at, User.id)
+
+
+class UserRepository:
+    """
+    User queries that never read password hashes or unused columns.
+
+    Attributes:
+        session (AsyncSession): session the queries run on.
+    """
+
+    def __init__(self, session: AsyncSession):
+        """Initialize the repository."""
+        self.session = session
+
+    async def page(self, request: PageRequest) -> Page:
+        """One page of users, oldest first."""
+        return await paginate(
+            self.session, select(*USER_COLUMNS), USER_KEY, request,
+            lambda row: user_schemas.User.construct(**row._mapping)
+        )
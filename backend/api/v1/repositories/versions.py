@@ -0,0 +1,54 @@
+#!/usr/bin/python3
+"""Data versions the conditional GETs of catalog pages are checked on."""
+from typing import Optional, Sequence
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+TABLES_SQL = text("""
+SELECT string_agg(name || '=' || version, ',' ORDER BY name)
+FROM catalog_versions
+WHERE name = ANY(:names)
+""")
+# xmin changes with every write of the row, so it is the row's version
+COURSE_RATINGS_SQL = text("""
+SELECT xmin::text FROM course_rating_stats WHERE course_id = :course_id
+""")
+CAREER_RATINGS_SQL = text("""
+SELECT md5(string_agg(stats.xmin::text, ',' ORDER BY stats.course_id))
+FROM course_rating_stats stats
+JOIN courses ON courses.id = stats.course_id
+WHERE courses.career_id = :career_id
+""")
+
+
+class VersionRepository:
+    """
+    Versions of catalog tables and rating aggregates, each one lookup.
+
+    Catalog tables are versioned as a whole by the ``catalog_versions``
+    trigger. Ratings change far more often and are versioned per row, so
+    rating writes do not contend on one counter.
+
+    Attributes:
+        session (AsyncSession): session the queries run on.
+    """
+
+    def __init__(self, session: AsyncSession):
+        """Initialize the repository."""
+        self.session = session
+
+    async def tables(self, names: Sequence[str]) -> Optional[str]:
+        """Versions of the named catalog tables."""
+        return await self.session.scalar(TABLES_SQL, {"names": list(names)})
+
+    async def course_ratings(self, course_id: int) -> Optional[str]:
+        """Version of the rating aggregate of a course, if rated."""
+        return await self.session.scalar(
+            COURSE_RATINGS_SQL, {"course_id": course_id}
+        )
+
+    async def career_ratings(self, career_id: int) -> Optional[str]:
+        """Digest of the rating aggregates of a career's courses."""
+        return await self.session.scalar(
+            CAREER_RATINGS_SQL, {"career_id": career_id}
+        )
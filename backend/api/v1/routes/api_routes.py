@@ -0,0 +1,124 @@
+#!/usr/bin/python3
+"""JSON API routes for careers and courses."""
+from typing import AsyncIterator, List
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.api.db_config import get_read_db
+from backend.api.settings import settings
+from backend.api.v1.repositories.careers import CareerRepository
+from backend.api.v1.repositories.courses import CourseRepository
+from backend.api.v1.repositories.pagination import PageRequest, page_request
+from backend.api.v1.schemas import career_schemas, course_schemas
+from backend.api.v1.schemas.page_schemas import Page
+
+api_router = APIRouter(
+    prefix="/api/v1", tags=["api"], default_response_class=ORJSONResponse
+)
+NDJSON = "application/x-ndjson"
+LIST_RESPONSES = {
+    200: {"content": {NDJSON: {}}, "description": (
+        "One page, or every row as NDJSON with ``Accept: "
+        "application/x-ndjson``"
+    )},
+}
+
+
+def wants_ndjson(request: Request) -> bool:
+    """Whether the client asked for the whole list as NDJSON."""
+    return NDJSON in request.headers.get("accept", "")
+
+
+async def ndjson(chunks: AsyncIterator[List[dict]]) -> AsyncIterator[bytes]:
+    """One JSON line per row, one write per chunk."""
+    async for rows in chunks:
+        yield b"".join(
+            orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE)
+            for row in map(dict, rows)
+        )
+
+
+def page_response(page: Page) -> ORJSONResponse:
+    """Serialize an already built page without validating it again."""
+    return ORJSONResponse(page.dict())
+
+
+@api_router.get(
+    "/careers", response_model=Page[career_schemas.Career],
+    responses=LIST_RESPONSES
+)
+async def list_careers(
+    request: Request, page: PageRequest = Depends(page_request),
+    session: AsyncSession = Depends(get_read_db)
+):
+    """One page of careers, or every career as NDJSON."""
+    repository = CareerRepository(session)
+    if wants_ndjson(request):
+        return StreamingResponse(
+            ndjson(repository.stream(settings.STREAM_CHUNK_SIZE)),
+            media_type=NDJSON
+        )
+    return page_response(await repository.page(page))
+
+
+@api_router.get(
+    "/careers/{career_id}", response_model=career_schemas.CareerWithSkills
+)
+async def get_career(
+    career_id: int, session: AsyncSession = Depends(get_read_db)
+):
+    """One career with its skills."""
+    career = await CareerRepository(session).get_with_skills(career_id)
+    if career:
+        return ORJSONResponse(career.dict())
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Career not found"
+    )
+
+
+@api_router.get(
+    "/careers/{career_id}/top_courses",
+    response_model=List[course_schemas.CourseSummary]
+)
+async def list_top_courses(
+    career_id: int, session: AsyncSession = Depends(get_read_db)
+):
+    """Best rated courses of a career."""
+    courses = await CourseRepository(session).top_rated(career_id)
+    return ORJSONResponse([course.dict() for course in courses])
+
+
+@api_router.get(
+    "/courses", response_model=Page[course_schemas.Course],
+    responses=LIST_RESPONSES
+)
+async def list_courses(
+    request: Request, page: PageRequest = Depends(page_request),
+    session: AsyncSession = Depends(get_read_db)
+):
+    """One page of courses, or every course as NDJSON."""
+    repository = CourseRepository(session)
+    if wants_ndjson(request):
+        return StreamingResponse(
+            ndjson(repository.stream(settings.STREAM_CHUNK_SIZE)),
+            media_type=NDJSON
+        )
+    return page_response(await repository.page(page))
+
+
+@api_router.get(
+    "/courses/{course_id}", response_model=course_schemas.CourseSummary
+)
+async def get_course(
+    course_id: int, session: AsyncSession = Depends(get_read_db)
+):
+    """One course with its career and rating aggregate."""
+    course = await CourseRepository(session).get(course_id)
+    if course:
+        return ORJSONResponse(course.dict())
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Course not found"
+    )
@@ -1,14 +1,74 @@
 #!/usr/bin/python3
 """Career recommendation entry point."""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request, status
+from fastapi.exception_handlers import http_exception_handler
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from backend.api.settings import TEMPLATES, BASE_PATH
-from backend.api.v1.migrates import *
-from .user_routes import user_routers
-from .career_routes import career_router
-from .course_routes import course_router
+from backend.api.db_config import pool_snapshot
+from backend.api.settings import TEMPLATES, BASE_PATH, settings
+from backend.api.v1 import metrics, startup, templating
+from backend.api.v1.assets import BUILD_DIR, AssetFiles, manifest
+from backend.api.v1.auths.oauth import cache_stats
+from backend.api.v1.compression import CompressionMiddleware
+from backend.api.v1.conditional import (
+    STATIC_PAGE, cacheable, etag, not_modified
+)
+from backend.api.v1.utils import passwords
+from backend.api.v1.write_behind import write_behind
+
+with startup.phase("imports"):
+    # every model module registers its mapper before the first query
+    from backend.api.v1.models import (  # noqa: F401
+        careers, courses, enrollments, preferences, ratings, user_models,
+        catalog_versions, write_offsets
+    )
+    from .user_routes import user_routers
+    from .career_routes import career_router, registry
+    from .course_routes import course_router
+    from .rating_routes import rate_router
+    from .catalog_routes import catalog_router
+    from .api_routes import api_router
+    from .metrics_routes import metrics_router
+
+logger = logging.getLogger(__name__)
+metrics.register("startup", startup.report)
+metrics.register("db_pools", pool_snapshot)
+metrics.register("auth_cache", cache_stats)
+metrics.register("passwords", passwords.stats)
+metrics.register("templates", templating.stats)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """Prepare the database and model on startup, release on shutdown."""
+    if settings.DB_CREATE_TABLES_ON_STARTUP:
+        with startup.phase("db"):
+            from backend.api.v1.migrates import upgrade
+            await asyncio.get_running_loop().run_in_executor(None, upgrade)
+    with startup.phase("templates"):
+        templating.warm_up(TEMPLATES)
+    tasks = []
+    if settings.INFERENCE_WARM_UP:
+        tasks.append(asyncio.create_task(registry.warm_up()))
+    if settings.MODEL_RELOAD_INTERVAL > 0:
+        tasks.append(asyncio.create_task(
+            registry.watch(settings.MODEL_RELOAD_INTERVAL)
+        ))
+    if settings.WRITE_BEHIND:
+        write_behind.start()
+        metrics.register("write_behind", write_behind.stats)
+    logger.info("startup report: %s", startup.report())
+    yield
+    for task in tasks:
+        task.cancel()
+    await write_behind.close()
+    passwords.close()
+    await registry.close()
+
 
 app = FastAPI(
     title="Career recommendation system",
@@ -16,12 +76,15 @@ app = FastAPI(
     A technology-enabled tool designed to assist individuals in
     making informed decisions about their career path
     """,
-    version="v1.0"
+    version="v1.0",
+    lifespan=lifespan
 )
 
 app.mount(str(BASE_PATH / "/static"), StaticFiles(
     directory=str(BASE_PATH / "static")
 ), name="static")
+# fingerprinted copies of static, see backend.api.v1.assets
+app.mount("/assets", AssetFiles(BUILD_DIR, manifest), name="assets")
 
 app.add_middleware(
     CORSMiddleware,
@@ -31,6 +94,11 @@ app.add_middleware(
     allow_headers=["*"],
     expose_headers=["set-cookie"],
 )
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    compresslevel=settings.COMPRESSION_LEVEL,
+)
 
 
 @app.exception_handler(status.HTTP_404_NOT_FOUND)
@@ -39,6 +107,8 @@ async def http_404_exception_handler(
     exc: HTTPException
 ):
     """Generic 404 error handler."""
+    if request.url.path.startswith(api_router.prefix):
+        return await http_exception_handler(request, exc)
     if exc.status_code == status.HTTP_404_NOT_FOUND:
         return TEMPLATES.TemplateResponse(
             "404.html", {"request": request}
@@ -52,6 +122,8 @@ async def http_403_exception_handler(
     exc: HTTPException
 ):
     """Generic 403 error handler."""
+    if request.url.path.startswith(api_router.prefix):
+        return await http_exception_handler(request, exc)
     if exc.status_code == status.HTTP_403_FORBIDDEN:
         return TEMPLATES.TemplateResponse(
             "users/signin.html", {"request": request}
@@ -62,11 +134,25 @@ async def http_403_exception_handler(
 @app.get("/", response_class=HTMLResponse)
 async def main(request: Request):
     """Career recommendation entry point."""
-    return TEMPLATES.TemplateResponse(
+    tag = etag()
+    unchanged = not_modified(request, tag, STATIC_PAGE)
+    if unchanged:
+        return unchanged
+    return cacheable(TEMPLATES.TemplateResponse(
         "index.html",
-        {"request": request},
-    )
+        {"request": request}
+    ), tag, STATIC_PAGE)
+
+
+@app.get("/health")
+async def health():
+    """Report liveness and the model weights being served."""
+    return {"status": "ok", "model": registry.info()}
 
 app.include_router(user_routers)
 app.include_router(career_router)
 app.include_router(course_router)
+app.include_router(rate_router)
+app.include_router(catalog_router)
+app.include_router(api_router)
+app.include_router(metrics_router)
@@ -1,25 +1,42 @@
 #!/usr/bin/python3
 """Career routes module."""
-import numpy as np
-from fastapi import APIRouter, Depends, status, HTTPException, Request
-from fastapi.responses import HTMLResponse
-from sqlalchemy.orm import Session
-from tensorflow.keras.models import load_model
-from sklearn.preprocessing import QuantileTransformer, StandardScaler
-from backend.api.db_config import get_db
-from backend.api.settings import TEMPLATES
+import asyncio
+import logging
+from functools import partial
+from typing import List
+from fastapi import (
+    APIRouter, Depends, status, HTTPException,
+    Request, File, Query, UploadFile
+)
+from fastapi.responses import HTMLResponse, StreamingResponse
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.api.db_config import get_db, get_read_db
+from backend.api.settings import TEMPLATES, settings
+from backend.api.v1 import metrics
+from backend.api.v1.conditional import (
+    PRIVATE_PAGE, PUBLIC_PAGE, STATIC_PAGE, cacheable, etag, not_modified
+)
 from backend.api.v1.models.careers import Career
+from backend.api.v1.repositories.careers import CareerRepository
+from backend.api.v1.repositories.courses import CourseRepository
+from backend.api.v1.repositories.pagination import PageRequest, page_request
+from backend.api.v1.repositories.versions import VersionRepository
+from backend.api.v1.recommender.batching import MicroBatcher
+from backend.api.v1.recommender.cache import (
+    RecommendationCache, shared_backend
+)
+from backend.api.v1.recommender.registry import ModelRegistry
+from backend.api.v1.recommender.scoring import (
+    SCORE_COLUMNS, read_csv_rows, score_rows
+)
 from backend.api.v1.schemas.career_schemas import (
-    CareerCreate, CareerUpdate
+    CareerCreate, CareerUpdate, StudentScores
 )
-from backend.api.v1.auths.oauth import get_current_user
+from backend.api.v1.auths.oauth import get_current_claims, get_current_user
 
 career_router = APIRouter(prefix="/careers", tags=["careers"])
-qt = QuantileTransformer(output_distribution='normal')
-# Loading Model
-model = load_model("backend/api/v1/models/model_career_RS.h5")
-ss = StandardScaler()
-
+logger = logging.getLogger(__name__)
 class_names = [
     'BUSINESS','SPORTS AND PHYSICAL TRAIN',
     'ENGINEERING', 'AGRONOMIC, LIVESTOCK ENGINEERING',
@@ -31,19 +48,60 @@ class_names = [
     'PLASTIC ARTS, VISUAL ARTS', 'PHISICS'
 ]
 
+# models are loaded on first use or by the warm-up in app's lifespan
+make_batcher = partial(
+    MicroBatcher,
+    max_batch_size=settings.INFERENCE_MAX_BATCH_SIZE,
+    max_wait_ms=settings.INFERENCE_MAX_WAIT_MS,
+    max_queue_size=settings.INFERENCE_MAX_QUEUE_SIZE,
+)
+inference_options = {
+    "make_batcher": make_batcher,
+    "executor": settings.INFERENCE_EXECUTOR,
+    "workers": settings.INFERENCE_WORKERS,
+}
+if settings.MODEL_REGISTRY_PATH:
+    registry = ModelRegistry.from_file(
+        settings.MODEL_REGISTRY_PATH, **inference_options
+    )
+else:
+    registry = ModelRegistry.single(
+        settings.INFERENCE_ENGINE, settings.INFERENCE_MODEL_PATH,
+        class_names, transform=settings.FEATURE_TRANSFORM_PATH,
+        **inference_options
+    )
+metrics.register("models", registry.stats)
+recommendation_cache = RecommendationCache(
+    settings.RECOMMENDATION_CACHE_SIZE,
+    settings.RECOMMENDATION_CACHE_TTL,
+    shared_backend(settings.RECOMMENDATION_CACHE_URL),
+)
+metrics.register("recommendation_cache", recommendation_cache.stats)
+registry.on_swap(lambda swapped: recommendation_cache.retain(
+    version.loader.info.get("version") for version in swapped.served
+))
+
 
 @career_router.get("/", response_class=HTMLResponse)
 async def retrieve_careers(
     request: Request,
     # current_user: str = Depends(get_current_user),
-    session: Session = Depends(get_db)
+    page: PageRequest = Depends(page_request),
+    session: AsyncSession = Depends(get_read_db)
 ):
-    """Retrieve all the available careers."""
-    careers = session.query(Career).all()
-    return TEMPLATES.TemplateResponse(
+    """Retrieve one page of the available careers."""
+    tag = etag(await VersionRepository(session).tables(["careers"]))
+    unchanged = not_modified(request, tag, PUBLIC_PAGE)
+    if unchanged:
+        return unchanged
+    careers = await CareerRepository(session).page(page)
+    return cacheable(TEMPLATES.TemplateResponse(
         "careers/careers.html",
-        {"request": request, "careers": careers}
-    )
+        {
+            "request": request, "careers": careers.items, "page": careers,
+            "tag": tag
+        }
+    ), tag, PUBLIC_PAGE)
 
 
 @career_router.get(
@@ -52,16 +110,26 @@ async def retrieve_careers(
 )
 async def list_career_with_skills(
     request: Request,
-    current_user: str = Depends(get_current_user),
-    session: Session = Depends(get_db)
+    current_user: str = Depends(get_current_claims),
+    page: PageRequest = Depends(page_request),
+    session: AsyncSession = Depends(get_read_db)
 ):
-    """List all careers with skills."""
+    """List one page of careers with skills."""
     if current_user:
-        careers = session.query(Career).all()
-        return TEMPLATES.TemplateResponse(
+        tag = etag(await VersionRepository(session).tables(
+            ["careers", "skills"]
+        ))
+        unchanged = not_modified(request, tag, PRIVATE_PAGE)
+        if unchanged:
+            return unchanged
+        careers = await CareerRepository(session).page_with_skills(page)
+        return cacheable(TEMPLATES.TemplateResponse(
             "careers/career_with_skill.html",
-            {"request": request, "careers": careers}
-        )
+            {
+                "request": request, "careers": careers.items,
+                "page": careers, "tag": tag
+            }
+        ), tag, PRIVATE_PAGE)
 
 
 @career_router.get(
@@ -70,61 +138,78 @@ async def list_career_with_skills(
 )
 async def retrieve_one_career_with_skill(
     request: Request,
-    career_id: int, current_user: str = Depends(get_current_user),
-    session: Session = Depends(get_db)
+    career_id: int, current_user: str = Depends(get_current_claims),
+    session: AsyncSession = Depends(get_read_db)
 ):
     """Retrieve a career for a given id."""
     if current_user:
-        career = session.query(Career).filter(
-            Career.id == career_id
-        ).one_or_none()
+        tag = etag(await VersionRepository(session).tables(
+            ["careers", "skills"]
+        ))
+        unchanged = not_modified(request, tag, PRIVATE_PAGE)
+        if unchanged:
+            return unchanged
+        career = await CareerRepository(session).get_with_skills(career_id)
         if not career:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Career does not exist"
             )
-        return TEMPLATES.TemplateResponse(
+        return cacheable(TEMPLATES.TemplateResponse(
             "careers/career_with_skill_detail.html",
-            {"request": request, "careers": career}
-        )
+            {"request": request, "career": career}
+        ), tag, PRIVATE_PAGE)
 
 
 @career_router.get("/{career_id}", response_class=HTMLResponse)
 async def retrieve_one_career(
     request: Request,
-    career_id: int, current_user: str = Depends(get_current_user),
-    session: Session = Depends(get_db)
+    career_id: int, current_user: str = Depends(get_current_claims),
+    session: AsyncSession = Depends(get_read_db)
 ):
     """Retrieve a career for a given id."""
     if current_user:
-        career = session.query(Career).filter(
-            Career.id == career_id
-        ).one_or_none()
+        versions = VersionRepository(session)
+        tag = etag(
+            await versions.tables(["careers", "courses"]),
+            await versions.career_ratings(career_id)
+        )
+        unchanged = not_modified(request, tag, PRIVATE_PAGE)
+        if unchanged:
+            return unchanged
+        career = await CareerRepository(session).get(career_id)
         if not career:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Career does not exist"
             )
-        return TEMPLATES.TemplateResponse(
+        top_courses = await CourseRepository(session).top_rated(career_id)
+        return cacheable(TEMPLATES.TemplateResponse(
             "careers/career_detail.html",
-            {"request": request, "careers": career}
-        )
+            {"request": request, "career": career,
+             "top_courses": top_courses}
+        ), tag, PRIVATE_PAGE)
 
 
 @career_router.put("/{career_id}/update", response_class=HTMLResponse)
 async def update_career(
     career_id: int, career: CareerUpdate,
-    current_user: str = Depends(get_current_user),
-    session: Session = Depends(get_db)
+    current_user: str = Depends(get_current_claims),
+    session: AsyncSession = Depends(get_db)
 ):
     """Update a career."""
     if current_user:
-        get_career = session.query(Career).filter(Career.id == career_id)
-        if get_career.one_or_none().user_id == current_user.id:
-            get_career.update(**career.dict())
-            session.commit()
-            return get_career.one_or_none()
-        elif get_career.one_or_none().user_id != current_user.id:
+        get_career = await session.get(Career, career_id)
+        if get_career.user_id == current_user.id:
+            await session.execute(
+                update(Career).filter(Career.id == career_id).values(
+                    **career.dict()
+                ).execution_options(synchronize_session=False)
+            )
+            await session.commit()
+            await session.refresh(get_career)
+            return get_career
+        elif get_career.user_id != current_user.id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Access denied"
@@ -138,15 +223,15 @@ async def update_career(
 @career_router.get("/show/update/{career_id}", response_class=HTMLResponse)
 async def show_update_career_form(
     request: Request, career_id: int,
-    session: Session = Depends(get_db),
-    current_user: str = Depends(get_current_user)
+    session: AsyncSession = Depends(get_read_db),
+    current_user: str = Depends(get_current_claims)
 ):
     """Show a form to update career."""
     if current_user.username == "tester":
-        career = session.query(Career).filter(Career.id == career_id).first()
+        career = await CareerRepository(session).get(career_id)
         return TEMPLATES.TemplateResponse(
             "careers/career_update.html",
-            {"request": request, "course": career}
+            {"request": request, "career": career}
         )
     raise HTTPException(
         status_code=status.HTTP_403_FORBIDDEN,
@@ -157,17 +242,19 @@ async def show_update_career_form(
 @career_router.delete("/{career_id}/delete", response_class=HTMLResponse)
 async def delete_career(
     career_id: int,
-    current_user: str = Depends(get_current_user),
-    session: Session = Depends(get_db)
+    current_user: str = Depends(get_current_claims),
+    session: AsyncSession = Depends(get_db)
 ):
     """Delete a career."""
     if current_user:
-        career = session.query(Career).filter(Career.id == career_id)
-        if career.first().user_id == current_user.id:
-            career.delete()
-            session.commit()
+        career = await session.get(Career, career_id)
+        if career.user_id == current_user.id:
+            await session.execute(
+                delete(Career).filter(Career.id == career_id)
+            )
+            await session.commit()
             return
-        elif career.first().user_id != current_user.id:
+        elif career.user_id != current_user.id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Access denied"
@@ -181,15 +268,15 @@ async def delete_career(
 @career_router.get("/show/delete/{career_id}", response_class=HTMLResponse)
 async def show_delete_career_form(
     request: Request, career_id: int,
-    session: Session = Depends(get_db),
-    current_user: str = Depends(get_current_user)
+    session: AsyncSession = Depends(get_read_db),
+    current_user: str = Depends(get_current_claims)
 ):
     """Show a form to delete career."""
     if current_user.username == "tester":
-        career = session.query(Career).filter(Career.id == career_id).first()
+        career = await CareerRepository(session).get(career_id)
         return TEMPLATES.TemplateResponse(
             "careers/delete_career.html",
-            {"request": request, "course": career}
+            {"request": request, "career": career}
         )
     raise HTTPException(
         status_code=status.HTTP_403_FORBIDDEN,
@@ -201,16 +288,16 @@ async def show_delete_career_form(
 async def create_career(
     career: CareerCreate,
     current_user: str = Depends(get_current_user),
-    session: Session = Depends(get_db)
+    session: AsyncSession = Depends(get_db)
 ):
     """Create a new career."""
     if current_user:
         career.user_id = current_user.id
         new_career = Career(**career.dict())
         session.add(new_career)
-        session.commit()
+        await session.commit()
         if new_career:
-            session.refresh(new_career)
+            await session.refresh(new_career)
             return new_career
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
@@ -231,7 +318,11 @@ async def show_create_career_form(request: Request):
     "/recommendation",
     response_class=HTMLResponse
 )
-async def create_recommendation(request: Request):
+async def create_recommendation(
+    request: Request,
+    k: int = Query(1, ge=1, le=len(class_names)),
+    distribution: bool = False
+):
     """Create a new career recommendation."""
     # get Scores input
     form = await request.form()
@@ -262,56 +353,134 @@ async def create_recommendation(request: Request):
     ]
     # xx = qt.fit_transform(xx)
     # xx= xx.reshape(-1,1)
-    print('------this is array data to predict-------')
-    print('X = '+str(X))
-    print('------------------------------------------')
-
-    # pred = model.predict([x])[0]
-
-    probs = model.predict([X])
-    pred_class = np.argmax(probs)
-
-    pred_class_name = class_names[pred_class]
-    proba1 = int(probs[0][pred_class]*100)
-
-    result = [pred_class_name, proba1]  # ,proba2,proba3,proba4,proba5]
-    res = f'''
-    Top Career based on the Career_Recommendation System is {pred_class_name}
-    with probability of {int(probs[0][pred_class]*100)}%
-    '''
-    print(res)
+    logger.debug("predicting career for X = %s", X)
+
+    served, shadow = registry.route(X)
+    if not served.loader.loaded:
+        await served.loader.warm_up()
+    cache_key = recommendation_cache.key(served.version, X)
+    probs = await recommendation_cache.get(cache_key)
+    if probs is None:
+        try:
+            probs = await served.batcher.predict(X)
+        except asyncio.QueueFull as exc:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Recommendation queue is full, try again later"
+            ) from exc
+        await recommendation_cache.set(cache_key, probs)
+    ranked = served.class_index.rank(probs, k, distribution)[0]
+    best = ranked["top"][0]
+    if shadow is not None:
+        registry.shadow_score(shadow, X, best["career"])
+    result = [best["career"], int(best["probability"]*100)]
+    logger.debug(
+        "top career is %s with probability of %d%%", result[0], result[1]
+    )
     return TEMPLATES.TemplateResponse(
         "careers/Career_RS.html",
         {
             "request": request,
             "original_input": output_dict,
-            "result": result
+            "result": result,
+            "top": ranked["top"],
+            "distribution": ranked.get("distribution")
         }
     )
 
 
+@career_router.post("/recommendation/batch")
+async def create_batch_recommendation(
+    students: List[StudentScores],
+    k: int = Query(3, ge=1, le=len(class_names)),
+    distribution: bool = False
+):
+    """
+    Stream the top k careers of every student as NDJSON.
+
+    The JSON array is parsed and validated whole before the first line is
+    streamed, so its size bounds memory; large files go through the CSV
+    endpoint, which is parsed a chunk at a time.
+    """
+    champion = registry.get(registry.champion)
+    rows = (
+        (
+            number, student.id,
+            [getattr(student, name) for name in SCORE_COLUMNS], None
+        )
+        for number, student in enumerate(students, start=1)
+    )
+    if not champion.loader.loaded:
+        await champion.loader.warm_up()
+    return StreamingResponse(
+        score_rows(
+            rows, champion.batcher.predict_many, champion.class_index, k,
+            settings.RECOMMENDATION_CHUNK_SIZE, distribution
+        ),
+        media_type="application/x-ndjson"
+    )
+
+
+@career_router.post("/recommendation/batch/csv")
+async def create_csv_recommendation(
+    file: UploadFile = File(...),
+    k: int = Query(3, ge=1, le=len(class_names)),
+    distribution: bool = False
+):
+    """Stream the top k careers of every student of a CSV upload."""
+    champion = registry.get(registry.champion)
+    try:
+        rows = read_csv_rows(file.file)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(exc)
+        ) from exc
+    if not champion.loader.loaded:
+        await champion.loader.warm_up()
+    return StreamingResponse(
+        score_rows(
+            rows, champion.batcher.predict_many, champion.class_index, k,
+            settings.RECOMMENDATION_CHUNK_SIZE, distribution
+        ),
+        media_type="application/x-ndjson"
+    )
+
+
 @career_router.get("/show/recommendation", response_class=HTMLResponse)
 async def show_recommendation(request: Request):
     """Show recommendation form."""
-    return TEMPLATES.TemplateResponse(
+    tag = etag()
+    unchanged = not_modified(request, tag, STATIC_PAGE)
+    if unchanged:
+        return unchanged
+    return cacheable(TEMPLATES.TemplateResponse(
         "careers/Career_RS.html",
         {"request": request}
-    )
+    ), tag, STATIC_PAGE)
 
 
 @career_router.get("/show/report1", response_class=HTMLResponse)
 async def show_report1(request: Request):
     """Return major reports."""
-    return TEMPLATES.TemplateResponse(
+    tag = etag()
+    unchanged = not_modified(request, tag, STATIC_PAGE)
+    if unchanged:
+        return unchanged
+    return cacheable(TEMPLATES.TemplateResponse(
         "careers/report1_major.html",
         {"request": request}
-    )
+    ), tag, STATIC_PAGE)
 
 
 @career_router.get("/show/report2", response_class=HTMLResponse)
 async def show_report2(request: Request):
     """Return minor reports."""
-    return TEMPLATES.TemplateResponse(
+    tag = etag()
+    unchanged = not_modified(request, tag, STATIC_PAGE)
+    if unchanged:
+        return unchanged
+    return cacheable(TEMPLATES.TemplateResponse(
         "careers/report2_minor.html",
         {"request": request}
-    )
+    ), tag, STATIC_PAGE)
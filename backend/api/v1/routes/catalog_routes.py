@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+"""Catalog import and export routes."""
+from typing import Optional
+from fastapi import (
+    APIRouter, Depends, File, HTTPException, Path, Query, UploadFile, status
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.api.db_config import get_db, get_read_db
+from backend.api.v1.auths.oauth import get_current_claims
+from backend.api.v1.catalog import (
+    MEDIA_TYPES, decode_lines, export_rows, file_format, import_rows,
+    read_rows
+)
+
+catalog_router = APIRouter(prefix="/catalog", tags=["catalog"])
+KIND = Path(..., regex="^(careers|skills|courses)$")
+FORMAT = Query(None, regex="^(csv|jsonl)$")
+
+
+@catalog_router.post("/{kind}/import")
+async def import_catalog(
+    kind: str = KIND, file: UploadFile = File(...),
+    format: Optional[str] = FORMAT, owner: Optional[str] = None,
+    session: AsyncSession = Depends(get_db),
+    current_user: str = Depends(get_current_claims)
+):
+    """Insert or update careers, skills or courses from a CSV/JSONL file."""
+    if current_user.username == "tester":
+        rows = read_rows(
+            decode_lines(file.file), file_format(file.filename, format)
+        )
+        return await import_rows(
+            session, kind, rows, owner or current_user.username
+        )
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Access denied"
+    )
+
+
+@catalog_router.get("/{kind}/export")
+async def export_catalog(
+    kind: str = KIND, format: Optional[str] = FORMAT,
+    session: AsyncSession = Depends(get_read_db),
+    current_user: str = Depends(get_current_claims)
+):
+    """Stream every career, skill or course as CSV or JSON lines."""
+    if current_user.username == "tester":
+        fmt = format or "csv"
+        return StreamingResponse(
+            export_rows(session, kind, fmt), media_type=MEDIA_TYPES[fmt],
+            headers={
+                "Content-Disposition": f'attachment; filename="{kind}.{fmt}"'
+            }
+        )
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Access denied"
+    )
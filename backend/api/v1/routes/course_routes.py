@@ -5,61 +5,116 @@ from fastapi import (
     HTTPException, Response, Request
 )
 from fastapi.responses import RedirectResponse, HTMLResponse
-from sqlalchemy.orm import Session
-from backend.api.db_config import get_db
-from backend.api.settings import TEMPLATES
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.api.db_config import get_db, get_read_db
+from backend.api.settings import settings, TEMPLATES
+from backend.api.v1.conditional import (
+    PUBLIC_PAGE, cacheable, etag, not_modified
+)
 from backend.api.v1.models.courses import Course
 from backend.api.v1.schemas.course_schemas import CourseUpdate
-from backend.api.v1.auths.oauth import get_current_user
-from backend.api.v1.models.careers import Career
+from backend.api.v1.auths.oauth import get_current_claims, get_current_user
+from backend.api.v1.repositories.careers import CareerRepository
+from backend.api.v1.repositories.courses import CourseRepository
+from backend.api.v1.repositories.enrollments import EnrollmentRepository
+from backend.api.v1.repositories.pagination import PageRequest, page_request
+from backend.api.v1.repositories.versions import VersionRepository
+from backend.api.v1.write_behind import ENROLL, accepted, write_behind
 
 course_router = APIRouter(prefix="/courses", tags=["courses"])
 
 
 @course_router.get("/", response_class=HTMLResponse)
 async def retrieve_courses(
-    request: Request,
-    session: Session = Depends(get_db)
+    request: Request, page: PageRequest = Depends(page_request),
+    session: AsyncSession = Depends(get_read_db)
 ):
-    """Retrieve all courses."""
-    courses = session.query(Course).all()
-    return TEMPLATES.TemplateResponse(
+    """Retrieve one page of courses."""
+    tag = etag(await VersionRepository(session).tables(["courses"]))
+    unchanged = not_modified(request, tag, PUBLIC_PAGE)
+    if unchanged:
+        return unchanged
+    courses = await CourseRepository(session).page(page)
+    return cacheable(TEMPLATES.TemplateResponse(
         "courses/courses.html",
-        {"request": request, "courses": courses}
-    )
+        {
+            "request": request, "courses": courses.items, "page": courses,
+            "tag": tag
+        }
+    ), tag, PUBLIC_PAGE)
 
 
 @course_router.get("/{course_id}", response_class=HTMLResponse)
 async def retrieve_one_course(
     course_id: int, request: Request,
-    session: Session = Depends(get_db)
+    session: AsyncSession = Depends(get_read_db)
 ):
     """Retrieve one course."""
-    course = session.query(Course).filter(Course.id == course_id).first()
+    versions = VersionRepository(session)
+    tag = etag(
+        await versions.tables(["careers", "courses"]),
+        await versions.course_ratings(course_id)
+    )
+    unchanged = not_modified(request, tag, PUBLIC_PAGE)
+    if unchanged:
+        return unchanged
+    course = await CourseRepository(session).get(course_id)
     if course:
-        return TEMPLATES.TemplateResponse(
+        return cacheable(TEMPLATES.TemplateResponse(
             "courses/course_detail.html",
             {"request": request, "course": course}
-        )
+        ), tag, PUBLIC_PAGE)
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
         detail="Course not found"
     )
 
 
+@course_router.post("/{course_id}/enrollments")
+async def enroll_in_course(
+    course_id: int, response: Response,
+    session: AsyncSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    """Enroll the current user in a course."""
+    if settings.WRITE_BEHIND:
+        return accepted([await write_behind.submit(
+            ENROLL, current_user.id, {"course_id": course_id}
+        )])
+    enrolled = await EnrollmentRepository(session).enroll(
+        current_user.id, course_id
+    )
+    await session.commit()
+    if not enrolled and not await session.get(Course, course_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Course not found"
+        )
+    response.status_code = (
+        status.HTTP_201_CREATED if enrolled else status.HTTP_200_OK
+    )
+    return {"course_id": course_id, "enrolled": True}
+
+
 @course_router.put("/{course_id}/update", response_class=HTMLResponse)
 async def update_course(
     course_id: int, course: CourseUpdate,
-    session: Session = Depends(get_db),
-    current_user: str = Depends(get_current_user)
+    session: AsyncSession = Depends(get_db),
+    current_user: str = Depends(get_current_claims)
 ):
     """Update a Course."""
     if current_user.username == "tester":
-        get_course = session.query(Course).filter(Course.id == course_id)
-        if get_course.first():
-            get_course.update(course.dict(), synchronize_session=False)
-            session.commit()
-            return get_course.first()
+        get_course = await session.get(Course, course_id)
+        if get_course:
+            await session.execute(
+                update(Course).filter(Course.id == course_id).values(
+                    **course.dict()
+                ).execution_options(synchronize_session=False)
+            )
+            await session.commit()
+            await session.refresh(get_course)
+            return get_course
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
@@ -73,12 +128,12 @@ async def update_course(
 @course_router.get("/show/update/{course_id}", response_class=HTMLResponse)
 async def show_update_course_form(
     request: Request, course_id: int,
-    session: Session = Depends(get_db),
-    current_user: str = Depends(get_current_user)
+    session: AsyncSession = Depends(get_read_db),
+    current_user: str = Depends(get_current_claims)
 ):
     """Show a form to create new course."""
     if current_user.username == "tester":
-        course = session.query(Course).filter(Course.id == course_id).first()
+        course = await CourseRepository(session).get(course_id)
         return TEMPLATES.TemplateResponse(
             "courses/course_update.html",
             {"request": request, "course": course}
@@ -92,15 +147,17 @@ async def show_update_course_form(
 @course_router.delete("/{course_id}/delete", response_class=HTMLResponse)
 async def delete_course(
     course_id: int,
-    session: Session = Depends(get_db),
-    current_user: str = Depends(get_current_user)
+    session: AsyncSession = Depends(get_db),
+    current_user: str = Depends(get_current_claims)
 ):
     """Update a Course."""
     if current_user.username == "tester":
-        get_course = Session.query(Course).filter(Course.id == course_id)
-        if get_course.first():
-            get_course.delete()
-            session.commit()
+        get_course = await session.get(Course, course_id)
+        if get_course:
+            await session.execute(
+                delete(Course).filter(Course.id == course_id)
+            )
+            await session.commit()
             return
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -115,12 +172,12 @@ async def delete_course(
 @course_router.get("/show/delete/{course_id}", response_class=HTMLResponse)
 async def show_delete_course_form(
     request: Request, course_id: int,
-    session: Session = Depends(get_db),
-    current_user: str = Depends(get_current_user)
+    session: AsyncSession = Depends(get_read_db),
+    current_user: str = Depends(get_current_claims)
 ):
     """Show a form to delete course."""
     if current_user.username == "tester":
-        course = session.query(Course).filter(Course.id == course_id).first()
+        course = await CourseRepository(session).get(course_id)
         return TEMPLATES.TemplateResponse(
             "courses/course_delete.html",
             {"request": request, "course": course}
@@ -134,7 +191,7 @@ async def show_delete_course_form(
 @course_router.post("/create", response_class=HTMLResponse)
 async def create_course(
     request: Request, response: Response,
-    session: Session = Depends(get_db),
+    session: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user)
 ):
     """Update a Course."""
@@ -142,14 +199,14 @@ async def create_course(
         form = await request.form()
         course = {
             "owner_id": current_user.id,
-            "career_id": form.get("career_id"),
+            "career_id": int(form.get("career_id")),
             "title": form.get("title"),
             "description": form.get("description")
         }
         new_course = Course(**course)
         session.add(new_course)
-        session.commit()
-        session.refresh(new_course)
+        await session.commit()
+        await session.refresh(new_course)
         if new_course:
             response.status_code = status.HTTP_201_CREATED
             return RedirectResponse(
@@ -168,12 +225,12 @@ async def create_course(
 
 @course_router.get("/show/create", response_class=HTMLResponse)
 async def show_create_course_form(
-    request: Request,
-    session: Session = Depends(get_db)
+    request: Request, page: PageRequest = Depends(page_request),
+    session: AsyncSession = Depends(get_read_db)
 ):
     """Show a form to create new course."""
-    careers = session.query(Career).all()
+    careers = await CareerRepository(session).titles(page)
     return TEMPLATES.TemplateResponse(
         "courses/create_course.html",
-        {"request": request, "careers": careers}
+        {"request": request, "careers": careers.items, "page": careers}
     )
@@ -0,0 +1,12 @@
+#!/usr/bin/python3
+"""Metrics routes module."""
+from fastapi import APIRouter
+from backend.api.v1 import metrics
+
+metrics_router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@metrics_router.get("/")
+async def retrieve_metrics():
+    """Return every registered runtime metric."""
+    return metrics.snapshot()
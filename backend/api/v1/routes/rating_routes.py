@@ -1,62 +1,92 @@
 #!/usr/bin/python3
 """Likes routers"""
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from backend.api.db_config import get_db
-from backend.api.v1.models.ratings import Rating
+from backend.api.settings import settings
 from backend.api.v1.models.courses import Course
 from backend.api.v1.auths.oauth import get_current_user
-from backend.api.v1.schemas.ratings import RateSchema
+from backend.api.v1.repositories.ratings import RatingRepository
+from backend.api.v1.schemas.ratings import (
+    BulkRateResult, BulkRateSchema, RateSchema, RatingState
+)
+from backend.api.v1.write_behind import (
+    RATE, UNRATE, accepted, write_behind
+)
 
 rate_router = APIRouter(prefix="/rates", tags=["rates"])
 
 
-@rate_router.post("/", status_code=status.HTTP_201_CREATED)
-def rate_course_router(
-    rate: RateSchema, session: Session = Depends(get_db),
+@rate_router.post(
+    "/", status_code=status.HTTP_201_CREATED, response_model=RatingState
+)
+async def rate_course_router(
+    rate: RateSchema, response: Response,
+    session: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user)
 ):
-    """Rate course router."""
-    course = session.query(Course).filter(
-        Course.id == rate.course_id
-    ).first()
-
-    if not course:
+    """Rate a course, or change the user's rating of it."""
+    if settings.WRITE_BEHIND:
+        return accepted([await write_behind.submit(
+            RATE, current_user.id,
+            {"course_id": rate.course_id, "rating": rate.value}
+        )])
+    state = await RatingRepository(session).rate(
+        current_user.id, rate.course_id, rate.value
+    )
+    if state is None:
+        await session.rollback()
+        course = await session.get(Course, rate.course_id)
+        if not course:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Course not found"
+            )
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Course not found"
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not allowed to rate this course"
         )
+    await session.commit()
+    if not state.created:
+        response.status_code = status.HTTP_200_OK
+    return state
+
 
-    user = current_user
-    check_like = session.query(Rating).filter(
-        Rating.course_id == rate.course_id,
-        Rating.user_id == user.id
+@rate_router.post("/bulk", response_model=BulkRateResult)
+async def rate_courses_router(
+    rates: BulkRateSchema, session: AsyncSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    """Rate many courses in one statement."""
+    if settings.WRITE_BEHIND:
+        return accepted(await write_behind.submit_many([
+            (RATE, current_user.id,
+             {"course_id": rate.course_id, "rating": rate.value})
+            for rate in rates.ratings
+        ]))
+    rated, rejected = await RatingRepository(session).rate_many(
+        current_user.id,
+        [(rate.course_id, rate.value) for rate in rates.ratings]
     )
-    liked = check_like.first()
+    await session.commit()
+    return BulkRateResult(rated=rated, rejected=rejected)
 
-    if user.id == course.owner_id:
+
+@rate_router.delete("/{course_id}", response_model=RatingState)
+async def unrate_course_router(
+    course_id: int, session: AsyncSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    """Remove the user's rating of a course."""
+    if settings.WRITE_BEHIND:
+        return accepted([await write_behind.submit(
+            UNRATE, current_user.id, {"course_id": course_id}
+        )])
+    state = await RatingRepository(session).remove(current_user.id, course_id)
+    if state is None:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not allowed to rate this course"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Rating doesn't exist"
         )
-    elif int(rate.value) >= 1 or int(rate.value) <= 5:
-        if liked:
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="Course already rated"
-            )
-        to_like = Rating(course_id=rate.course_id, user_id=user.id)
-        session.add(to_like)
-        session.commit()
-        rate.has_rated = True
-        return {"has_rated": True}
-    else:
-        if not liked:
-            raise HTTPException(
-                status_code=status.HTTP_304_NOT_MODIFIED,
-                detail="Rate doesn't exist"
-            )
-        check_like.delete(synchronize_session=False)
-        session.commit()
-        rate.has_rated = False
-        return {"has_liked": False}
+    await session.commit()
+    return state
@@ -1,5 +1,7 @@
 #!/usr/bin/python3
 """User routes modules."""
+import asyncio
+import logging
 from datetime import datetime
 from fastapi import (
     APIRouter, Depends, status,
@@ -8,39 +10,74 @@ from fastapi import (
 from fastapi.responses import RedirectResponse, HTMLResponse
 from fastapi.encoders import jsonable_encoder
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import delete, select, update
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
-from backend.api.db_config import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.api.db_config import get_db, get_read_db
 from backend.api.settings import settings, TEMPLATES
+from backend.api.v1.models.enrollments import Enrollment
+from backend.api.v1.models.preferences import Preference
+from backend.api.v1.models.ratings import Rating
 from backend.api.v1.models.user_models import User
-from backend.api.v1.schemas.user_schemas import UserUpdate
-from backend.api.v1.auths.oauth import (
-    get_current_user, create_token
+from backend.api.v1.repositories.pagination import PageRequest, page_request
+from backend.api.v1.repositories.preferences import PreferenceRepository
+from backend.api.v1.repositories.ratings import RatingRepository
+from backend.api.v1.repositories.users import UserRepository
+from backend.api.v1.schemas.user_schemas import (
+    PreferencesUpdate, UserUpdate
 )
-from backend.api.v1.utils import (
-    verify_pwd, hash_pwd
+from backend.api.v1.auths.oauth import (
+    get_current_user, create_token, forget_user
 )
+from backend.api.v1.utils import passwords
+from backend.api.v1.write_behind import PREFER, accepted, write_behind
 
 user_routers = APIRouter(prefix="/users", tags=["users"])
+logger = logging.getLogger(__name__)
+
+
+def passwords_busy() -> HTTPException:
+    """Error of a password pool with no room left."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-ins at once, try again shortly",
+        headers={"Retry-After": "1"}
+    )
+
+
+async def check_password(user: User, password: str) -> bool:
+    """Verify a user's password, storing a rehash at the current cost."""
+    try:
+        valid, new_hash = await passwords.verify(password, user.password)
+    except asyncio.QueueFull as exc:
+        raise passwords_busy() from exc
+    if valid and new_hash:
+        user.password = new_hash
+    return valid
 
 
 @user_routers.get("/", response_class=HTMLResponse)
-async def retrieve_users(request: Request, session: Session = Depends(get_db)):
-    """Retrieve users from the database."""
-    users = session.query(User).all()
+async def retrieve_users(
+    request: Request, page: PageRequest = Depends(page_request),
+    session: AsyncSession = Depends(get_read_db)
+):
+    """Retrieve one page of users from the database."""
+    users = await UserRepository(session).page(page)
     return TEMPLATES.TemplateResponse(
         "users/users.html",
-        {"request": request, "users": users}
+        {"request": request, "users": users.items, "page": users}
     )
 
 
 @user_routers.get("/{user_id}", response_class=HTMLResponse)
 async def retrieve_user(
     request: Request, user_id: str,
-    session: Session = Depends(get_db)
+    session: AsyncSession = Depends(get_read_db)
 ):
     """Retrieve a user from the database."""
-    user = session.query(User).filter(User.id == user_id).one_or_none()
+    user = (await session.scalars(
+        select(User).filter(User.id == user_id)
+    )).one_or_none()
 
     if user:
         return TEMPLATES.TemplateResponse(
@@ -58,20 +95,24 @@ async def update_user(
     user_id: str, user: UserUpdate,
     request: Request,
     current_user: str = Depends(get_current_user),
-    session: Session = Depends(get_db)
+    session: AsyncSession = Depends(get_db)
 ):
     """Update a user's data in the database."""
-    get_user = session.query(User).filter(User.id == user_id)
+    get_user = await session.get(User, user_id)
 
-    if get_user.first().id == current_user.id:
-        get_user.first().updated_at = datetime.utcnow()
-        get_user.update(user.dict(), synchronize_session=False)
-        session.commit()
+    if get_user.id == current_user.id:
+        await session.execute(
+            update(User).filter(User.id == user_id).values(
+                **user.dict(), updated_at=datetime.utcnow()
+            ).execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        forget_user(user_id)
         return RedirectResponse(
             url=f"/users/{user_id}",
             status_code=status.HTTP_302_FOUND
         )
-    elif get_user.first().id != current_user.id:
+    elif get_user.id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied"
@@ -85,20 +126,32 @@ async def update_user(
 @user_routers.delete("/{user_id}/delete")
 async def delete_user(
     user_id: str, request: Request,
-    session: Session = Depends(get_db),
+    session: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user),
 ):
     """Delete a user from the database."""
-    user = session.query(User).filter(User.id == user_id)
+    user = await session.get(User, user_id)
 
-    if user.first().id == current_user.id:
-        user.delete()
-        session.commit()
+    if user.id == current_user.id:
+        # uncount the user's ratings before the cascade deletes them
+        rated = await session.scalars(
+            select(Rating.course_id).filter(Rating.user_id == user_id)
+        )
+        await RatingRepository(session).remove_all(
+            [(user_id, course_id) for course_id in rated]
+        )
+        for model in (Enrollment, Preference):
+            await session.execute(
+                delete(model).filter(model.user_id == user_id)
+            )
+        await session.execute(delete(User).filter(User.id == user_id))
+        await session.commit()
+        forget_user(user_id)
         return RedirectResponse(
             url="/",
             status_code=status.HTTP_302_FOUND
         )
-    elif user.first().id != current_user.id:
+    elif user.id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied"
@@ -109,18 +162,48 @@ async def delete_user(
     )
 
 
+@user_routers.post("/{user_id}/preferences")
+async def update_preferences(
+    user_id: str, preferences: PreferencesUpdate,
+    session: AsyncSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    """Replace the careers a user prefers."""
+    if user_id != str(current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    if settings.WRITE_BEHIND:
+        return accepted([await write_behind.submit(
+            PREFER, current_user.id,
+            {"career_ids": preferences.career_ids}
+        )])
+    career_ids = await PreferenceRepository(session).replace(
+        current_user.id, preferences.career_ids
+    )
+    await session.commit()
+    return {"career_ids": career_ids}
+
+
 @user_routers.post("/create")
 async def create_user(
     response: Response,
     request: Request,
-    session: Session = Depends(get_db)
+    session: AsyncSession = Depends(get_db)
 ):
     """Create a new user."""
     try:
         form = await request.form()
-        password = form.get("password")
-        password = hash_pwd(password)
-        print(password)
+        if not form.get("password"):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Password is required"
+            )
+        try:
+            password = await passwords.hash(form.get("password"))
+        except asyncio.QueueFull as exc:
+            raise passwords_busy() from exc
         user = {
             "full_name": form.get("full_name"),
             "username": form.get("username"),
@@ -130,8 +213,8 @@ async def create_user(
         new_user = User(**user)
         if new_user:
             session.add(new_user)
-            session.commit()
-            session.refresh(new_user)
+            await session.commit()
+            await session.refresh(new_user)
             response.status_code = status.HTTP_201_CREATED
             return RedirectResponse(
                 url="/users/show/login",
@@ -142,9 +225,10 @@ async def create_user(
             detail="Error creating user"
         )
     except IntegrityError as error:
-        print(error)
+        await session.rollback()
+        logger.exception("Could not create user %s", user.get("username"))
         raise HTTPException(
-            status.HTTP_422_UNPROCESSABLE_ENTITY,
+            status.HTTP_409_CONFLICT,
             detail="User with username or email already exists"
         ) from error
 
@@ -159,15 +243,15 @@ async def show_create_form(request: Request):
 
 
 @user_routers.post("/login_token")
-def login_token(
+async def login_token(
     response: Response,
     credentials: OAuth2PasswordRequestForm = Depends(),
-    session: Session = Depends(get_db)
+    session: AsyncSession = Depends(get_db)
 ):
     """User authentication method."""
-    q_username = session.query(User).filter(
+    q_username = (await session.scalars(select(User).filter(
         User.username == credentials.username
-    ).first()
+    ))).first()
 
     if not q_username:
         raise HTTPException(
@@ -175,70 +259,73 @@ def login_token(
             detail="Invalid credentials"
         )
 
-    if not verify_pwd(credentials.password, q_username.password):
+    if not await check_password(q_username, credentials.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
         )
-    if q_username and verify_pwd(credentials.password, q_username.password):
-        response.status_code = status.HTTP_200_OK
-        access_token = create_token(
-            data={
-                "id": q_username.id,
-                "username": q_username.username
-            }
-        )
-        return {"access_token": access_token, "token_type": "bearer"}
-    raise HTTPException(
-        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-        detail="Invalid data type"
+    await session.commit()
+    response.status_code = status.HTTP_200_OK
+    access_token = create_token(
+        data={
+            "id": q_username.id,
+            "username": q_username.username
+        }
     )
+    return {"access_token": access_token, "token_type": "bearer"}
 
 
 @user_routers.post("/login_basic", response_class=HTMLResponse)
 async def login_basic(
     request: Request,
-    session: Session = Depends(get_db)
+    session: AsyncSession = Depends(get_db)
 ):
     """Login basic authentication."""
     try:
         form = await request.form()
         username = form.get("username")
         password = form.get("password")
-        user = session.query(User).filter(
+        user = (await session.scalars(select(User).filter(
             User.username == username
-        ).first()
+        ))).first()
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Incorrect email or password"
             )
 
-        if user and verify_pwd(password, user.password):
-            access_token = create_token(
-                data={
-                    "id": user.id,
-                    "username": user.username
-                }
+        if not await check_password(user, password):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Incorrect email or password"
             )
+        await session.commit()
+        access_token = create_token(
+            data={
+                "id": user.id,
+                "username": user.username
+            }
+        )
 
-            token = jsonable_encoder(access_token)
+        token = jsonable_encoder(access_token)
 
-            response = RedirectResponse(
-                url="/courses",
-                status_code=status.HTTP_302_FOUND
-            )
-            response.set_cookie(
-                "Authorization",
-                value=f"Bearer {token}",
-                domain="http://127.0.0.1:8000",
-                httponly=True,
-                max_age=settings.ACCESS_TOKEN_EXPIRE_WEEKS,
-                expires=settings.ACCESS_TOKEN_EXPIRE_WEEKS,
-            )
-            return response
+        response = RedirectResponse(
+            url="/courses",
+            status_code=status.HTTP_302_FOUND
+        )
+        response.set_cookie(
+            "Authorization",
+            value=f"Bearer {token}",
+            domain="http://127.0.0.1:8000",
+            httponly=True,
+            max_age=settings.ACCESS_TOKEN_EXPIRE_WEEKS,
+            expires=settings.ACCESS_TOKEN_EXPIRE_WEEKS,
+        )
+        return response
 
-    except HTTPException:
+    except HTTPException as exc:
+        if exc.status_code == status.HTTP_503_SERVICE_UNAVAILABLE:
+            raise
         response = Response(
             headers={"WWW-Authenticate": "Basic"},
             status_code=status.HTTP_401_UNAUTHORIZED
@@ -47,6 +47,19 @@ class Career(CareerBase):
         orm_mode = True
 
 
+class CareerTitle(BaseModel):
+    """
+    Career as offered in pickers.
+
+    Attributes:
+        id (int): Id of the career.
+        title (str): title of the career.
+    """
+
+    id: int
+    title: str
+
+
 class CareerWithSkills(Career):
     """Career with skills."""
 
@@ -101,3 +114,23 @@ class CareerRecommendationResponse(BaseModel):
 
     recommended_career: Career
     recommended_courses: List[str]
+
+
+class StudentScores(BaseModel):
+    """
+    Scores of one student for batch recommendations.
+
+    Attributes:
+        id (str): optional identifier echoed back with the result
+        language ... english (int): subject scores from 1 to 100
+    """
+
+    id: Optional[str]
+    language: conint(ge=1, le=100)
+    mathematics: conint(ge=1, le=100)
+    biology: conint(ge=1, le=100)
+    chemistry: conint(ge=1, le=100)
+    physics: conint(ge=1, le=100)
+    social_science: conint(ge=1, le=100)
+    philosophy: conint(ge=1, le=100)
+    english: conint(ge=1, le=100)
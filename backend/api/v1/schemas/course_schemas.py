@@ -1,7 +1,7 @@
 #!/usr/bin/python3
 """Course schemas for the career recommendation."""
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 
 
@@ -45,3 +45,22 @@ class Course(CourseBase):
         """Serialized Course."""
 
         orm_mode = True
+
+
+class CourseSummary(Course):
+    """
+    Course as shown in course pages.
+
+    Attributes:
+        career_id (int): Id of the career the course belongs to
+        career_title (str): Title of that career
+        rating (float): Mean rating, None until the course is rated
+        ratings_count (int): Number of ratings
+        histogram (list): Number of ratings of 1 to 5 stars
+    """
+
+    career_id: int
+    career_title: Optional[str]
+    rating: Optional[float]
+    ratings_count: int = 0
+    histogram: Optional[List[int]]
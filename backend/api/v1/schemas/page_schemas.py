@@ -0,0 +1,23 @@
+#!/usr/bin/python3
+"""Paginated response schemas."""
+from typing import Generic, List, Optional, TypeVar
+from pydantic.generics import GenericModel
+
+ItemT = TypeVar("ItemT")
+
+
+class Page(GenericModel, Generic[ItemT]):
+    """
+    One page of a keyset paginated list.
+
+    Attributes:
+        items (list): rows of the page, in list order.
+        limit (int): maximum number of rows a page holds.
+        next_cursor (str): cursor of the following page, if any.
+        prev_cursor (str): cursor of the preceding page, if any.
+    """
+
+    items: List[ItemT]
+    limit: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
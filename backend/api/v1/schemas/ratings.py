@@ -1,7 +1,9 @@
 #!/usr/bin/python3
 """Ratee schema"""
+from typing import List, Optional
 from pydantic import BaseModel
-from pydantic.types import conint
+from pydantic.types import conint, conlist
+from backend.api.settings import settings
 
 
 class RateSchema(BaseModel):
@@ -10,3 +12,37 @@ class RateSchema(BaseModel):
     course_id: int
     has_rated: bool = False
     value: conint(ge=1, le=5)
+
+
+class BulkRateSchema(BaseModel):
+    """Many course ratings by one user, e.g. a course-end survey."""
+
+    ratings: conlist(
+        RateSchema, min_items=1, max_items=settings.RATING_BULK_MAX
+    )
+
+
+class RatingState(BaseModel):
+    """
+    Rating of a course by the user after a write.
+
+    Attributes:
+        course_id (int): rated course.
+        rating (int): the user's rating, None once removed.
+        created (bool): whether the write created the rating.
+        ratings_count (int): number of ratings of the course.
+        mean (float): mean rating of the course, None if unrated.
+    """
+
+    course_id: int
+    rating: Optional[int]
+    created: bool
+    ratings_count: int
+    mean: Optional[float]
+
+
+class BulkRateResult(BaseModel):
+    """New rating states, and the courses that could not be rated."""
+
+    rated: List[RatingState]
+    rejected: List[int]
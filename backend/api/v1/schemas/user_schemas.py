@@ -2,7 +2,7 @@
 """User schema for the career recommendation."""
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, conlist
 
 
 class AccessToken(BaseModel):
@@ -13,9 +13,16 @@ class AccessToken(BaseModel):
 
 
 class TokenData(BaseModel):
-    """Token data."""
+    """
+    Claims of a verified access token.
+
+    Attributes:
+        id (str): id of the user.
+        username (str): username at login; absent from older tokens.
+    """
 
     id: str
+    username: Optional[str]
 
 
 class UserCreate(BaseModel):
@@ -62,6 +69,12 @@ class User(BaseModel):
         orm_mode = True
 
 
+class PreferencesUpdate(BaseModel):
+    """Careers a user prefers, replacing the previous ones."""
+
+    career_ids: conlist(int, max_items=100)
+
+
 class Login(BaseModel):
     """Sign in user schema."""
 
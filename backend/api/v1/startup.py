@@ -0,0 +1,31 @@
+#!/usr/bin/python3
+"""Startup time report broken down by phase."""
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+phases: Dict[str, float] = {}
+
+
+def record(name: str, seconds: float) -> None:
+    """Add time spent in a startup phase."""
+    phases[name] = phases.get(name, 0.0) + seconds
+    logger.info("startup phase %s took %.1f ms", name, seconds * 1000)
+
+
+@contextmanager
+def phase(name: str):
+    """Time the enclosed block as a startup phase."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def report() -> dict:
+    """Return the time spent per phase, in milliseconds."""
+    phases_ms = {name: seconds * 1000 for name, seconds in phases.items()}
+    return {"phases_ms": phases_ms, "total_ms": sum(phases_ms.values())}
@@ -0,0 +1,159 @@
+#!/usr/bin/python3
+"""
+Template bytecode cache, fragment cache and render timings.
+
+Compiled templates are kept in ``TEMPLATE_BYTECODE_CACHE``; the first
+worker to start writes it, and later workers load bytecode instead of
+parsing.
+
+Templates wrap expensive blocks in ``{% cache "name", key... %}`` ...
+``{% endcache %}``. A block is rendered once per key; the key includes
+the page's ETag, built from the ``catalog_versions`` row the page was
+read at. A write from any process or from the catalog import so retires
+the block everywhere, and a body is never sent under another page's tag.
+"""
+import os
+import time
+from typing import Callable, Dict, Hashable, Optional
+from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache, Template, nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from backend.api.settings import TEMPLATES, settings
+from backend.api.v1.auths.cache import TTLCache
+
+
+class RenderStats:
+    """
+    Render count and latency per template.
+
+    Attributes:
+        templates (dict): ``[renders, total_ms, max_ms]`` by template name.
+    """
+
+    def __init__(self):
+        """Initialize with no renders."""
+        self.templates: Dict[str, list] = {}
+
+    def record(self, name: str, elapsed_ms: float) -> None:
+        """Count one render of a template."""
+        entry = self.templates.setdefault(name, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed_ms
+        entry[2] = max(entry[2], elapsed_ms)
+
+    def stats(self) -> dict:
+        """Renders, mean and max latency by template."""
+        return {
+            name: {
+                "renders": renders, "mean_ms": total_ms / renders,
+                "max_ms": max_ms,
+            }
+            for name, (renders, total_ms, max_ms) in sorted(
+                self.templates.items()
+            )
+        }
+
+
+class FragmentCache:
+    """
+    Rendered template blocks by key.
+
+    The cache lives in one worker. Keys carry the data version of the
+    block, read from the database, so blocks of older versions are never
+    served again and simply expire.
+
+    Attributes:
+        cache (TTLCache): rendered blocks by key.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        """Initialize an empty cache."""
+        self.cache = TTLCache(max_size, ttl)
+
+    def render(self, key: Hashable, render: Callable[[], str]) -> str:
+        """The block cached under key, rendering it on a miss."""
+        html = self.cache.get(key)
+        if html is None:
+            html = render()
+            self.cache.set(key, html)
+        return html
+
+    def stats(self) -> dict:
+        """Size and hit rate of the cache."""
+        return self.cache.stats()
+
+
+renders = RenderStats()
+fragments = FragmentCache(
+    settings.FRAGMENT_CACHE_SIZE, settings.FRAGMENT_CACHE_TTL
+)
+
+
+class TimedTemplate(Template):
+    """Template recording how long each render takes."""
+
+    def render(self, *args, **kwargs) -> str:
+        """Render the template, timing it under its name."""
+        start = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            renders.record(
+                self.name or "<string>",
+                (time.perf_counter() - start) * 1000
+            )
+
+
+class FragmentCacheExtension(Extension):
+    """The ``{% cache "name", key... %}`` ... ``{% endcache %}`` tag."""
+
+    tags = {"cache"}
+
+    def parse(self, parser):
+        """Parse the key expressions and the body of the block."""
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method("_cached", [nodes.List(parts)]), [], [], body
+        ).set_lineno(lineno)
+
+    def _cached(self, parts: list, caller) -> Markup:
+        """The rendered body for the key made of parts."""
+        return fragments.render(tuple(map(str, parts)), caller)
+
+
+def configure(
+    templates: Jinja2Templates, cache_dir: Optional[str]
+) -> None:
+    """Add the bytecode cache, timing and fragment tag to templates."""
+    env = templates.env
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+    env.template_class = TimedTemplate
+    env.add_extension(FragmentCacheExtension)
+
+
+def warm_up(templates: Jinja2Templates) -> int:
+    """Load every template, compiling those not in the bytecode cache."""
+    names = templates.env.list_templates(extensions=["html"])
+    for name in names:
+        templates.get_template(name)
+    return len(names)
+
+
+def stats() -> dict:
+    """Template metrics: bytecode cache, fragments and render times."""
+    return {
+        "bytecode_cache": settings.TEMPLATE_BYTECODE_CACHE,
+        "fragments": fragments.stats(),
+        "renders": renders.stats(),
+    }
+
+
+configure(TEMPLATES, settings.TEMPLATE_BYTECODE_CACHE)
+
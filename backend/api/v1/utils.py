@@ -1,8 +1,22 @@
 #!/usr/bin/python3
 """Hash password."""
+import asyncio
+import time
+from concurrent.futures import (
+    Executor, ProcessPoolExecutor, ThreadPoolExecutor
+)
+from typing import Optional, Tuple
 from passlib.context import CryptContext
+from backend.api.settings import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# hashes of any other cost are replaced on the next successful login
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+PASSWORD_EXECUTORS = ("inline", "thread", "process")
 
 
 def hash_pwd(password: str) -> CryptContext:
@@ -13,3 +27,117 @@ def hash_pwd(password: str) -> CryptContext:
 def verify_pwd(password: str, hashed_password: str) -> CryptContext:
     """Verify password."""
     return pwd_context.verify(password, hashed_password)
+
+
+def verify_and_update_pwd(
+    password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """Verify password; also return a new hash if its cost is outdated."""
+    return pwd_context.verify_and_update(password, hashed_password)
+
+
+class PasswordPool:
+    """
+    Bounded pool hashing and verifying passwords off the event loop.
+
+    At most ``max_pending`` calls are queued or running at once; beyond
+    that a call fails at once with ``asyncio.QueueFull`` rather than
+    queueing, so a burst of logins cannot delay every other request.
+
+    Attributes:
+        kind (str): one of ``PASSWORD_EXECUTORS``; ``inline`` blocks the
+            event loop and is for comparison only.
+        workers (int): threads or processes hashing at once.
+        max_pending (int): calls admitted before rejecting.
+    """
+
+    def __init__(self, kind: str, workers: int, max_pending: int):
+        """Initialize the pool; the executor starts on first use."""
+        if kind not in PASSWORD_EXECUTORS:
+            raise ValueError(
+                f"Unknown password executor {kind!r}, expected one of "
+                f"{PASSWORD_EXECUTORS}"
+            )
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[Executor] = None
+        self.pending = 0
+        self.calls = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def _get_executor(self) -> Optional[Executor]:
+        """The executor, created on first use; None when inline."""
+        if self._executor is None and self.kind == "thread":
+            self._executor = ThreadPoolExecutor(
+                self.workers, thread_name_prefix="password"
+            )
+        elif self._executor is None and self.kind == "process":
+            self._executor = ProcessPoolExecutor(self.workers)
+        return self._executor
+
+    async def _run(self, fn, *args):
+        """Run fn in the pool if there is room, timing the whole call."""
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise asyncio.QueueFull()
+        self.pending += 1
+        start = time.perf_counter()
+        try:
+            executor = self._get_executor()
+            if executor is None:
+                return fn(*args)
+            return await asyncio.get_running_loop().run_in_executor(
+                executor, fn, *args
+            )
+        finally:
+            self.pending -= 1
+            elapsed = (time.perf_counter() - start) * 1000
+            self.calls += 1
+            self.total_ms += elapsed
+            self.max_ms = max(self.max_ms, elapsed)
+
+    async def hash(self, password: str) -> str:
+        """Hash a new password."""
+        return await self._run(hash_pwd, password)
+
+    async def verify(
+        self, password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """Check a password; a new hash is returned if the cost changed."""
+        valid, new_hash = await self._run(
+            verify_and_update_pwd, password, hashed_password
+        )
+        if new_hash:
+            self.rehashed += 1
+        return valid, new_hash
+
+    def close(self) -> None:
+        """Shut the executor down; it is recreated if used again."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def stats(self) -> dict:
+        """Load, rejections and latency of the pool."""
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "rounds": settings.BCRYPT_ROUNDS,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "calls": self.calls,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+            "mean_ms": self.total_ms / (self.calls or 1),
+            "max_ms": self.max_ms,
+        }
+
+
+passwords = PasswordPool(
+    settings.PASSWORD_EXECUTOR, settings.PASSWORD_WORKERS,
+    settings.PASSWORD_MAX_PENDING
+)
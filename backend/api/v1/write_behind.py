@@ -0,0 +1,524 @@
+#!/usr/bin/python3
+"""
+Write-behind buffer for ratings, enrollments and preferences.
+
+Usage:
+    python -m backend.api.v1.write_behind   # apply everything queued now
+
+With ``WRITE_BEHIND=true`` those routes acknowledge a write as soon as it
+is on disk in a local SQLite queue, and a background task applies the
+queue to Postgres in batches. The last applied sequence number is stored
+in Postgres in the same transaction as the batch, so a batch replayed
+after a crash is skipped and every acknowledged write lands exactly once.
+A batch failing ``WRITE_BEHIND_MAX_ATTEMPTS`` times in a row is split in
+halves until the writes at fault are found; those are moved to the
+queue's ``dead_letters`` table and the queue moves on.
+"""
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Sequence, Tuple
+import orjson
+from fastapi import status
+from fastapi.responses import JSONResponse
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.api.db_config import async_engine, async_session_local
+from backend.api.settings import settings
+from backend.api.v1.models.write_offsets import WriteBehindOffset
+from backend.api.v1.repositories.enrollments import EnrollmentRepository
+from backend.api.v1.repositories.preferences import PreferenceRepository
+from backend.api.v1.repositories.ratings import RatingRepository
+
+logger = logging.getLogger(__name__)
+
+RATE = "rate"
+UNRATE = "unrate"
+ENROLL = "enroll"
+PREFER = "prefer"
+KINDS = (RATE, UNRATE, ENROLL, PREFER)
+# failures of the database rather than of the writes, never dead-lettered
+TRANSIENT_ERRORS = (
+    OSError, asyncio.TimeoutError, InterfaceError, OperationalError
+)
+
+
+class QueuedWrite:
+    """
+    One acknowledged write waiting in the local queue.
+
+    Attributes:
+        seq (int): position in the queue, increasing with every append.
+        kind (str): one of ``KINDS``.
+        user_id (str): user the write belongs to.
+        payload (dict): fields of the write.
+        enqueued_at (float): epoch seconds of the acknowledgement.
+    """
+
+    __slots__ = ("seq", "kind", "user_id", "payload", "enqueued_at")
+
+    def __init__(self, seq, kind, user_id, payload, enqueued_at):
+        """Initialize the write."""
+        self.seq = seq
+        self.kind = kind
+        self.user_id = user_id
+        self.payload = payload
+        self.enqueued_at = enqueued_at
+
+
+class DurableQueue:
+    """
+    Append-only SQLite log of acknowledged writes.
+
+    Commits are fsynced (WAL, ``synchronous=FULL``) before ``append``
+    returns. Several processes may append to the same file. Writes that
+    cannot be applied are kept in the ``dead_letters`` table.
+
+    Attributes:
+        path (str): SQLite database file.
+        queue_id (str): identity of the log, stored in the file itself.
+    """
+
+    def __init__(self, path: str):
+        """Open, and create if needed, the queue file."""
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            path, timeout=30.0, isolation_level=None, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS writes ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, "
+            "user_id TEXT NOT NULL, payload BLOB NOT NULL, "
+            "enqueued_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS dead_letters ("
+            "seq INTEGER PRIMARY KEY, kind TEXT NOT NULL, "
+            "user_id TEXT NOT NULL, payload BLOB NOT NULL, "
+            "enqueued_at REAL NOT NULL, failed_at REAL NOT NULL, "
+            "error TEXT NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS meta "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self._db.execute(
+            "INSERT OR IGNORE INTO meta VALUES ('queue_id', ?)",
+            (uuid.uuid4().hex,)
+        )
+        self.queue_id = self._db.execute(
+            "SELECT value FROM meta WHERE key = 'queue_id'"
+        ).fetchone()[0]
+
+    def append(self, records: Sequence[Tuple[str, str, dict]]) -> List[int]:
+        """Durably append (kind, user_id, payload) records; return seqs."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                seqs = [
+                    self._db.execute(
+                        "INSERT INTO writes "
+                        "(kind, user_id, payload, enqueued_at) "
+                        "VALUES (?, ?, ?, ?)",
+                        (kind, user_id, orjson.dumps(payload), now)
+                    ).lastrowid
+                    for kind, user_id, payload in records
+                ]
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return seqs
+
+    def peek(self, limit: int) -> List[QueuedWrite]:
+        """Oldest queued writes, in queue order."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT seq, kind, user_id, payload, enqueued_at "
+                "FROM writes ORDER BY seq LIMIT ?", (limit,)
+            ).fetchall()
+        return [
+            QueuedWrite(seq, kind, user_id, orjson.loads(payload), at)
+            for seq, kind, user_id, payload, at in rows
+        ]
+
+    def ack(self, seq: int) -> None:
+        """Drop the writes up to seq once they are applied."""
+        with self._lock:
+            self._db.execute("DELETE FROM writes WHERE seq <= ?", (seq,))
+
+    def dead_letter(self, write: QueuedWrite, error: str) -> None:
+        """Keep a write that cannot be applied, with the error."""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO dead_letters VALUES "
+                "(?, ?, ?, ?, ?, ?, ?)",
+                (
+                    write.seq, write.kind, write.user_id,
+                    orjson.dumps(write.payload), write.enqueued_at,
+                    time.time(), error
+                )
+            )
+
+    def dead_letters(self) -> List[QueuedWrite]:
+        """Writes set aside as impossible to apply, in queue order."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT seq, kind, user_id, payload, enqueued_at "
+                "FROM dead_letters ORDER BY seq"
+            ).fetchall()
+        return [
+            QueuedWrite(seq, kind, user_id, orjson.loads(payload), at)
+            for seq, kind, user_id, payload, at in rows
+        ]
+
+    def depth(self) -> Tuple[int, Optional[float]]:
+        """Number of queued writes and the time the oldest was queued."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT count(*), min(enqueued_at) FROM writes"
+            ).fetchone()
+
+    def close(self) -> None:
+        """Close the file."""
+        with self._lock:
+            self._db.close()
+
+
+async def apply_writes(
+    session: AsyncSession, writes: Sequence[QueuedWrite]
+) -> int:
+    """
+    Apply queued writes with one multi-row statement per kind.
+
+    Writes are folded in queue order, the last one winning per rating,
+    enrollment or preference set, so each user's writes take effect in the
+    order they were acknowledged. Returns the number of ratings rejected
+    because the course is unknown or the user's own.
+    """
+    ratings: Dict[Tuple[str, int], Optional[int]] = {}
+    enrollments: Dict[Tuple[str, int], None] = {}
+    preferences: Dict[str, List[int]] = {}
+    for write in writes:
+        if write.kind == RATE:
+            key = (write.user_id, write.payload["course_id"])
+            ratings[key] = write.payload["rating"]
+        elif write.kind == UNRATE:
+            ratings[(write.user_id, write.payload["course_id"])] = None
+        elif write.kind == ENROLL:
+            enrollments[(write.user_id, write.payload["course_id"])] = None
+        elif write.kind == PREFER:
+            preferences[write.user_id] = write.payload["career_ids"]
+
+    rejected = []
+    repository = RatingRepository(session)
+    removed = [key for key, value in ratings.items() if value is None]
+    if removed:
+        await repository.remove_all(removed)
+    rated = {key: value for key, value in ratings.items() if value}
+    if rated:
+        _, rejected = await repository.rate_all(rated)
+    if enrollments:
+        await EnrollmentRepository(session).enroll_all(list(enrollments))
+    if preferences:
+        await PreferenceRepository(session).replace_all(preferences)
+    if rejected:
+        logger.warning("write-behind dropped ratings: %s", rejected[:20])
+    return len(rejected)
+
+
+class WriteBehind:
+    """
+    Durable queue of writes and the background task applying it.
+
+    Writes submitted while the queue file is being synced are appended
+    together with the next sync, so concurrent requests share an fsync.
+
+    Attributes:
+        path (str): SQLite file of the queue.
+        batch_size (int): most writes applied per transaction; a flush
+            starts as soon as that many are waiting.
+        interval (float): seconds between flushes when fewer are waiting.
+        max_attempts (int): failures of a batch in a row before the
+            writes at fault are looked for and dead-lettered.
+    """
+
+    def __init__(self, path: str, batch_size: int = 500,
+                 interval: float = 0.5, max_attempts: int = 3):
+        """Initialize a stopped buffer; ``start`` opens the queue."""
+        self.path = path
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_attempts = max(1, max_attempts)
+        self.attempts = 0
+        self.queue: Optional[DurableQueue] = None
+        self._pending: List[Tuple[Tuple[str, str, dict], asyncio.Future]] = []
+        self._appending: Optional[asyncio.Task] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._unflushed = 0
+        self.acknowledged = 0
+        self.syncs = 0
+        self.flushes = 0
+        self.flushed = 0
+        self.skipped = 0
+        self.rejected = 0
+        self.failures = 0
+        self.dead_lettered = 0
+        self.total_flush_ms = 0.0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    def start(self) -> None:
+        """Open the queue and start flushing, beginning with any backlog."""
+        self.queue = DurableQueue(self.path)
+        self._wake = asyncio.Event()
+        self._wake.set()
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop the flusher, apply what is left, and close the queue."""
+        if self.queue is None:
+            return
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._appending is not None:
+            await asyncio.gather(self._appending, return_exceptions=True)
+        try:
+            while await self.flush():
+                pass
+        except Exception:
+            logger.exception("write-behind queue left for the next start")
+        self.queue.close()
+        self.queue = None
+
+    async def submit_many(
+        self, records: Sequence[Tuple[str, str, dict]]
+    ) -> List[int]:
+        """Queue (kind, user_id, payload) writes; return once on disk."""
+        loop = asyncio.get_running_loop()
+        futures = []
+        for kind, user_id, payload in records:
+            future = loop.create_future()
+            self._pending.append(((kind, str(user_id), payload), future))
+            futures.append(future)
+        if self._appending is None or self._appending.done():
+            self._appending = asyncio.create_task(self._append())
+        return list(await asyncio.gather(*futures))
+
+    async def submit(self, kind: str, user_id: str, payload: dict) -> int:
+        """Queue one write; return its sequence number once on disk."""
+        return (await self.submit_many([(kind, user_id, payload)]))[0]
+
+    async def _append(self) -> None:
+        """Write the pending records, one fsync per group."""
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            group, self._pending = self._pending, []
+            try:
+                seqs = await loop.run_in_executor(
+                    None, self.queue.append, [record for record, _ in group]
+                )
+            except Exception as exc:
+                for _, future in group:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for (_, future), seq in zip(group, seqs):
+                if not future.done():
+                    future.set_result(seq)
+            self.syncs += 1
+            self.acknowledged += len(group)
+            self._unflushed += len(group)
+            if self._unflushed >= self.batch_size:
+                self._wake.set()
+
+    async def _run(self) -> None:
+        """Flush on a full batch or every interval, whichever comes first."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                while await self.flush() >= self.batch_size:
+                    pass
+            except Exception:
+                self.failures += 1
+                logger.exception("write-behind flush failed, will retry")
+
+    async def flush(self) -> int:
+        """Apply the oldest batch of queued writes; return its size."""
+        loop = asyncio.get_running_loop()
+        writes = await loop.run_in_executor(
+            None, self.queue.peek, self.batch_size
+        )
+        if not writes:
+            return 0
+        start = time.perf_counter()
+        dead_lettered = self.dead_lettered
+        if self.attempts < self.max_attempts:
+            try:
+                fresh, rejected = await self._apply(writes)
+            except Exception:
+                self.attempts += 1
+                raise
+        else:
+            fresh, rejected = await self._bisect(writes)
+        self.attempts = 0
+        await loop.run_in_executor(None, self.queue.ack, writes[-1].seq)
+
+        elapsed = (time.perf_counter() - start) * 1000
+        self._unflushed = max(self._unflushed - len(writes), 0)
+        self.flushes += 1
+        self.flushed += fresh
+        self.skipped += (
+            len(writes) - fresh - (self.dead_lettered - dead_lettered)
+        )
+        self.rejected += rejected
+        self.total_flush_ms += elapsed
+        self.last_flush_ms = elapsed
+        self.max_flush_ms = max(self.max_flush_ms, elapsed)
+        return len(writes)
+
+    async def _apply(
+        self, writes: Sequence[QueuedWrite], skip: bool = False
+    ) -> Tuple[int, int]:
+        """
+        Apply writes and move the offset past them in one transaction.
+
+        Writes at or below the stored offset were applied before a crash
+        and are left out; with skip, none are applied. Returns the number
+        applied and the number of ratings rejected.
+        """
+        queue_id = self.queue.queue_id
+        async with async_session_local() as session:
+            # the offset row lock serializes flushers of the same queue
+            await session.execute(
+                insert(WriteBehindOffset)
+                .values(queue_id=queue_id, seq=0)
+                .on_conflict_do_nothing()
+            )
+            applied = await session.scalar(
+                select(WriteBehindOffset.seq)
+                .filter(WriteBehindOffset.queue_id == queue_id)
+                .with_for_update()
+            )
+            fresh = [write for write in writes if write.seq > applied]
+            rejected = 0
+            if fresh and not skip:
+                rejected = await apply_writes(session, fresh)
+            if fresh:
+                await session.execute(
+                    insert(WriteBehindOffset)
+                    .values(queue_id=queue_id, seq=writes[-1].seq)
+                    .on_conflict_do_update(
+                        index_elements=[WriteBehindOffset.queue_id],
+                        set_={"seq": writes[-1].seq, "updated_at": func.now()}
+                    )
+                )
+            await session.commit()
+        return (0 if skip else len(fresh)), rejected
+
+    async def _bisect(
+        self, writes: Sequence[QueuedWrite]
+    ) -> Tuple[int, int]:
+        """
+        Apply writes in halves, dead-lettering the single ones that fail.
+
+        Each half is committed with its offset, so the writes keep their
+        order. Failures of the database itself are raised, not blamed on
+        the writes.
+        """
+        try:
+            return await self._apply(writes)
+        except TRANSIENT_ERRORS:
+            raise
+        except Exception as exc:
+            if len(writes) > 1:
+                middle = len(writes) // 2
+                first = await self._bisect(writes[:middle])
+                second = await self._bisect(writes[middle:])
+                return first[0] + second[0], first[1] + second[1]
+            write = writes[0]
+            logger.error(
+                "write-behind dead-lettered write %d (%s): %r",
+                write.seq, write.kind, exc
+            )
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.queue.dead_letter, write, repr(exc)
+            )
+            await self._apply(writes, skip=True)
+            self.dead_lettered += 1
+            return 0, 0
+
+    def stats(self) -> dict:
+        """Queue depth, lag and flush latency metrics."""
+        depth, oldest = self.queue.depth() if self.queue else (0, None)
+        return {
+            "enabled": self.queue is not None,
+            "path": self.path,
+            "batch_size": self.batch_size,
+            "interval_s": self.interval,
+            "depth": depth,
+            "oldest_age_s": time.time() - oldest if oldest else 0.0,
+            "acknowledged": self.acknowledged,
+            "syncs": self.syncs,
+            "flushes": self.flushes,
+            "flushed": self.flushed,
+            "skipped": self.skipped,
+            "rejected": self.rejected,
+            "failures": self.failures,
+            "dead_lettered": self.dead_lettered,
+            "mean_flush_ms": self.total_flush_ms / (self.flushes or 1),
+            "last_flush_ms": self.last_flush_ms,
+            "max_flush_ms": self.max_flush_ms,
+        }
+
+
+def accepted(seqs: Sequence[int]) -> JSONResponse:
+    """Acknowledge queued writes with their last sequence number."""
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"queued": len(seqs), "seq": max(seqs, default=0)}
+    )
+
+
+write_behind = WriteBehind(
+    settings.WRITE_BEHIND_PATH, settings.WRITE_BEHIND_BATCH_SIZE,
+    settings.WRITE_BEHIND_INTERVAL, settings.WRITE_BEHIND_MAX_ATTEMPTS
+)
+
+
+async def drain(path: str = settings.WRITE_BEHIND_PATH) -> int:
+    """Apply every write queued in path; return how many were applied."""
+    buffer = WriteBehind(
+        path, settings.WRITE_BEHIND_BATCH_SIZE,
+        max_attempts=settings.WRITE_BEHIND_MAX_ATTEMPTS
+    )
+    buffer.queue = DurableQueue(path)
+    try:
+        while await buffer.flush():
+            pass
+    finally:
+        buffer.queue.close()
+        await async_engine.dispose()
+    return buffer.flushed
+
+
+if __name__ == "__main__":
+    print(f"applied {asyncio.run(drain())} queued writes")
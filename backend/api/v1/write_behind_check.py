@@ -0,0 +1,240 @@
+#!/usr/bin/python3
+"""
+Crash check of the write-behind buffer.
+
+Usage:
+    python -m backend.api.v1.write_behind_check
+    python -m backend.api.v1.write_behind_check --users 8 --kill-after 2000
+
+Creates throwaway users, starts a child process that writes ratings,
+enrollments and preferences through the buffer as fast as it can, and
+kills it with SIGKILL after a number of acknowledgements. The queue is
+then drained and the database compared with what was acknowledged: for
+every user, the state must include its last acknowledged write (and at
+most the one write in flight after it). Exits non zero on a mismatch.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import uuid
+from typing import Dict, Iterator, List, Sequence, Tuple
+from sqlalchemy import delete, insert, select
+from backend.api.db_config import async_session_local, engine, session_local
+from backend.api.v1.models.careers import Career
+from backend.api.v1.models.courses import Course
+from backend.api.v1.models.enrollments import Enrollment
+from backend.api.v1.models.preferences import Preference
+from backend.api.v1.models.ratings import Rating
+from backend.api.v1.models.user_models import User
+from backend.api.v1.rating_stats import drift
+from backend.api.v1.repositories.ratings import RatingRepository
+from backend.api.v1.write_behind import (
+    ENROLL, PREFER, RATE, UNRATE, WriteBehind, drain
+)
+# imported so that every relationship resolves
+from backend.api.v1.models import write_offsets  # noqa: F401
+
+
+def operations(
+    courses: Sequence[int], careers: Sequence[int]
+) -> Iterator[Tuple[str, dict]]:
+    """Endless, deterministic (kind, payload) writes of one user."""
+    for round_ in itertools.count():
+        for index, course_id in enumerate(courses):
+            rating = (round_ + index) % 5 + 1
+            yield RATE, {"course_id": course_id, "rating": rating}
+        if round_ % 2:
+            yield UNRATE, {"course_id": courses[0]}
+        yield ENROLL, {"course_id": courses[round_ % len(courses)]}
+        yield PREFER, {"career_ids": [careers[round_ % len(careers)]]}
+
+
+def expected(writes: Iterator[Tuple[str, dict]]) -> tuple:
+    """Ratings, enrollments and preferences after applying writes."""
+    ratings: Dict[int, int] = {}
+    enrolled = set()
+    preferred: List[int] = []
+    for kind, payload in writes:
+        if kind == RATE:
+            ratings[payload["course_id"]] = payload["rating"]
+        elif kind == UNRATE:
+            ratings.pop(payload["course_id"], None)
+        elif kind == ENROLL:
+            enrolled.add(payload["course_id"])
+        else:
+            preferred = sorted(payload["career_ids"])
+    return ratings, enrolled, preferred
+
+
+async def child(path, users, courses, careers) -> None:
+    """Write through the buffer until killed, printing every ack."""
+    buffer = WriteBehind(path, batch_size=50, interval=0.05)
+    buffer.start()
+
+    async def write(user_id: str) -> None:
+        for index, (kind, payload) in enumerate(
+            operations(courses, careers)
+        ):
+            await buffer.submit(kind, user_id, payload)
+            print(user_id, index, flush=True)
+
+    await asyncio.gather(*map(write, users))
+
+
+def database_state(user_ids: Sequence[str]) -> Dict[str, tuple]:
+    """Stored ratings, enrollments and preferences of each user."""
+    state = {user_id: ({}, set(), []) for user_id in user_ids}
+    with session_local() as session:
+        for row in session.execute(
+            select(Rating.user_id, Rating.course_id, Rating.rating)
+            .filter(Rating.user_id.in_(user_ids))
+        ):
+            state[str(row.user_id)][0][row.course_id] = row.rating
+        for row in session.execute(
+            select(Enrollment.user_id, Enrollment.course_id)
+            .filter(Enrollment.user_id.in_(user_ids))
+        ):
+            state[str(row.user_id)][1].add(row.course_id)
+        for row in session.execute(
+            select(Preference.user_id, Preference.career_id)
+            .filter(Preference.user_id.in_(user_ids))
+            .order_by(Preference.career_id)
+        ):
+            state[str(row.user_id)][2].append(row.career_id)
+    return state
+
+
+def create_users(count: int) -> List[str]:
+    """Insert throwaway users; return their ids."""
+    tag = uuid.uuid4().hex[:8]
+    with session_local() as session:
+        user_ids = session.scalars(
+            insert(User).returning(User.id),
+            [
+                {
+                    "full_name": f"write behind check {n}",
+                    "username": f"wbtest-{tag}-{n}",
+                    "email": f"wbtest-{tag}-{n}@example.com",
+                    "password": "!",
+                }
+                for n in range(count)
+            ]
+        ).all()
+        session.commit()
+    return [str(user_id) for user_id in user_ids]
+
+
+async def remove_users(user_ids: Sequence[str]) -> None:
+    """Delete the throwaway users and everything they wrote."""
+    async with async_session_local() as session:
+        rated = await session.execute(
+            select(Rating.user_id, Rating.course_id)
+            .filter(Rating.user_id.in_(user_ids))
+        )
+        await RatingRepository(session).remove_all(
+            [(str(user_id), course_id) for user_id, course_id in rated]
+        )
+        for model in (Enrollment, Preference):
+            await session.execute(
+                delete(model).filter(model.user_id.in_(user_ids))
+            )
+        await session.execute(delete(User).filter(User.id.in_(user_ids)))
+        await session.commit()
+
+
+def run(users: int, kill_after: int) -> int:
+    """Crash a writer, drain its queue and compare; return the exit code."""
+    with session_local() as session:
+        courses = session.scalars(
+            select(Course.id).order_by(Course.id).limit(4)
+        ).all()
+        careers = session.scalars(
+            select(Career.id).order_by(Career.id).limit(3)
+        ).all()
+    if not courses or not careers:
+        print("needs at least one course and one career in the database")
+        return 2
+    user_ids = create_users(users)
+    path = os.path.join(tempfile.mkdtemp(), "write_behind.db")
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", __spec__.name, "--child", path,
+            "--user-ids", ",".join(user_ids),
+            "--courses", ",".join(map(str, courses)),
+            "--careers", ",".join(map(str, careers)),
+        ],
+        stdout=subprocess.PIPE, text=True
+    )
+    acked: Dict[str, int] = {}
+    count = 0
+    for line in process.stdout:
+        user_id, index = line.split()
+        acked[user_id] = int(index)
+        count += 1
+        if count == kill_after:
+            os.kill(process.pid, signal.SIGKILL)
+    process.wait()
+    if process.returncode != -signal.SIGKILL:
+        print(f"writer exited early with {process.returncode}")
+        return 2
+
+    applied = asyncio.run(drain(path))
+    state = database_state(user_ids)
+    failures = []
+    for user_id in user_ids:
+        last = acked.get(user_id, -1)
+        # the write after the last ack may have reached the queue too
+        allowed = [
+            expected(itertools.islice(operations(courses, careers), n))
+            for n in (last + 1, last + 2)
+        ]
+        if state[user_id] not in allowed:
+            failures.append((user_id, last, state[user_id], allowed[0]))
+    with engine.connect() as connection:
+        stale = drift(connection, courses)
+    asyncio.run(remove_users(user_ids))
+    shutil.rmtree(os.path.dirname(path))
+
+    print(f"{count} writes acknowledged, {applied} applied after the crash")
+    for user_id, last, found, wanted in failures:
+        print(f"FAIL {user_id} after ack {last}: {found} != {wanted}")
+    if stale:
+        print(f"FAIL rating aggregates out of date for courses {stale}")
+    if not failures and not stale:
+        print("ok: no acknowledged write was lost")
+    return 1 if failures or stale else 0
+
+
+def main(argv=None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--users", type=int, default=5, help="concurrent writing users"
+    )
+    parser.add_argument(
+        "--kill-after", type=int, default=1000,
+        help="acknowledged writes before the writer is killed"
+    )
+    parser.add_argument("--child", metavar="QUEUE", help=argparse.SUPPRESS)
+    parser.add_argument("--user-ids", help=argparse.SUPPRESS)
+    parser.add_argument("--courses", help=argparse.SUPPRESS)
+    parser.add_argument("--careers", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        asyncio.run(child(
+            args.child, args.user_ids.split(","),
+            [int(n) for n in args.courses.split(",")],
+            [int(n) for n in args.careers.split(",")],
+        ))
+        return 0
+    return run(args.users, args.kill_after)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
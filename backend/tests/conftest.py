@@ -0,0 +1,28 @@
+#!/usr/bin/python3
+"""Shared fixtures of the backend tests."""
+import os
+import pytest
+
+# settings are required at import; real values come from the environment
+for name, value in {
+    "OAUTH2_SECRET_KEY": "test-secret",
+    "DB_USER_PASSW": "postgres:postgres",
+    "DB_NAME": "careers",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_WEEKS": "1",
+}.items():
+    os.environ.setdefault(name, value)
+
+
+@pytest.fixture(scope="session")
+def database():
+    """The sync engine, skipping the test when Postgres is unreachable."""
+    from sqlalchemy import text
+    from sqlalchemy.exc import SQLAlchemyError
+    from backend.api.db_config import engine
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    except SQLAlchemyError as exc:
+        pytest.skip(f"Postgres is not available: {exc.__class__.__name__}")
+    return engine
@@ -0,0 +1,49 @@
+#!/usr/bin/python3
+"""Inference engines against the stored reference probabilities."""
+import os
+import numpy as np
+import pytest
+from backend.api.v1.recommender.engines import load_engine
+
+REFERENCE_PATH = os.path.join(
+    os.path.dirname(__file__), "data", "model_career_RS_reference.npz"
+)
+ATOL = 1e-5
+
+
+@pytest.fixture(scope="module")
+def reference():
+    """Sample rows and the probabilities recorded for them."""
+    with np.load(REFERENCE_PATH) as data:
+        return data["inputs"], data["probs"]
+
+
+@pytest.mark.parametrize("engine", ["numpy", "mmap"])
+def test_engine_matches_reference(engine, reference):
+    """The engine's probabilities match the recorded ones."""
+    inputs, probs = reference
+    actual = load_engine(engine).predict(inputs)
+    assert actual.shape == probs.shape
+    np.testing.assert_allclose(actual, probs, rtol=0, atol=ATOL)
+
+
+@pytest.mark.parametrize("engine", ["numpy", "mmap"])
+def test_engine_scores_rows_independently(engine, reference):
+    """A row scores the same alone as within a batch."""
+    inputs, _ = reference
+    model = load_engine(engine)
+    batched = model.predict(inputs)
+    for index in (0, len(inputs) // 2, len(inputs) - 1):
+        np.testing.assert_allclose(
+            model.predict(inputs[index:index + 1])[0], batched[index],
+            rtol=0, atol=ATOL
+        )
+
+
+def test_keras_matches_reference(reference):
+    """The recorded probabilities are those of the Keras model."""
+    pytest.importorskip("tensorflow")
+    inputs, probs = reference
+    np.testing.assert_allclose(
+        load_engine("keras").predict(inputs), probs, rtol=0, atol=ATOL
+    )
@@ -0,0 +1,41 @@
+#!/usr/bin/python3
+"""Cursor keys checked against the key columns of each list."""
+import pytest
+from backend.api.v1.repositories.careers import CAREER_KEY
+from backend.api.v1.repositories.pagination import NEXT, PageRequest
+from backend.api.v1.repositories.users import USER_KEY
+
+USER = "84de3dd3-f3ef-4317-9372-460782a9f8f5"
+
+
+@pytest.mark.parametrize("keys, values", [
+    (CAREER_KEY, [5]),
+    (USER_KEY, ["2020-01-01T00:00:00", USER]),
+])
+def test_fitting_key_is_typed(keys, values):
+    """A key of the list's own columns is bound with their types."""
+    key = PageRequest(50, NEXT, values).key(keys)
+    assert len(key) == len(keys)
+    assert str(key[-1]) == str(values[-1])
+
+
+@pytest.mark.parametrize("keys, values", [
+    (CAREER_KEY, ["abc"]),
+    (CAREER_KEY, [[1]]),
+    (CAREER_KEY, [True]),
+    (CAREER_KEY, [2 ** 40]),
+    (CAREER_KEY, [1, 2]),
+    (USER_KEY, ["2020-01-01T00:00:00", "nope"]),
+    (USER_KEY, ["2020-01-01T00:00:00", {"id": USER}]),
+    (USER_KEY, [5, USER]),
+    (USER_KEY, [5]),
+])
+def test_key_of_the_wrong_type_is_refused(keys, values):
+    """A key not fitting the columns never reaches the database."""
+    with pytest.raises(ValueError):
+        PageRequest(50, NEXT, values).key(keys)
+
+
+def test_first_page_has_no_key():
+    """Without a cursor the page starts at the beginning."""
+    assert PageRequest(50).key(CAREER_KEY) is None
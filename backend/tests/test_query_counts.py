@@ -0,0 +1,133 @@
+#!/usr/bin/python3
+"""
+Catalog pages run as many statements for 1 row as for 50.
+
+Every page is requested through the app on a connection whose transaction
+is rolled back afterwards; the catalog is emptied and seeded inside it.
+"""
+import asyncio
+import uuid
+from typing import Dict
+import httpx
+import pytest
+from sqlalchemy import event, insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.api.db_config import async_engine, get_db, get_read_db
+from backend.api.v1.auths.oauth import (
+    create_token, token_cache, user_cache
+)
+from backend.api.v1.rating_stats import COLUMNS, STATS, aggregate
+from backend.api.v1.routes.app import app
+from backend.api.v1.templating import fragments
+
+# (page, text it shows once seeded)
+PAGES = (
+    ("/careers/", "Career {rows}"),
+    ("/careers/career_with_skills", "Skill {rows}"),
+    ("/courses/", "Course {rows}"),
+    ("/careers/{career}", "Career 1"),
+    ("/careers/career_with_skills/{career}", "Skill {rows}"),
+    ("/courses/{course}", "Course 1"),
+)
+SEED = (
+    "INSERT INTO users (full_name, username, email, password) "
+    "SELECT 'Rater ' || g, :tag || '-' || g, :tag || '-' || g || '@x.io', "
+    "'x' FROM generate_series(1, :rows) g",
+    "INSERT INTO careers (title, description, user_id) "
+    "SELECT 'Career ' || g, 'About career ' || g, :owner "
+    "FROM generate_series(1, :rows) g",
+    "INSERT INTO skills (career_id, title, proficiency) "
+    "SELECT careers.id, 'Skill ' || g, g % 5 + 1 "
+    "FROM careers, generate_series(1, :rows) g",
+    "INSERT INTO courses (title, description, owner_id, career_id) "
+    "SELECT 'Course ' || g, 'About course ' || g, :owner, "
+    "(SELECT min(id) FROM careers) FROM generate_series(1, :rows) g",
+    "INSERT INTO ratings (user_id, course_id, rating) "
+    "SELECT users.id, courses.id, (courses.id + g) % 5 + 1 "
+    "FROM courses, users, generate_series(1, 1) g "
+    "WHERE users.username LIKE :tag || '-%'",
+)
+
+
+async def seed(connection, rows: int, owner: str) -> Dict[str, int]:
+    """Replace the catalog with rows careers, courses, skills and raters."""
+    await connection.execute(text(
+        "TRUNCATE careers, skills, courses, ratings, course_rating_stats, "
+        "enrollments, preferences CASCADE"
+    ))
+    tag = f"qc-{uuid.uuid4().hex[:8]}"
+    for statement in SEED:
+        await connection.execute(
+            text(statement), {"rows": rows, "owner": owner, "tag": tag}
+        )
+    await connection.execute(insert(STATS).from_select(COLUMNS, aggregate()))
+    return {
+        "career": await connection.scalar(text("SELECT min(id) FROM careers")),
+        "course": await connection.scalar(text("SELECT min(id) FROM courses")),
+    }
+
+
+async def page_counts(rows: int, owner: str) -> Dict[str, int]:
+    """Statements each page runs with the catalog seeded with rows."""
+    counts = {}
+    # the versions read by the pages roll back with the seed, so blocks
+    # and users cached by an earlier run would be served again
+    for cache in (fragments.cache, token_cache, user_cache):
+        cache.clear()
+    async with async_engine.connect() as connection:
+        transaction = await connection.begin()
+        statements = []
+
+        def count(conn, cursor, statement, *args):
+            if conn is connection.sync_connection:
+                statements.append(statement)
+
+        async def session():
+            yield AsyncSession(bind=connection, expire_on_commit=False)
+
+        app.dependency_overrides[get_db] = session
+        app.dependency_overrides[get_read_db] = session
+        event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+        try:
+            ids = await seed(connection, rows, owner)
+            headers = {
+                "Authorization": f"Bearer {create_token({'id': owner})}"
+            }
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app),
+                base_url="http://test"
+            ) as client:
+                for page, shown in PAGES:
+                    statements.clear()
+                    response = await client.get(
+                        page.format(**ids), headers=headers
+                    )
+                    assert response.status_code == 200, page
+                    assert shown.format(rows=rows) in response.text, page
+                    counts[page] = len(statements)
+        finally:
+            event.remove(
+                async_engine.sync_engine, "before_cursor_execute", count
+            )
+            app.dependency_overrides.clear()
+            await transaction.rollback()
+    await async_engine.dispose()
+    return counts
+
+
+@pytest.fixture
+def owner(database):
+    """Id of an existing user, owner of the seeded catalog."""
+    with database.connect() as connection:
+        user = connection.scalar(text("SELECT id FROM users LIMIT 1"))
+    if user is None:
+        pytest.skip("no user to own the seeded catalog")
+    return str(user)
+
+
+def test_query_count_does_not_grow_with_rows(owner):
+    """Each list and detail page runs the same statements for 1 and 50."""
+    one = asyncio.run(page_counts(1, owner))
+    fifty = asyncio.run(page_counts(50, owner))
+    assert one == fifty
+    assert all(one.values())
@@ -0,0 +1,19 @@
+#!/usr/bin/python3
+"""Index use of the hot lookups and keyset pages, see ``query_plans``."""
+import pytest
+from backend.api.v1.query_plans import lookups, too_small, used_indexes
+
+LOOKUPS = list(lookups())
+
+
+@pytest.mark.parametrize(
+    "statement, indexes", [lookup[1:] for lookup in LOOKUPS],
+    ids=[lookup[0] for lookup in LOOKUPS]
+)
+def test_lookup_uses_its_index(database, statement, indexes):
+    """The plan of the lookup scans one of its indexes."""
+    with database.connect() as connection:
+        used = used_indexes(connection, statement)
+        if not set(indexes) & set(used) and too_small(connection, statement):
+            pytest.skip("table too small for the plan to tell indexes apart")
+    assert set(indexes) & set(used), f"plan uses {used or 'no index'}"
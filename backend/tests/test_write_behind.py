@@ -0,0 +1,144 @@
+#!/usr/bin/python3
+"""Crash replay, deduplication and dead letters of the write-behind queue."""
+import asyncio
+import uuid
+import pytest
+from sqlalchemy import text
+from backend.api.db_config import async_engine
+# imported so that the relationships of the written models resolve
+from backend.api.v1.models import (  # noqa: F401
+    user_models, careers, courses, enrollments, preferences, ratings,
+    write_offsets
+)
+from backend.api.v1.write_behind import (
+    ENROLL, PREFER, RATE, DurableQueue, WriteBehind
+)
+
+
+def test_unacknowledged_writes_are_replayed_after_a_crash(tmp_path):
+    """Writes survive a crash until acknowledged, keeping their seqs."""
+    path = str(tmp_path / "queue.db")
+    queue = DurableQueue(path)
+    seqs = queue.append([
+        (ENROLL, "user", {"course_id": course_id}) for course_id in range(5)
+    ])
+    queue.ack(seqs[1])
+    # crash: the process dies without acknowledging the rest or closing
+    reopened = DurableQueue(path)
+    assert reopened.queue_id == queue.queue_id
+    replayed = reopened.peek(10)
+    assert [write.seq for write in replayed] == seqs[2:]
+    assert [write.payload["course_id"] for write in replayed] == [2, 3, 4]
+
+    reopened.ack(seqs[-1])
+    # seqs are never reused, so an offset stored elsewhere stays valid
+    assert reopened.append([(ENROLL, "user", {"course_id": 5})])[0] > seqs[-1]
+    reopened.close()
+    queue.close()
+
+
+@pytest.fixture
+def user_id(database):
+    """A throwaway user, removed with its writes afterwards."""
+    user = uuid.uuid4()
+    with database.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO users (id, full_name, username, email, password) "
+            "VALUES (:id, 'Write behind', :name, :email, 'x')"
+        ), {
+            "id": user, "name": f"wb-{user.hex[:12]}",
+            "email": f"wb-{user.hex[:12]}@example.com",
+        })
+    yield str(user)
+    with database.begin() as connection:
+        for table in ("preferences", "enrollments"):
+            connection.execute(
+                text(f"DELETE FROM {table} WHERE user_id = :id"),
+                {"id": user}
+            )
+        connection.execute(
+            text("DELETE FROM users WHERE id = :id"), {"id": user}
+        )
+
+
+def preferred(database, user: str) -> list:
+    """Career ids the user prefers."""
+    with database.connect() as connection:
+        return sorted(connection.execute(text(
+            "SELECT career_id FROM preferences WHERE user_id = :id"
+        ), {"id": user}).scalars())
+
+
+def career_ids(database) -> list:
+    """Ids of two careers."""
+    with database.connect() as connection:
+        return list(connection.execute(
+            text("SELECT id FROM careers ORDER BY id LIMIT 2")
+        ).scalars())
+
+
+def test_replayed_batch_is_skipped_by_seq(tmp_path, database, user_id):
+    """A batch applied before the crash is not applied a second time."""
+    first, second = career_ids(database)
+    path = str(tmp_path / "queue.db")
+
+    async def scenario():
+        buffer = WriteBehind(path)
+        buffer.queue = DurableQueue(path)
+        buffer.queue.append([(PREFER, user_id, {"career_ids": [first]})])
+        await buffer.flush()
+        # applied, then the process died before the local acknowledgement
+        seqs = buffer.queue.append([
+            (PREFER, user_id, {"career_ids": [second]})
+        ])
+        await buffer._apply(buffer.queue.peek(10))
+        buffer.queue.close()
+        # a user's later write changes what a replay would leave behind
+        with database.begin() as connection:
+            connection.execute(text(
+                "UPDATE preferences SET career_id = :career "
+                "WHERE user_id = :id"
+            ), {"career": first, "id": user_id})
+
+        restarted = WriteBehind(path)
+        restarted.queue = DurableQueue(path)
+        assert [write.seq for write in restarted.queue.peek(10)] == seqs
+        assert await restarted.flush() == 1
+        assert (restarted.flushed, restarted.skipped) == (0, 1)
+        assert restarted.queue.depth()[0] == 0
+        restarted.queue.close()
+        await async_engine.dispose()
+
+    asyncio.run(scenario())
+    assert preferred(database, user_id) == [first]
+
+
+def test_poison_write_is_dead_lettered(tmp_path, database, user_id):
+    """A write that always fails is set aside and the queue moves on."""
+    first, second = career_ids(database)
+    path = str(tmp_path / "queue.db")
+
+    async def scenario():
+        buffer = WriteBehind(path, max_attempts=2)
+        buffer.queue = DurableQueue(path)
+        seqs = buffer.queue.append([
+            (PREFER, user_id, {"career_ids": [first]}),
+            # a course id out of range of the column fails every time
+            (RATE, user_id, {"course_id": 2 ** 40, "rating": 3}),
+            (PREFER, user_id, {"career_ids": [second]}),
+        ])
+        for _ in range(buffer.max_attempts):
+            with pytest.raises(Exception):
+                await buffer.flush()
+        assert buffer.queue.depth()[0] == 3
+        assert await buffer.flush() == 3
+        assert (buffer.flushed, buffer.dead_lettered) == (2, 1)
+        assert buffer.queue.depth()[0] == 0
+        assert [write.seq for write in buffer.queue.dead_letters()] == [
+            seqs[1]
+        ]
+        buffer.queue.close()
+        await async_engine.dispose()
+
+    asyncio.run(scenario())
+    assert preferred(database, user_id) == [second]